@@ -0,0 +1,85 @@
+"""partition gpu_metrics and system_metrics by day
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-16 10:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '004'
+down_revision = '003'
+branch_labels = None
+depends_on = None
+
+PARTITION_CLAUSE = "PARTITION BY RANGE (TO_DAYS(`timestamp`)) (PARTITION p_max VALUES LESS THAN MAXVALUE)"
+
+def _rebuild_table(table: str, create_sql: str, columns: str):
+    """用新表结构重建指标表并迁移数据"""
+    op.execute(f"RENAME TABLE {table} TO {table}_old")
+    op.execute(create_sql)
+    op.execute(
+        f"INSERT INTO {table} ({columns}) "
+        f"SELECT {columns} FROM {table}_old WHERE timestamp IS NOT NULL"
+    )
+    op.execute(f"DROP TABLE {table}_old")
+
+def upgrade():
+    """将指标表重建为按天RANGE分区表，主键改为(id, timestamp)"""
+    _rebuild_table(
+        'gpu_metrics',
+        f"""
+        CREATE TABLE gpu_metrics (
+            id INTEGER NOT NULL AUTO_INCREMENT,
+            device_id INTEGER NOT NULL COMMENT 'GPU设备ID',
+            timestamp DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP COMMENT '时间戳',
+            utilization FLOAT NOT NULL COMMENT '利用率(%)',
+            memory_used INTEGER NOT NULL COMMENT '内存使用(MB)',
+            memory_total INTEGER NOT NULL COMMENT '总内存(MB)',
+            temperature FLOAT NULL COMMENT '温度(摄氏度)',
+            power_usage FLOAT NULL COMMENT '功耗(瓦特)',
+            fan_speed FLOAT NULL COMMENT '风扇转速(%)',
+            PRIMARY KEY (id, timestamp),
+            INDEX idx_gpu_device_time (device_id, timestamp)
+        ) DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+        {PARTITION_CLAUSE}
+        """,
+        "id, device_id, timestamp, utilization, memory_used, memory_total, "
+        "temperature, power_usage, fan_speed"
+    )
+
+    _rebuild_table(
+        'system_metrics',
+        f"""
+        CREATE TABLE system_metrics (
+            id INTEGER NOT NULL AUTO_INCREMENT,
+            timestamp DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP COMMENT '时间戳',
+            cpu_usage FLOAT NOT NULL COMMENT 'CPU使用率(%)',
+            memory_usage FLOAT NOT NULL COMMENT '内存使用率(%)',
+            memory_total INTEGER NOT NULL COMMENT '总内存(MB)',
+            memory_used INTEGER NOT NULL COMMENT '已用内存(MB)',
+            disk_usage FLOAT NOT NULL COMMENT '磁盘使用率(%)',
+            disk_total INTEGER NOT NULL COMMENT '总磁盘空间(GB)',
+            disk_used INTEGER NOT NULL COMMENT '已用磁盘空间(GB)',
+            network_sent INTEGER NULL COMMENT '网络发送字节数',
+            network_recv INTEGER NULL COMMENT '网络接收字节数',
+            load_average_1m FLOAT NULL COMMENT '1分钟负载',
+            load_average_5m FLOAT NULL COMMENT '5分钟负载',
+            load_average_15m FLOAT NULL COMMENT '15分钟负载',
+            PRIMARY KEY (id, timestamp)
+        ) DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+        {PARTITION_CLAUSE}
+        """,
+        "id, timestamp, cpu_usage, memory_usage, memory_total, memory_used, "
+        "disk_usage, disk_total, disk_used, network_sent, network_recv, "
+        "load_average_1m, load_average_5m, load_average_15m"
+    )
+
+def downgrade():
+    """移除分区，恢复单列主键"""
+    for table in ('gpu_metrics', 'system_metrics'):
+        op.execute(f"ALTER TABLE {table} REMOVE PARTITIONING")
+        op.execute(f"ALTER TABLE {table} DROP PRIMARY KEY, ADD PRIMARY KEY (id)")
+    op.create_index('idx_gpu_timestamp', 'gpu_metrics', ['timestamp'])
+    op.create_index('idx_system_timestamp', 'system_metrics', ['timestamp'])
@@ -0,0 +1,54 @@
+"""store enum-valued string columns as native ENUM
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-16 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '005'
+down_revision = '004'
+branch_labels = None
+depends_on = None
+
+FRAMEWORK_VALUES = ('llama_cpp', 'vllm', 'docker')
+MODEL_STATUS_VALUES = ('stopped', 'starting', 'running', 'error', 'stopping', 'preempted')
+HEALTH_STATUS_VALUES = ('healthy', 'unhealthy', 'unknown')
+ALERT_LEVEL_VALUES = ('info', 'warning', 'error', 'critical')
+ALERT_SEVERITY_VALUES = ('low', 'medium', 'high', 'critical')
+
+# (表名, 列名, 枚举值, 是否可空, 注释)
+ENUM_COLUMNS = [
+    ('model_configs', 'framework', FRAMEWORK_VALUES, False, '推理框架类型'),
+    ('model_status', 'status', MODEL_STATUS_VALUES, False, '模型状态'),
+    ('model_status', 'health_status', HEALTH_STATUS_VALUES, True, '健康状态'),
+    ('alert_rules', 'level', ALERT_LEVEL_VALUES, False, '告警级别'),
+    ('alert_events', 'level', ALERT_LEVEL_VALUES, False, '告警级别'),
+    ('alert_rules_v2', 'severity', ALERT_SEVERITY_VALUES, False, '严重程度'),
+    ('alert_history', 'severity', ALERT_SEVERITY_VALUES, False, '严重程度'),
+]
+
+def upgrade():
+    """将VARCHAR(50)枚举列改为原生ENUM，MySQL/TiDB按1-2字节序号存储"""
+    for table, column, values, nullable, comment in ENUM_COLUMNS:
+        op.alter_column(
+            table, column,
+            existing_type=sa.String(50),
+            type_=sa.Enum(*values, name=f'{table}_{column}'),
+            existing_nullable=nullable,
+            existing_comment=comment
+        )
+
+def downgrade():
+    """恢复为VARCHAR(50)"""
+    for table, column, values, nullable, comment in ENUM_COLUMNS:
+        op.alter_column(
+            table, column,
+            existing_type=sa.Enum(*values, name=f'{table}_{column}'),
+            type_=sa.String(50),
+            existing_nullable=nullable,
+            existing_comment=comment
+        )
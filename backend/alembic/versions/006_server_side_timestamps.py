@@ -0,0 +1,54 @@
+"""server-side defaults for created_at / updated_at
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-16 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '006'
+down_revision = '005'
+branch_labels = None
+depends_on = None
+
+CREATED_AT_TABLES = [
+    'model_configs', 'system_configs', 'config_backups', 'config_change_logs',
+    'alert_rules', 'alert_events', 'alert_rules_v2', 'alert_history',
+]
+UPDATED_AT_TABLES = [
+    'model_configs', 'system_configs', 'model_status',
+    'alert_rules', 'alert_rules_v2', 'alert_history',
+]
+
+def upgrade():
+    """时间戳由数据库服务端填充，INSERT/UPDATE不再携带客户端时间"""
+    for table in CREATED_AT_TABLES:
+        op.execute(f"UPDATE {table} SET created_at = CURRENT_TIMESTAMP WHERE created_at IS NULL")
+        op.alter_column(
+            table, 'created_at',
+            existing_type=sa.DateTime(),
+            nullable=False,
+            server_default=sa.text('CURRENT_TIMESTAMP')
+        )
+    
+    for table in UPDATED_AT_TABLES:
+        op.execute(f"UPDATE {table} SET updated_at = CURRENT_TIMESTAMP WHERE updated_at IS NULL")
+        op.alter_column(
+            table, 'updated_at',
+            existing_type=sa.DateTime(),
+            nullable=False,
+            server_default=sa.text('CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP')
+        )
+
+def downgrade():
+    """移除服务端默认值"""
+    for table in CREATED_AT_TABLES:
+        op.alter_column(table, 'created_at', existing_type=sa.DateTime(),
+                        nullable=True, server_default=None)
+    
+    for table in UPDATED_AT_TABLES:
+        op.alter_column(table, 'updated_at', existing_type=sa.DateTime(),
+                        nullable=True, server_default=None)
@@ -0,0 +1,52 @@
+"""tighten oversized columns on hot tables
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-16 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '007'
+down_revision = '006'
+branch_labels = None
+depends_on = None
+
+def _convert_column(table: str, column: str, new_type, backfill_expr: str, comment: str):
+    """新增列回填转换后的值，再替换旧列"""
+    tmp_column = f'{column}_new'
+    op.add_column(table, sa.Column(tmp_column, new_type, nullable=True, comment=comment))
+    op.execute(f"UPDATE {table} SET {tmp_column} = {backfill_expr} WHERE {column} IS NOT NULL")
+    op.drop_column(table, column)
+    op.alter_column(table, tmp_column, new_column_name=column,
+                    existing_type=new_type, existing_nullable=True, existing_comment=comment)
+
+def upgrade():
+    """收紧列宽：IP地址/校验和改为二进制，短状态字符串改为VARCHAR(16)"""
+    _convert_column('config_change_logs', 'ip_address', sa.VARBINARY(16),
+                    'INET6_ATON(ip_address)', 'IP地址')
+    _convert_column('config_backups', 'checksum', sa.BINARY(32),
+                    'UNHEX(checksum)', '数据校验和(SHA-256)')
+    
+    op.alter_column('config_change_logs', 'change_type',
+                    existing_type=sa.String(50), type_=sa.String(16),
+                    existing_nullable=False, existing_comment='变更类型')
+    op.alter_column('alert_history', 'status',
+                    existing_type=sa.String(50), type_=sa.String(16),
+                    existing_nullable=False, existing_comment='状态')
+
+def downgrade():
+    """恢复原列类型"""
+    op.alter_column('alert_history', 'status',
+                    existing_type=sa.String(16), type_=sa.String(50),
+                    existing_nullable=False, existing_comment='状态')
+    op.alter_column('config_change_logs', 'change_type',
+                    existing_type=sa.String(16), type_=sa.String(50),
+                    existing_nullable=False, existing_comment='变更类型')
+    
+    _convert_column('config_backups', 'checksum', sa.String(64),
+                    'LOWER(HEX(checksum))', '数据校验和')
+    _convert_column('config_change_logs', 'ip_address', sa.String(45),
+                    'INET6_NTOA(ip_address)', 'IP地址')
@@ -0,0 +1,38 @@
+"""foreign keys backing ORM relationships
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-16 14:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '008'
+down_revision = '007'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    """为model_status.model_id和alert_events.rule_id添加外键"""
+    # 清理无对应配置/规则的孤立记录
+    op.execute(
+        "DELETE FROM model_status WHERE model_id NOT IN (SELECT id FROM model_configs)"
+    )
+    op.execute(
+        "DELETE FROM alert_events WHERE rule_id NOT IN (SELECT id FROM alert_rules)"
+    )
+    
+    op.create_foreign_key(
+        'fk_model_status_model_id', 'model_status', 'model_configs',
+        ['model_id'], ['id'], ondelete='CASCADE'
+    )
+    op.create_foreign_key(
+        'fk_alert_events_rule_id', 'alert_events', 'alert_rules',
+        ['rule_id'], ['id']
+    )
+
+def downgrade():
+    """移除外键"""
+    op.drop_constraint('fk_alert_events_rule_id', 'alert_events', type_='foreignkey')
+    op.drop_constraint('fk_model_status_model_id', 'model_status', type_='foreignkey')
@@ -0,0 +1,45 @@
+"""generated columns and indexes for JSON paths used in filters
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-16 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '009'
+down_revision = '008'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    """将WHERE中用到的JSON路径物化为存储生成列并建立索引"""
+    op.add_column('model_configs', sa.Column(
+        'gpu_device_first', sa.Integer(),
+        sa.Computed("CAST(JSON_EXTRACT(gpu_devices, '$[0]') AS UNSIGNED)", persisted=True),
+        comment='首个GPU设备(由gpu_devices生成)'
+    ))
+    op.create_index('idx_model_gpu_device_first', 'model_configs', ['gpu_device_first'])
+    
+    op.add_column('alert_history', sa.Column(
+        'env_label', sa.String(32),
+        sa.Computed("JSON_UNQUOTE(JSON_EXTRACT(labels, '$.env'))", persisted=True),
+        comment='env标签(由labels生成)'
+    ))
+    op.create_index('idx_alert_history_env_label', 'alert_history', ['env_label'])
+    
+    # 多值索引，需要MySQL 8.0.17+或TiDB 6.6+
+    op.execute(
+        "CREATE INDEX idx_alert_rule_v2_channels ON alert_rules_v2 "
+        "((CAST(notification_channels AS CHAR(64) ARRAY)))"
+    )
+
+def downgrade():
+    """移除生成列和索引"""
+    op.drop_index('idx_alert_rule_v2_channels', table_name='alert_rules_v2')
+    op.drop_index('idx_alert_history_env_label', table_name='alert_history')
+    op.drop_column('alert_history', 'env_label')
+    op.drop_index('idx_model_gpu_device_first', table_name='model_configs')
+    op.drop_column('model_configs', 'gpu_device_first')
@@ -0,0 +1,88 @@
+"""store config backup data as compressed binary
+
+Revision ID: 010
+Revises: 009
+Create Date: 2026-10-16 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+import hashlib
+import json
+
+from app.models.database import encode_json_payload, compress_payload, decompress_payload
+
+# revision identifiers, used by Alembic.
+revision = '010'
+down_revision = '009'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    """backup_data由JSON文本改为压缩后的LONGBLOB，并记录压缩后大小"""
+    op.add_column('config_backups', sa.Column(
+        'backup_blob', mysql.LONGBLOB(), nullable=True, comment='备份数据(压缩JSON)'
+    ))
+    op.add_column('config_backups', sa.Column(
+        'compressed_size', sa.Integer(), nullable=False, server_default='0', comment='压缩后大小(字节)'
+    ))
+
+    # 压缩需要在应用侧完成；备份大小和校验和按新的紧凑编码重新计算
+    conn = op.get_bind()
+    rows = conn.execute(sa.text("SELECT id, backup_data FROM config_backups")).fetchall()
+    for row_id, backup_json in rows:
+        payload = encode_json_payload(json.loads(backup_json))
+        compressed = compress_payload(payload)
+        conn.execute(
+            sa.text(
+                "UPDATE config_backups SET backup_blob = :blob, backup_size = :size, "
+                "compressed_size = :compressed_size, checksum = UNHEX(:checksum) WHERE id = :id"
+            ),
+            {
+                "blob": compressed,
+                "size": len(payload),
+                "compressed_size": len(compressed),
+                "checksum": hashlib.sha256(payload).hexdigest(),
+                "id": row_id,
+            }
+        )
+
+    op.drop_column('config_backups', 'backup_data')
+    op.alter_column('config_backups', 'backup_blob', new_column_name='backup_data',
+                    existing_type=mysql.LONGBLOB(), nullable=False,
+                    existing_comment='备份数据(压缩JSON)')
+    op.alter_column('config_backups', 'backup_size',
+                    existing_type=sa.Integer(), existing_nullable=False,
+                    comment='备份大小(未压缩字节)', existing_comment='备份大小(字节)')
+
+def downgrade():
+    """恢复为JSON文本"""
+    op.add_column('config_backups', sa.Column(
+        'backup_text', sa.Text(), nullable=True, comment='备份数据(JSON)'
+    ))
+
+    conn = op.get_bind()
+    rows = conn.execute(sa.text("SELECT id, backup_data FROM config_backups")).fetchall()
+    for row_id, compressed in rows:
+        backup_json = decompress_payload(compressed).decode('utf-8')
+        conn.execute(
+            sa.text(
+                "UPDATE config_backups SET backup_text = :text, backup_size = :size, "
+                "checksum = UNHEX(:checksum) WHERE id = :id"
+            ),
+            {
+                "text": backup_json,
+                "size": len(backup_json.encode('utf-8')),
+                "checksum": hashlib.sha256(backup_json.encode('utf-8')).hexdigest(),
+                "id": row_id,
+            }
+        )
+
+    op.drop_column('config_backups', 'backup_data')
+    op.alter_column('config_backups', 'backup_text', new_column_name='backup_data',
+                    existing_type=sa.Text(), nullable=False, existing_comment='备份数据(JSON)')
+    op.drop_column('config_backups', 'compressed_size')
+    op.alter_column('config_backups', 'backup_size',
+                    existing_type=sa.Integer(), existing_nullable=False,
+                    comment='备份大小(字节)', existing_comment='备份大小(未压缩字节)')
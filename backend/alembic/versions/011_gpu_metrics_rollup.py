@@ -0,0 +1,38 @@
+"""add gpu_metrics_rollup table
+
+Revision ID: 011
+Revises: 010
+Create Date: 2026-10-16 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '011'
+down_revision = '010'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    """创建GPU指标汇总表"""
+    op.create_table('gpu_metrics_rollup',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('device_id', sa.Integer(), nullable=False, comment='GPU设备ID'),
+        sa.Column('bucket_start', sa.DateTime(), nullable=False, comment='时间桶起始时间'),
+        sa.Column('bucket_width_seconds', sa.Integer(), nullable=False, comment='时间桶宽度(秒)'),
+        sa.Column('sample_count', sa.Integer(), nullable=False, comment='样本数'),
+        sa.Column('util_avg', sa.Float(), nullable=False, comment='平均利用率(%)'),
+        sa.Column('util_max', sa.Float(), nullable=False, comment='最大利用率(%)'),
+        sa.Column('util_min', sa.Float(), nullable=False, comment='最小利用率(%)'),
+        sa.Column('mem_used_avg', sa.Float(), nullable=False, comment='平均内存使用(MB)'),
+        sa.Column('mem_used_max', sa.Integer(), nullable=False, comment='最大内存使用(MB)'),
+        sa.Column('temperature_max', sa.Float(), nullable=True, comment='最高温度(摄氏度)'),
+        sa.Column('power_avg', sa.Float(), nullable=True, comment='平均功耗(瓦特)'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('device_id', 'bucket_start', 'bucket_width_seconds', name='uq_gpu_rollup_bucket')
+    )
+
+def downgrade():
+    """删除GPU指标汇总表"""
+    op.drop_table('gpu_metrics_rollup')
@@ -0,0 +1,29 @@
+"""one model_status row per model
+
+Revision ID: 012
+Revises: 011
+Create Date: 2026-10-16 18:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '012'
+down_revision = '011'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    """清理重复的状态行（保留最新一行）后为model_id添加唯一约束"""
+    op.execute(
+        "DELETE s FROM model_status s "
+        "JOIN model_status newer ON newer.model_id = s.model_id AND newer.id > s.id"
+    )
+    # 先建唯一约束再删除原索引，保证外键fk_model_status_model_id始终有可用索引
+    op.create_unique_constraint('uq_model_status_model_id', 'model_status', ['model_id'])
+    op.drop_index('idx_status_model_id', table_name='model_status')
+
+def downgrade():
+    """移除唯一约束，恢复普通索引"""
+    op.create_index('idx_status_model_id', 'model_status', ['model_id'])
+    op.drop_constraint('uq_model_status_model_id', 'model_status', type_='unique')
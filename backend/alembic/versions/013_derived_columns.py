@@ -0,0 +1,70 @@
+"""move host totals to host_info and derive compressed_size
+
+Revision ID: 013
+Revises: 012
+Create Date: 2026-10-16 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '013'
+down_revision = '012'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    """总内存/总磁盘移入host_info，compressed_size改为虚拟生成列"""
+    op.create_table('host_info',
+        sa.Column('id', sa.SmallInteger(), autoincrement=True, nullable=False),
+        sa.Column('hostname', sa.String(255), nullable=False, comment='主机名'),
+        sa.Column('memory_total', sa.Integer(), nullable=False, comment='总内存(MB)'),
+        sa.Column('disk_total', sa.Integer(), nullable=False, comment='总磁盘空间(GB)'),
+        sa.Column('updated_at', sa.DateTime(), nullable=False, comment='更新时间',
+                  server_default=sa.text('CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP')),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('hostname')
+    )
+    
+    # 已有指标均来自本机，以最新一行的总量作为主机信息
+    op.execute(
+        "INSERT INTO host_info (hostname, memory_total, disk_total) "
+        "SELECT @@hostname, memory_total, disk_total FROM system_metrics "
+        "ORDER BY timestamp DESC LIMIT 1"
+    )
+    op.add_column('system_metrics', sa.Column(
+        'host_id', sa.SmallInteger(), nullable=False, server_default='1', comment='主机ID'
+    ))
+    op.alter_column('system_metrics', 'host_id', existing_type=sa.SmallInteger(),
+                    existing_nullable=False, server_default=None, existing_comment='主机ID')
+    op.drop_column('system_metrics', 'memory_total')
+    op.drop_column('system_metrics', 'disk_total')
+    
+    op.drop_column('config_backups', 'compressed_size')
+    op.add_column('config_backups', sa.Column(
+        'compressed_size', sa.Integer(),
+        sa.Computed('OCTET_LENGTH(backup_data)', persisted=False),
+        comment='压缩后大小(字节，由backup_data生成)'
+    ))
+
+def downgrade():
+    """恢复为物理列"""
+    op.drop_column('config_backups', 'compressed_size')
+    op.add_column('config_backups', sa.Column(
+        'compressed_size', sa.Integer(), nullable=False, server_default='0', comment='压缩后大小(字节)'
+    ))
+    op.execute("UPDATE config_backups SET compressed_size = OCTET_LENGTH(backup_data)")
+    
+    op.add_column('system_metrics', sa.Column(
+        'memory_total', sa.Integer(), nullable=False, server_default='0', comment='总内存(MB)'
+    ))
+    op.add_column('system_metrics', sa.Column(
+        'disk_total', sa.Integer(), nullable=False, server_default='0', comment='总磁盘空间(GB)'
+    ))
+    op.execute(
+        "UPDATE system_metrics m JOIN host_info h ON h.id = m.host_id "
+        "SET m.memory_total = h.memory_total, m.disk_total = h.disk_total"
+    )
+    op.drop_column('system_metrics', 'host_id')
+    op.drop_table('host_info')
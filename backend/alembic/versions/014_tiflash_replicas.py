@@ -0,0 +1,36 @@
+"""add TiFlash replicas for metrics tables
+
+Revision ID: 014
+Revises: 013
+Create Date: 2026-10-16 20:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '014'
+down_revision = '013'
+branch_labels = None
+depends_on = None
+
+TIFLASH_TABLES = ('gpu_metrics', 'system_metrics')
+
+def _is_tidb() -> bool:
+    """检查当前数据库是否为TiDB（MySQL不支持TiFlash副本）"""
+    version = op.get_bind().execute(sa.text("SELECT VERSION()")).scalar() or ""
+    return "TiDB" in version
+
+def upgrade():
+    """为指标表创建TiFlash列存副本，分析查询由列存读取"""
+    if not _is_tidb():
+        return
+    for table in TIFLASH_TABLES:
+        op.execute(f"ALTER TABLE {table} SET TIFLASH REPLICA 1")
+
+def downgrade():
+    """移除TiFlash副本"""
+    if not _is_tidb():
+        return
+    for table in TIFLASH_TABLES:
+        op.execute(f"ALTER TABLE {table} SET TIFLASH REPLICA 0")
@@ -0,0 +1,50 @@
+"""shrink identifier columns from VARCHAR(255)
+
+Revision ID: 015
+Revises: 014
+Create Date: 2026-10-16 21:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '015'
+down_revision = '014'
+branch_labels = None
+depends_on = None
+
+# (表名, 列名, 新长度, 是否可空, 注释)
+ID_COLUMNS = [
+    ('model_configs', 'id', 64, False, '模型唯一标识'),
+    ('model_status', 'model_id', 64, False, '模型ID'),
+    ('config_change_logs', 'model_id', 64, True, '模型ID'),
+    ('alert_rules', 'id', 64, False, '规则ID'),
+    ('alert_events', 'id', 96, False, '告警ID'),
+    ('alert_events', 'rule_id', 64, False, '规则ID'),
+    ('alert_rules_v2', 'id', 64, False, '规则ID'),
+    ('alert_history', 'alert_id', 96, False, '告警实例ID'),
+    ('alert_history', 'rule_id', 64, False, '规则ID'),
+]
+
+def _alter_id_columns(to_short: bool):
+    """修改标识列长度；外键两端需同时修改，期间关闭外键检查"""
+    op.execute("SET FOREIGN_KEY_CHECKS = 0")
+    for table, column, length, nullable, comment in ID_COLUMNS:
+        short, wide = sa.String(length), sa.String(255)
+        op.alter_column(
+            table, column,
+            existing_type=wide if to_short else short,
+            type_=short if to_short else wide,
+            existing_nullable=nullable,
+            existing_comment=comment
+        )
+    op.execute("SET FOREIGN_KEY_CHECKS = 1")
+
+def upgrade():
+    """标识列由VARCHAR(255)收紧为实际所需长度，缩小主键及所有二级索引"""
+    _alter_id_columns(to_short=True)
+
+def downgrade():
+    """恢复为VARCHAR(255)"""
+    _alter_id_columns(to_short=False)
@@ -0,0 +1,94 @@
+"""fold legacy alert_rules/alert_events into alert_rules_v2/alert_history
+
+Revision ID: 016
+Revises: 015
+Create Date: 2026-10-16 22:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '016'
+down_revision = '015'
+branch_labels = None
+depends_on = None
+
+# 旧版告警级别到新版严重程度的映射
+LEVEL_TO_SEVERITY = (
+    "CASE {column} WHEN 'info' THEN 'low' WHEN 'warning' THEN 'medium' "
+    "WHEN 'error' THEN 'high' ELSE 'critical' END"
+)
+
+def upgrade():
+    """将旧版告警规则和事件迁入新版表后删除旧表"""
+    # 旧版条件为指标名，按"指标值 > 阈值"比较
+    op.execute(f"""
+        INSERT INTO alert_rules_v2
+            (id, name, description, `condition`, severity, enabled, notification_channels,
+             notification_config, labels, annotations, created_at, updated_at)
+        SELECT r.id, r.name, r.description,
+               JSON_OBJECT('metric', r.condition, 'operator', '>', 'threshold', r.threshold, 'duration', 0),
+               {LEVEL_TO_SEVERITY.format(column='r.level')},
+               r.enabled, r.notification_channels, JSON_OBJECT(), JSON_OBJECT(), JSON_OBJECT(),
+               r.created_at, r.updated_at
+        FROM alert_rules r
+        WHERE NOT EXISTS (SELECT 1 FROM alert_rules_v2 v WHERE v.id = r.id)
+    """)
+    
+    # 事件详情和解决者并入annotations
+    op.execute(f"""
+        INSERT INTO alert_history
+            (alert_id, rule_id, rule_name, severity, message, annotations,
+             starts_at, ends_at, status, notification_sent, created_at)
+        SELECT e.id, e.rule_id, r.name,
+               {LEVEL_TO_SEVERITY.format(column='e.level')},
+               e.message,
+               IF(e.resolved_by IS NULL, e.details,
+                  JSON_MERGE_PATCH(COALESCE(e.details, JSON_OBJECT()), JSON_OBJECT('resolved_by', e.resolved_by))),
+               e.created_at, e.resolved_at,
+               IF(e.resolved, 'resolved', 'active'),
+               FALSE, e.created_at
+        FROM alert_events e
+        JOIN alert_rules r ON r.id = e.rule_id
+    """)
+    
+    op.drop_table('alert_events')
+    op.drop_table('alert_rules')
+
+def downgrade():
+    """重建空的旧版告警表（已迁移的数据保留在新版表中）"""
+    op.create_table('alert_rules',
+        sa.Column('id', sa.String(64), nullable=False, comment='规则ID'),
+        sa.Column('name', sa.String(255), nullable=False, comment='规则名称'),
+        sa.Column('condition', sa.Text(), nullable=False, comment='告警条件'),
+        sa.Column('threshold', sa.Float(), nullable=False, comment='阈值'),
+        sa.Column('level', sa.Enum('info', 'warning', 'error', 'critical', name='alert_rules_level'),
+                  nullable=False, comment='告警级别'),
+        sa.Column('enabled', sa.Boolean(), default=True, comment='是否启用'),
+        sa.Column('notification_channels', sa.JSON(), nullable=True, comment='通知渠道'),
+        sa.Column('description', sa.Text(), nullable=True, comment='规则描述'),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP'),
+                  nullable=False, comment='创建时间'),
+        sa.Column('updated_at', sa.DateTime(),
+                  server_default=sa.text('CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP'),
+                  nullable=False, comment='更新时间'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    
+    op.create_table('alert_events',
+        sa.Column('id', sa.String(96), nullable=False, comment='告警ID'),
+        sa.Column('rule_id', sa.String(64), nullable=False, comment='规则ID'),
+        sa.Column('level', sa.Enum('info', 'warning', 'error', 'critical', name='alert_events_level'),
+                  nullable=False, comment='告警级别'),
+        sa.Column('message', sa.Text(), nullable=False, comment='告警消息'),
+        sa.Column('details', sa.JSON(), nullable=True, comment='告警详情'),
+        sa.Column('resolved', sa.Boolean(), default=False, comment='是否已解决'),
+        sa.Column('resolved_at', sa.DateTime(), nullable=True, comment='解决时间'),
+        sa.Column('resolved_by', sa.String(255), nullable=True, comment='解决者'),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP'),
+                  nullable=False, comment='告警时间'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.ForeignKeyConstraint(['rule_id'], ['alert_rules.id'], name='fk_alert_events_rule_id')
+    )
+    op.create_index('idx_event_rule_id', 'alert_events', ['rule_id'])
@@ -0,0 +1,59 @@
+"""add bitmask columns for gpu devices, notification channels and changed fields
+
+Revision ID: 017
+Revises: 016
+Create Date: 2026-10-16 23:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import json
+
+from app.models.database import pack_bitmask, changed_fields_mask
+from app.models.enums import NotificationChannelFlag
+
+# revision identifiers, used by Alembic.
+revision = '017'
+down_revision = '016'
+branch_labels = None
+depends_on = None
+
+def _load_json(value):
+    """兼容驱动返回字符串或已解析对象的JSON列"""
+    return json.loads(value) if isinstance(value, (str, bytes)) else value
+
+def _backfill(table: str, key: str, source: str, target: str, convert):
+    """按JSON列回填位图列"""
+    conn = op.get_bind()
+    rows = conn.execute(sa.text(f"SELECT {key}, {source} FROM {table} WHERE {source} IS NOT NULL")).fetchall()
+    for row_key, value in rows:
+        conn.execute(
+            sa.text(f"UPDATE {table} SET {target} = :mask WHERE {key} = :key"),
+            {"mask": convert(_load_json(value)), "key": row_key}
+        )
+
+def upgrade():
+    """新增位图列并由原JSON列回填，JSON列保留供旧读取方使用"""
+    op.add_column('model_configs', sa.Column(
+        'gpu_device_mask', sa.BigInteger(), nullable=False, server_default='0',
+        comment='GPU设备位图(第i位表示设备i)'
+    ))
+    op.add_column('alert_rules_v2', sa.Column(
+        'notification_channel_mask', sa.SmallInteger(), nullable=False, server_default='0',
+        comment='通知渠道位标志(NotificationChannelFlag)'
+    ))
+    op.add_column('config_change_logs', sa.Column(
+        'changed_fields_mask', sa.SmallInteger(), nullable=False, server_default='0',
+        comment='变更字段位图(按CONFIG_CHANGE_FIELDS位序)'
+    ))
+    
+    _backfill('model_configs', 'id', 'gpu_devices', 'gpu_device_mask', pack_bitmask)
+    _backfill('alert_rules_v2', 'id', 'notification_channels', 'notification_channel_mask',
+              lambda names: int(NotificationChannelFlag.from_names(names)))
+    _backfill('config_change_logs', 'id', 'changed_fields', 'changed_fields_mask', changed_fields_mask)
+
+def downgrade():
+    """删除位图列"""
+    op.drop_column('config_change_logs', 'changed_fields_mask')
+    op.drop_column('alert_rules_v2', 'notification_channel_mask')
+    op.drop_column('model_configs', 'gpu_device_mask')
@@ -0,0 +1,51 @@
+"""store model_configs.framework as integer code
+
+Revision ID: 018
+Revises: 017
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.models.enums import FrameworkType, FrameworkTypeCode
+
+# revision identifiers, used by Alembic.
+revision = '018'
+down_revision = '017'
+branch_labels = None
+depends_on = None
+
+FRAMEWORK_VALUES = tuple(member.value for member in FrameworkType)
+
+def _case(source: str, pairs) -> str:
+    """构造列值映射的CASE表达式"""
+    whens = " ".join(f"WHEN {old} THEN {new}" for old, new in pairs)
+    return f"CASE {source} {whens} END"
+
+def upgrade():
+    """framework由原生ENUM改为TINYINT编码(FrameworkTypeCode)"""
+    op.add_column('model_configs', sa.Column(
+        'framework_code', sa.SmallInteger(), nullable=True, comment='推理框架类型(FrameworkTypeCode)'
+    ))
+    pairs = [(f"'{member.value}'", int(FrameworkTypeCode[member.name])) for member in FrameworkType]
+    op.execute(f"UPDATE model_configs SET framework_code = {_case('framework', pairs)}")
+    
+    op.drop_column('model_configs', 'framework')
+    op.alter_column('model_configs', 'framework_code', new_column_name='framework',
+                    existing_type=sa.SmallInteger(), nullable=False,
+                    existing_comment='推理框架类型(FrameworkTypeCode)')
+
+def downgrade():
+    """恢复为原生ENUM"""
+    op.add_column('model_configs', sa.Column(
+        'framework_name', sa.Enum(*FRAMEWORK_VALUES, name='model_configs_framework'),
+        nullable=True, comment='推理框架类型'
+    ))
+    pairs = [(int(FrameworkTypeCode[member.name]), f"'{member.value}'") for member in FrameworkType]
+    op.execute(f"UPDATE model_configs SET framework_name = {_case('framework', pairs)}")
+    
+    op.drop_column('model_configs', 'framework')
+    op.alter_column('model_configs', 'framework_name', new_column_name='framework',
+                    existing_type=sa.Enum(*FRAMEWORK_VALUES, name='model_configs_framework'),
+                    nullable=False, existing_comment='推理框架类型')
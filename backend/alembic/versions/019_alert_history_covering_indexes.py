@@ -0,0 +1,26 @@
+"""add composite indexes for alert dashboard queries
+
+Revision ID: 019
+Revises: 018
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '019'
+down_revision = '018'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    """为告警历史的列表和摘要查询添加复合索引，摘要统计可仅靠索引完成"""
+    op.create_index('idx_alert_history_rule_status_time', 'alert_history',
+                    ['rule_id', 'status', 'starts_at', 'severity'])
+    op.create_index('idx_alert_history_time_status_severity', 'alert_history',
+                    ['starts_at', 'status', 'severity'])
+
+def downgrade():
+    """删除复合索引"""
+    op.drop_index('idx_alert_history_time_status_severity', table_name='alert_history')
+    op.drop_index('idx_alert_history_rule_status_time', table_name='alert_history')
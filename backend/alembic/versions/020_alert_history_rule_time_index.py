@@ -0,0 +1,22 @@
+"""add rule/start-time index for per-rule alert history listing
+
+Revision ID: 020
+Revises: 019
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '020'
+down_revision = '019'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    """只按规则筛选告警历史时按(rule_id, starts_at)索引反向扫描取最近记录，无需排序"""
+    op.create_index('idx_alert_history_rule_time', 'alert_history', ['rule_id', 'starts_at'])
+
+def downgrade():
+    """删除索引"""
+    op.drop_index('idx_alert_history_rule_time', table_name='alert_history')
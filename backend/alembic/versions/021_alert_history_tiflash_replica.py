@@ -0,0 +1,32 @@
+"""add TiFlash replica for alert history
+
+Revision ID: 021
+Revises: 020
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '021'
+down_revision = '020'
+branch_labels = None
+depends_on = None
+
+def _is_tidb() -> bool:
+    """检查当前数据库是否为TiDB（MySQL不支持TiFlash副本）"""
+    version = op.get_bind().execute(sa.text("SELECT VERSION()")).scalar() or ""
+    return "TiDB" in version
+
+def upgrade():
+    """为告警历史创建TiFlash列存副本，告警摘要的分组统计由列存读取"""
+    if not _is_tidb():
+        return
+    op.execute("ALTER TABLE alert_history SET TIFLASH REPLICA 1")
+
+def downgrade():
+    """移除TiFlash副本"""
+    if not _is_tidb():
+        return
+    op.execute("ALTER TABLE alert_history SET TIFLASH REPLICA 0")
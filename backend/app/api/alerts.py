@@ -2,18 +2,22 @@
 告警系统API端点
 提供告警规则管理、告警查询和通知配置功能
 """
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from typing import List, Optional
+from collections import Counter
 from datetime import datetime, timedelta
 import uuid
 
-from ..core.database import get_db
+from ..core.database import get_db, read_from_tiflash
 from ..services.alerting import alerting_service
 from ..models.schemas import (
     AlertRuleCreate, AlertRuleUpdate, AlertRuleResponse,
-    AlertResponse, AlertHistoryResponse, AlertSummary
+    AlertResponse, AlertHistoryResponse, AlertSummary,
+    AlertHistoryRow, alert_history_rows_adapter
 )
+from ..models.enums import NotificationChannelFlag
 from ..utils.logging import get_structured_logger, EventType
 
 logger = get_structured_logger(__name__)
@@ -26,13 +30,9 @@ async def create_alert_rule(
 ):
     """创建告警规则"""
     try:
-        # 生成规则ID
-        rule_data_dict = rule_data.dict()
-        rule_data_dict['id'] = f"rule_{uuid.uuid4().hex[:8]}"
-        
-        # 创建规则
+        # 请求体已由FastAPI解析校验，直接传入，不再经dict往返重新校验；规则ID单独传递
         db_rule = await alerting_service.create_alert_rule(
-            AlertRuleCreate(**rule_data_dict), db
+            rule_data, db, rule_id=f"rule_{uuid.uuid4().hex[:8]}"
         )
         
         # 转换为响应格式
@@ -41,7 +41,7 @@ async def create_alert_rule(
             name=db_rule.name,
             description=db_rule.description,
             condition=db_rule.condition,
-            severity=db_rule.severity,
+            severity=db_rule.severity.value,
             enabled=db_rule.enabled,
             notification_channels=db_rule.notification_channels or [],
             notification_config=db_rule.notification_config or {},
@@ -61,6 +61,7 @@ async def create_alert_rule(
 async def list_alert_rules(
     enabled: Optional[bool] = Query(None, description="是否启用"),
     severity: Optional[str] = Query(None, description="严重程度"),
+    channel: Optional[str] = Query(None, description="通知渠道"),
     db: Session = Depends(get_db)
 ):
     """获取告警规则列表"""
@@ -73,6 +74,9 @@ async def list_alert_rules(
             query = query.filter(AlertRule.enabled == enabled)
         if severity:
             query = query.filter(AlertRule.severity == severity)
+        if channel:
+            flag = int(NotificationChannelFlag.from_names([channel]))
+            query = query.filter(AlertRule.notification_channel_mask.op("&")(flag) != 0)
         
         rules = query.all()
         
@@ -82,7 +86,7 @@ async def list_alert_rules(
                 name=rule.name,
                 description=rule.description,
                 condition=rule.condition,
-                severity=rule.severity,
+                severity=rule.severity.value,
                 enabled=rule.enabled,
                 notification_channels=rule.notification_channels or [],
                 notification_config=rule.notification_config or {},
@@ -118,7 +122,7 @@ async def get_alert_rule(
             name=rule.name,
             description=rule.description,
             condition=rule.condition,
-            severity=rule.severity,
+            severity=rule.severity.value,
             enabled=rule.enabled,
             notification_channels=rule.notification_channels or [],
             notification_config=rule.notification_config or {},
@@ -153,7 +157,7 @@ async def update_alert_rule(
             name=db_rule.name,
             description=db_rule.description,
             condition=db_rule.condition,
-            severity=db_rule.severity,
+            severity=db_rule.severity.value,
             enabled=db_rule.enabled,
             notification_channels=db_rule.notification_channels or [],
             notification_config=db_rule.notification_config or {},
@@ -220,19 +224,23 @@ async def get_active_alerts():
                     extra_data={"error": str(e)})
         raise HTTPException(status_code=500, detail=f"获取活跃告警失败: {str(e)}")
 
-@router.get("/history", response_model=List[AlertHistoryResponse])
+@router.get("/history", response_model=List[AlertHistoryRow])
 async def get_alert_history(
     rule_id: Optional[str] = Query(None, description="规则ID"),
     severity: Optional[str] = Query(None, description="严重程度"),
     status: Optional[str] = Query(None, description="状态"),
+    env: Optional[str] = Query(None, description="env标签"),
     limit: int = Query(100, description="返回数量限制"),
     db: Session = Depends(get_db)
 ):
-    """获取告警历史"""
+    """获取告警历史列表，只包含列表展示所需的字段"""
     try:
         from ..models.database import AlertHistory
         
-        query = db.query(AlertHistory)
+        query = db.query(
+            AlertHistory.id, AlertHistory.alert_id, AlertHistory.rule_name,
+            AlertHistory.severity, AlertHistory.starts_at, AlertHistory.status
+        )
         
         if rule_id:
             query = query.filter(AlertHistory.rule_id == rule_id)
@@ -240,28 +248,16 @@ async def get_alert_history(
             query = query.filter(AlertHistory.severity == severity)
         if status:
             query = query.filter(AlertHistory.status == status)
+        if env:
+            # 使用labels.env的生成列索引
+            query = query.filter(AlertHistory.env_label == env)
         
-        history_records = query.order_by(AlertHistory.starts_at.desc()).limit(limit).all()
+        rows = query.order_by(AlertHistory.starts_at.desc()).limit(limit).all()
         
-        return [
-            AlertHistoryResponse(
-                id=record.id,
-                alert_id=record.alert_id,
-                rule_id=record.rule_id,
-                rule_name=record.rule_name,
-                severity=record.severity,
-                message=record.message,
-                labels=record.labels or {},
-                annotations=record.annotations or {},
-                starts_at=record.starts_at,
-                ends_at=record.ends_at,
-                status=record.status,
-                notification_sent=record.notification_sent,
-                created_at=record.created_at,
-                updated_at=record.updated_at
-            )
-            for record in history_records
-        ]
+        return Response(
+            content=alert_history_rows_adapter.dump_json([row._asdict() for row in rows]),
+            media_type="application/json"
+        )
         
     except Exception as e:
         logger.error(f"获取告警历史失败: {e}",
@@ -269,6 +265,44 @@ async def get_alert_history(
                     extra_data={"error": str(e)})
         raise HTTPException(status_code=500, detail=f"获取告警历史失败: {str(e)}")
 
+@router.get("/history/{history_id}", response_model=AlertHistoryResponse)
+async def get_alert_history_record(
+    history_id: int,
+    db: Session = Depends(get_db)
+):
+    """获取单条告警历史详情"""
+    try:
+        from ..models.database import AlertHistory
+        
+        record = db.query(AlertHistory).filter(AlertHistory.id == history_id).first()
+        if not record:
+            raise HTTPException(status_code=404, detail="告警历史不存在")
+        
+        return AlertHistoryResponse(
+            id=record.id,
+            alert_id=record.alert_id,
+            rule_id=record.rule_id,
+            rule_name=record.rule_name,
+            severity=record.severity.value,
+            message=record.message,
+            labels=record.labels or {},
+            annotations=record.annotations or {},
+            starts_at=record.starts_at,
+            ends_at=record.ends_at,
+            status=record.status,
+            notification_sent=record.notification_sent,
+            created_at=record.created_at,
+            updated_at=record.updated_at
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"获取告警历史详情失败: {e}",
+                    event_type=EventType.SYSTEM_ERROR,
+                    extra_data={"history_id": history_id, "error": str(e)})
+        raise HTTPException(status_code=500, detail=f"获取告警历史详情失败: {str(e)}")
+
 @router.get("/summary", response_model=AlertSummary)
 async def get_alert_summary(
     hours: int = Query(24, description="统计时间范围(小时)"),
@@ -281,21 +315,32 @@ async def get_alert_summary(
         # 计算时间范围
         start_time = datetime.now() - timedelta(hours=hours)
         
-        # 查询告警历史
-        query = db.query(AlertHistory).filter(AlertHistory.starts_at >= start_time)
-        all_alerts = query.all()
+        # 只按状态和严重程度分组计数，不读取告警行；TiDB上由TiFlash列存只扫描这三列，
+        # MySQL忽略提示，由(starts_at, status, severity)索引覆盖
+        counts = read_from_tiflash(
+            db.query(AlertHistory.status, AlertHistory.severity, func.count())
+            .filter(AlertHistory.starts_at >= start_time)
+            .group_by(AlertHistory.status, AlertHistory.severity),
+            AlertHistory.__table__
+        ).all()
+        
+        status_counts = Counter()
+        severity_counts = Counter()
+        for status, severity, count in counts:
+            status_counts[status] += count
+            severity_counts[severity] += count
         
         # 统计各种状态的告警
-        total_alerts = len(all_alerts)
-        active_alerts = len([a for a in all_alerts if a.status == "active"])
-        resolved_alerts = len([a for a in all_alerts if a.status == "resolved"])
-        suppressed_alerts = len([a for a in all_alerts if a.status == "suppressed"])
+        total_alerts = sum(status_counts.values())
+        active_alerts = status_counts["active"]
+        resolved_alerts = status_counts["resolved"]
+        suppressed_alerts = status_counts["suppressed"]
         
         # 统计各种严重程度的告警
-        critical_alerts = len([a for a in all_alerts if a.severity == "critical"])
-        high_alerts = len([a for a in all_alerts if a.severity == "high"])
-        medium_alerts = len([a for a in all_alerts if a.severity == "medium"])
-        low_alerts = len([a for a in all_alerts if a.severity == "low"])
+        critical_alerts = severity_counts["critical"]
+        high_alerts = severity_counts["high"]
+        medium_alerts = severity_counts["medium"]
+        low_alerts = severity_counts["low"]
         
         return AlertSummary(
             total_alerts=total_alerts,
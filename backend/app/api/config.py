@@ -3,7 +3,7 @@
 提供模型配置的CRUD操作、备份恢复等功能
 """
 import logging
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from fastapi import APIRouter, HTTPException, Depends, Query
 from fastapi.responses import JSONResponse
 
@@ -50,11 +50,12 @@ async def create_model_config(
 
 @router.get("/models", response_model=List[ModelConfig])
 async def list_model_configs(
+    gpu_device: Optional[int] = Query(None, ge=0, le=63, description="只返回使用该GPU设备的配置"),
     config_manager: DatabaseConfigManager = Depends(get_database_config_manager)
 ):
     """获取所有模型配置"""
     try:
-        configs = await config_manager.load_model_configs()
+        configs = await config_manager.load_model_configs(gpu_device=gpu_device)
         return configs
     except Exception as e:
         logger.error(f"获取模型配置列表失败: {e}")
@@ -4,13 +4,16 @@
 from fastapi import APIRouter, HTTPException, Depends, Query
 from typing import List, Optional
 from datetime import datetime, timedelta
+import msgspec
 
 from ..services.monitoring import MonitoringService
 from ..models.schemas import (
-    GPUMetrics, SystemOverview, Metrics, TimeRange, AlertRule
+    SystemOverview, Metrics, TimeRange, AlertRule,
+    GPUMetrics, ModelPerformanceMetrics, SystemResourceMetrics
 )
 from ..models.enums import HealthStatus
 from ..core.dependencies import get_monitoring_service
+from .responses import MsgspecJSONResponse, msgspec_responses
 
 router = APIRouter(prefix="/api/monitoring", tags=["monitoring"])
 
@@ -25,7 +28,7 @@ async def get_system_status(
         
         # 将SystemOverview转换为字典并添加gpu_metrics和system_metrics
         result = overview.model_dump()
-        result["gpu_metrics"] = [metric.model_dump() for metric in gpu_metrics]
+        result["gpu_metrics"] = msgspec.to_builtins(gpu_metrics)
         
         # 添加系统指标
         try:
@@ -47,14 +50,15 @@ async def get_system_status(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"获取系统状态失败: {str(e)}")
 
-@router.get("/gpu", response_model=List[GPUMetrics])
+@router.get("/gpu", response_class=MsgspecJSONResponse,
+            responses=msgspec_responses(List[GPUMetrics]))
 async def get_gpu_metrics(
     monitoring_service: MonitoringService = Depends(get_monitoring_service)
 ):
     """获取GPU资源指标"""
     try:
         metrics = await monitoring_service.collect_gpu_metrics()
-        return metrics
+        return MsgspecJSONResponse(metrics)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"获取GPU指标失败: {str(e)}")
 
@@ -211,7 +215,8 @@ async def record_model_request(
         raise HTTPException(status_code=500, detail=f"记录请求指标失败: {str(e)}")
 
 # 历史数据查询接口
-@router.get("/gpu/history")
+@router.get("/gpu/history", response_class=MsgspecJSONResponse,
+            responses=msgspec_responses(List[GPUMetrics]))
 async def get_gpu_metrics_history(
     device_id: Optional[int] = Query(None, description="GPU设备ID"),
     hours: int = Query(24, description="获取过去几小时的数据"),
@@ -225,22 +230,12 @@ async def get_gpu_metrics_history(
         time_range = TimeRange(start_time=start_time, end_time=end_time)
         
         metrics = await monitoring_service.get_gpu_metrics_history(device_id, time_range, limit)
-        return [
-            {
-                "device_id": metric.device_id,
-                "timestamp": metric.timestamp,
-                "utilization": metric.utilization,
-                "memory_used": metric.memory_used,
-                "memory_total": metric.memory_total,
-                "temperature": metric.temperature,
-                "power_usage": metric.power_usage
-            }
-            for metric in metrics
-        ]
+        return MsgspecJSONResponse(metrics)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"获取GPU历史数据失败: {str(e)}")
 
-@router.get("/models/{model_id}/history")
+@router.get("/models/{model_id}/history", response_class=MsgspecJSONResponse,
+            responses=msgspec_responses(List[ModelPerformanceMetrics]))
 async def get_model_metrics_history(
     model_id: str,
     hours: int = Query(24, description="获取过去几小时的数据"),
@@ -254,24 +249,12 @@ async def get_model_metrics_history(
         time_range = TimeRange(start_time=start_time, end_time=end_time)
         
         metrics = await monitoring_service.get_model_metrics_history(model_id, time_range, limit)
-        return [
-            {
-                "model_id": metric.model_id,
-                "timestamp": metric.timestamp,
-                "request_count": metric.request_count,
-                "total_response_time": metric.total_response_time,
-                "error_count": metric.error_count,
-                "active_connections": metric.active_connections,
-                "memory_usage": metric.memory_usage,
-                "cpu_usage": metric.cpu_usage,
-                "gpu_utilization": metric.gpu_utilization
-            }
-            for metric in metrics
-        ]
+        return MsgspecJSONResponse(metrics)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"获取模型历史数据失败: {str(e)}")
 
-@router.get("/system/history")
+@router.get("/system/history", response_class=MsgspecJSONResponse,
+            responses=msgspec_responses(List[SystemResourceMetrics]))
 async def get_system_metrics_history(
     hours: int = Query(24, description="获取过去几小时的数据"),
     limit: int = Query(1000, description="返回记录数限制"),
@@ -284,27 +267,12 @@ async def get_system_metrics_history(
         time_range = TimeRange(start_time=start_time, end_time=end_time)
         
         metrics = await monitoring_service.get_system_metrics_history(time_range, limit)
-        return [
-            {
-                "timestamp": metric.timestamp,
-                "cpu_usage": metric.cpu_usage,
-                "memory_usage": metric.memory_usage,
-                "memory_total": metric.memory_total,
-                "memory_used": metric.memory_used,
-                "disk_usage": metric.disk_usage,
-                "disk_total": metric.disk_total,
-                "disk_used": metric.disk_used,
-                "network_sent": metric.network_sent,
-                "network_recv": metric.network_recv,
-                "load_average": metric.load_average
-            }
-            for metric in metrics
-        ]
+        return MsgspecJSONResponse(metrics)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"获取系统历史数据失败: {str(e)}")
 
 # 数据聚合和趋势分析接口
-@router.get("/gpu/{device_id}/trend")
+@router.get("/gpu/{device_id}/trend", response_class=MsgspecJSONResponse)
 async def get_gpu_utilization_trend(
     device_id: int,
     hours: int = Query(24, description="获取过去几小时的数据"),
@@ -320,11 +288,11 @@ async def get_gpu_utilization_trend(
         trend_data = await monitoring_service.get_gpu_utilization_trend(
             device_id, time_range, interval_minutes
         )
-        return trend_data
+        return MsgspecJSONResponse(trend_data)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"获取GPU趋势数据失败: {str(e)}")
 
-@router.get("/system/trend")
+@router.get("/system/trend", response_class=MsgspecJSONResponse)
 async def get_system_resource_trend(
     hours: int = Query(24, description="获取过去几小时的数据"),
     interval_minutes: int = Query(5, description="聚合时间间隔(分钟)"),
@@ -339,11 +307,11 @@ async def get_system_resource_trend(
         trend_data = await monitoring_service.get_system_resource_trend(
             time_range, interval_minutes
         )
-        return trend_data
+        return MsgspecJSONResponse(trend_data)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"获取系统趋势数据失败: {str(e)}")
 
-@router.get("/models/top")
+@router.get("/models/top", response_class=MsgspecJSONResponse)
 async def get_top_models_by_requests(
     hours: int = Query(24, description="获取过去几小时的数据"),
     limit: int = Query(10, description="返回模型数量限制"),
@@ -356,7 +324,7 @@ async def get_top_models_by_requests(
         time_range = TimeRange(start_time=start_time, end_time=end_time)
         
         top_models = await monitoring_service.get_top_models_by_requests(time_range, limit)
-        return top_models
+        return MsgspecJSONResponse(top_models)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"获取热门模型数据失败: {str(e)}")
 
@@ -0,0 +1,35 @@
+"""
+API响应类型
+"""
+from typing import Any, Dict
+
+import msgspec
+from fastapi.responses import JSONResponse
+
+from ..models.schemas import metrics_encoder
+
+class MsgspecJSONResponse(JSONResponse):
+    """使用msgspec编码的JSON响应，用于直接返回msgspec指标结构体的端点"""
+    
+    def render(self, content: Any) -> bytes:
+        return metrics_encoder.encode(content)
+
+def _inline_refs(schema: Any, defs: Dict[str, Any]) -> Any:
+    """将msgspec生成的$ref替换为对应定义，OpenAPI文档中不存在$defs"""
+    if isinstance(schema, dict):
+        ref = schema.get("$ref")
+        if ref is not None:
+            return _inline_refs(defs[ref.rsplit("/", 1)[-1]], defs)
+        return {key: _inline_refs(value, defs) for key, value in schema.items()}
+    if isinstance(schema, list):
+        return [_inline_refs(item, defs) for item in schema]
+    return schema
+
+def msgspec_responses(type_: Any) -> Dict[int, Dict[str, Any]]:
+    """生成MsgspecJSONResponse端点的OpenAPI响应说明
+    
+    这些端点不经过response_model，FastAPI无法推断响应结构，
+    由msgspec按返回类型生成JSON Schema写入路由的responses参数。
+    """
+    (schema,), defs = msgspec.json.schema_components([type_])
+    return {200: {"content": {"application/json": {"schema": _inline_refs(schema, defs)}}}}
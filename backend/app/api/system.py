@@ -11,14 +11,14 @@ from fastapi import APIRouter, HTTPException, Depends, Query, status
 from fastapi.responses import JSONResponse
 
 from ..models.schemas import (
-    GPUInfo, SystemOverview, SystemResourceMetrics, 
-    TimeRange, ValidationResult
+    GPUInfo, SystemOverview, TimeRange, ValidationResult
 )
 from ..services.monitoring import MonitoringService
 from ..services.config_manager import FileConfigManager
 from ..utils.gpu import GPUDetector
 from ..core.dependencies import get_monitoring_service, get_config_manager, get_gpu_detector
 from ..core.config import settings
+from .responses import MsgspecJSONResponse
 from pydantic import BaseModel
 from typing import List
 
@@ -120,7 +120,7 @@ async def get_gpu_device_info(
             detail=f"获取GPU设备信息失败: {str(e)}"
         )
 
-@router.get("/resources", response_model=SystemResourceMetrics)
+@router.get("/resources", response_class=MsgspecJSONResponse)
 async def get_system_resources(
     monitoring_service: MonitoringService = Depends(get_monitoring_service)
 ):
@@ -133,7 +133,7 @@ async def get_system_resources(
         # 获取最新的系统资源指标
         system_metrics = await monitoring_service.system_collector.collect_metrics()
         logger.info("获取系统资源信息成功")
-        return system_metrics
+        return MsgspecJSONResponse(system_metrics)
     except Exception as e:
         logger.error(f"获取系统资源信息失败: {e}")
         raise HTTPException(
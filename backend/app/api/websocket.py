@@ -69,6 +69,8 @@ class WebSocketManager:
             return
         
         disconnected = set()
+        # 消息只序列化一次，所有订阅的连接复用同一文本
+        payload = None
         
         for websocket in self.active_connections.copy():
             try:
@@ -79,7 +81,9 @@ class WebSocketManager:
                     if subscription_type not in subscriptions:
                         continue
                 
-                await websocket.send_text(json.dumps(message, ensure_ascii=False))
+                if payload is None:
+                    payload = json.dumps(message, ensure_ascii=False)
+                await websocket.send_text(payload)
             except Exception as e:
                 logger.error(f"广播WebSocket消息失败: {e}")
                 disconnected.add(websocket)
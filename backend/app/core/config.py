@@ -14,6 +14,8 @@ class Settings(BaseSettings):
     
     # 数据库配置
     database_url: str = "mysql+pymysql://root:@127.0.0.1:4000/llm_inference?charset=utf8mb4"
+    database_async_driver: str = "aiomysql"  # 异步驱动，可选asyncmy(C扩展)
+    database_query_cache_size: int = 1200  # 编译语句缓存条目数
     
     # Redis配置
     redis_url: str = "redis://localhost:6379"
@@ -26,6 +28,13 @@ class Settings(BaseSettings):
     gpu_check_interval: int = 5  # 秒
     health_check_interval: int = 30  # 秒
     
+    # 告警邮件配置
+    smtp_pool_size: int = 4  # 每个SMTP服务器的最大连接数
+    smtp_messages_per_connection: int = 5000  # 单个连接发送多少封后重建
+    smtp_max_rate: float = 10.0  # 每秒最多发送的邮件数
+    smtp_idle_timeout: int = 60  # 空闲连接保留时间(秒)
+    alert_notification_cooldown: int = 300  # 相同告警通知的去重窗口(秒)，0表示不去重
+    
     # 日志配置
     log_level: str = "INFO"
     log_file: Optional[str] = None
@@ -1,15 +1,17 @@
 """
 数据库连接和会话管理
 """
+import asyncio
 import logging
-from typing import AsyncGenerator
-from sqlalchemy import create_engine, event
+from datetime import date, datetime, timedelta
+from typing import Any, AsyncGenerator, Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import create_engine, event, text
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.pool import StaticPool
 
 from .config import settings
-from ..models.database import Base
+from ..models.database import Base, METRICS_PARTITIONED_TABLES
 
 logger = logging.getLogger(__name__)
 
@@ -20,17 +22,21 @@ sync_engine = create_engine(
     max_overflow=30,
     pool_pre_ping=True,
     pool_recycle=3600,
+    query_cache_size=settings.database_query_cache_size,
     echo=settings.debug
 )
 
 # 异步数据库引擎（用于应用程序）
-async_database_url = settings.database_url.replace("mysql+pymysql://", "mysql+aiomysql://")
+async_database_url = settings.database_url.replace(
+    "mysql+pymysql://", f"mysql+{settings.database_async_driver}://"
+)
 async_engine = create_async_engine(
     async_database_url,
     pool_size=20,
     max_overflow=30,
     pool_pre_ping=True,
     pool_recycle=3600,
+    query_cache_size=settings.database_query_cache_size,
     echo=settings.debug
 )
 
@@ -108,6 +114,47 @@ def set_sqlite_pragma(dbapi_connection, connection_record):
         cursor.execute("SET SESSION time_zone = '+00:00'")
         cursor.close()
 
+def plan_metrics_partitions(existing: Iterable[str], today: date, days_ahead: int = 3,
+                            retention_days: int = 30) -> Tuple[List[date], List[str]]:
+    """计算指标表的分区维护计划
+    
+    分区命名为p{YYYYMMDD}，保存当天的数据。返回需要从p_max拆分出的日期列表
+    （只会追加在已有最新分区之后）以及早于保留期、需要删除的分区名列表。
+    """
+    existing_days = {}
+    for name in existing:
+        if len(name) == 9 and name.startswith("p") and name[1:].isdigit():
+            try:
+                existing_days[name] = datetime.strptime(name[1:], "%Y%m%d").date()
+            except ValueError:
+                continue
+    
+    start = today
+    if existing_days:
+        start = max(start, max(existing_days.values()) + timedelta(days=1))
+    end = today + timedelta(days=days_ahead)
+    
+    days_to_add = []
+    day = start
+    while day <= end:
+        days_to_add.append(day)
+        day += timedelta(days=1)
+    
+    cutoff = today - timedelta(days=retention_days)
+    partitions_to_drop = sorted(name for name, day in existing_days.items() if day < cutoff)
+    
+    return days_to_add, partitions_to_drop
+
+def read_from_tiflash(stmt, *tables):
+    """为分析查询添加READ_FROM_STORAGE提示，使TiDB从TiFlash列存副本读取
+    
+    只对声明了TiFlash副本的表生效；MySQL会忽略无法识别的优化器提示，点查和写入仍走行存。
+    """
+    names = ", ".join(table.name for table in tables if table.info.get("tiflash_replica"))
+    if not names:
+        return stmt
+    return stmt.prefix_with(f"/*+ READ_FROM_STORAGE(TIFLASH[{names}]) */", dialect="mysql")
+
 class DatabaseManager:
     """数据库管理器"""
     
@@ -116,6 +163,7 @@ class DatabaseManager:
         self.async_engine = async_engine
         self.SessionLocal = SessionLocal
         self.AsyncSessionLocal = AsyncSessionLocal
+        self._partition_task: Optional[asyncio.Task] = None
     
     async def health_check(self) -> bool:
         """数据库健康检查"""
@@ -162,6 +210,84 @@ class DatabaseManager:
             logger.error(f"创建数据库表失败: {e}")
             raise
     
+    async def maintain_metrics_partitions(self, days_ahead: int = 3,
+                                          retention_days: int = 30) -> Dict[str, Dict[str, List[str]]]:
+        """维护指标表的按天分区：预建未来分区，删除过期分区"""
+        if "mysql" not in settings.database_url:
+            return {}
+        
+        today = date.today()
+        summary = {}
+        async with self.async_engine.begin() as conn:
+            for table in METRICS_PARTITIONED_TABLES:
+                result = await conn.execute(
+                    text(
+                        "SELECT PARTITION_NAME FROM information_schema.PARTITIONS "
+                        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table "
+                        "AND PARTITION_NAME IS NOT NULL"
+                    ),
+                    {"table": table}
+                )
+                existing = [row[0] for row in result]
+                if "p_max" not in existing:
+                    logger.warning(f"指标表 {table} 未分区，跳过分区维护")
+                    continue
+                
+                days_to_add, partitions_to_drop = plan_metrics_partitions(
+                    existing, today, days_ahead, retention_days
+                )
+                
+                if days_to_add:
+                    definitions = ", ".join(
+                        f"PARTITION p{day:%Y%m%d} VALUES LESS THAN "
+                        f"(TO_DAYS('{day + timedelta(days=1):%Y-%m-%d}'))"
+                        for day in days_to_add
+                    )
+                    await conn.execute(text(
+                        f"ALTER TABLE {table} REORGANIZE PARTITION p_max INTO "
+                        f"({definitions}, PARTITION p_max VALUES LESS THAN MAXVALUE)"
+                    ))
+                
+                if partitions_to_drop:
+                    await conn.execute(text(
+                        f"ALTER TABLE {table} DROP PARTITION {', '.join(partitions_to_drop)}"
+                    ))
+                
+                summary[table] = {
+                    "added": [f"p{day:%Y%m%d}" for day in days_to_add],
+                    "dropped": partitions_to_drop
+                }
+        
+        logger.info(f"指标表分区维护完成: {summary}")
+        return summary
+    
+    async def start_partition_maintenance(self, interval: int = 3600):
+        """启动指标表分区的定时维护任务"""
+        if self._partition_task and not self._partition_task.done():
+            return
+        self._partition_task = asyncio.create_task(self._partition_maintenance_loop(interval))
+    
+    async def stop_partition_maintenance(self):
+        """停止指标表分区的定时维护任务"""
+        if self._partition_task:
+            self._partition_task.cancel()
+            try:
+                await self._partition_task
+            except asyncio.CancelledError:
+                pass
+            self._partition_task = None
+    
+    async def _partition_maintenance_loop(self, interval: int):
+        """分区维护循环"""
+        while True:
+            try:
+                await self.maintain_metrics_partitions()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"指标表分区维护失败: {e}")
+            await asyncio.sleep(interval)
+    
     def drop_tables(self):
         """删除所有数据库表"""
         try:
@@ -171,6 +297,124 @@ class DatabaseManager:
             logger.error(f"删除数据库表失败: {e}")
             raise
 
+class WriteBehindQueue:
+    """只追加表的异步后写队列
+    
+    调用方只把行字典放入内存队列即返回，后台任务每次取出最多batch_size行
+    或等待flush_interval秒，用一条executemany插入写入。队列满时丢弃新行并记录日志，
+    内存占用以maxsize为上限。写入失败时按指数退避重试write_retries次后才丢弃该批。
+    """
+    
+    def __init__(self, statement, name: str, maxsize: int = 50_000,
+                 batch_size: int = 2000, flush_interval: float = 0.2,
+                 session_factory=None, write_retries: int = 3, retry_delay: float = 0.5):
+        self.statement = statement
+        self.name = name
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.write_retries = write_retries
+        self.retry_delay = retry_delay
+        self.session_factory = session_factory or AsyncSessionLocal
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self._write_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+    
+    def enqueue(self, row: Dict[str, Any]) -> bool:
+        """放入一行待写数据，队列已满时返回False"""
+        try:
+            self._queue.put_nowait(row)
+            return True
+        except asyncio.QueueFull:
+            logger.warning(f"后写队列 {self.name} 已满，丢弃一条记录")
+            return False
+    
+    def pending(self) -> int:
+        """队列中待写的行数"""
+        return self._queue.qsize()
+    
+    async def start(self):
+        """启动后台写入任务"""
+        if self._task and not self._task.done():
+            return
+        self._task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        """停止后台写入任务并写完队列中剩余的行"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+    
+    async def flush(self):
+        """立即写入队列中所有待写行，并等待后台任务已取出、仍在攒批或写入中的批次完成"""
+        async with self._write_lock:
+            while not self._queue.empty():
+                await self._write(self._drain(self.batch_size))
+        # 每行写入（或最终丢弃）后才标记完成，join返回时之前放入的行都已处理
+        if self._task and not self._task.done():
+            await self._queue.join()
+    
+    def _drain(self, limit: int) -> List[Dict[str, Any]]:
+        """非阻塞地取出最多limit行"""
+        batch = []
+        while len(batch) < limit:
+            try:
+                batch.append(self._queue.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+        return batch
+    
+    async def _run(self):
+        """后台写入循环：攒够一批或超时后写入"""
+        while True:
+            batch = [await self._queue.get()]
+            try:
+                await self._fill(batch)
+            finally:
+                # 任务被取消时也写完已取出的行
+                async with self._write_lock:
+                    await self._write(batch)
+    
+    async def _fill(self, batch: List[Dict[str, Any]]):
+        """在flush_interval内继续攒批，直到达到batch_size"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.flush_interval
+        while len(batch) < self.batch_size:
+            batch.extend(self._drain(self.batch_size - len(batch)))
+            remaining = deadline - loop.time()
+            if len(batch) >= self.batch_size or remaining <= 0:
+                return
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                return
+    
+    async def _write(self, batch: List[Dict[str, Any]]):
+        """在独立会话中写入一批行，失败时按指数退避重试，完成后标记这些行已处理"""
+        if not batch:
+            return
+        try:
+            for attempt in range(self.write_retries + 1):
+                try:
+                    async with self.session_factory() as session:
+                        await session.execute(self.statement, batch)
+                        await session.commit()
+                    return
+                except Exception as e:
+                    if attempt == self.write_retries:
+                        logger.error(f"后写队列 {self.name} 写入 {len(batch)} 行失败，"
+                                     f"重试 {self.write_retries} 次后丢弃: {e}")
+                        return
+                    logger.warning(f"后写队列 {self.name} 写入 {len(batch)} 行失败，稍后重试: {e}")
+                    await asyncio.sleep(self.retry_delay * (2 ** attempt))
+        finally:
+            for _ in batch:
+                self._queue.task_done()
+
 # 全局数据库管理器实例
 db_manager = DatabaseManager()
 
@@ -10,10 +10,11 @@ from fastapi import HTTPException
 from ..services.monitoring import MonitoringService
 from ..services.model_manager import ModelManager
 from ..services.config_manager import FileConfigManager
-from ..services.database_config_manager import DatabaseConfigManager
+from ..services.database_config_manager import DatabaseConfigManager, change_log_writer
+from ..services.alerting import alert_history_writer, NotificationSender, smtp_pool
 from ..services.config_hot_reload import ConfigHotReloadService, set_hot_reload_service
 from ..utils.gpu import GPUDetector
-from .database import init_database, close_database
+from .database import init_database, close_database, db_manager
 
 logger = logging.getLogger(__name__)
 
@@ -86,6 +87,13 @@ async def initialize_services():
         # 初始化数据库
         await init_database()
         
+        # 启动指标表分区维护
+        await db_manager.start_partition_maintenance()
+        
+        # 启动审计日志后写队列
+        await change_log_writer.start()
+        await alert_history_writer.start()
+        
         # 初始化数据库配置管理器
         database_config_manager = get_database_config_manager()
         await database_config_manager.initialize()
@@ -98,6 +106,8 @@ async def initialize_services():
         model_manager = get_model_manager()
         # 更新模型管理器使用数据库配置管理器
         model_manager.config_manager = database_config_manager
+        # 模型状态变更时持久化到model_status表
+        model_manager.add_status_update_callback(database_config_manager.on_model_status_change)
         await model_manager.initialize()
         
         # 初始化监控服务
@@ -145,7 +155,16 @@ async def shutdown_services():
         if _model_manager:
             await _model_manager.shutdown()
         
-        # 关闭数据库连接
+        # 写完后写队列中剩余的日志
+        await change_log_writer.stop()
+        await alert_history_writer.stop()
+        
+        # 释放告警通知共用的HTTP会话和SMTP连接
+        await NotificationSender.close_session()
+        await smtp_pool.close()
+        
+        # 停止指标表分区维护并关闭数据库连接
+        await db_manager.stop_partition_maintenance()
         await close_database()
         
         logger.info("所有服务关闭完成")
@@ -7,6 +7,7 @@ from fastapi.middleware.cors import CORSMiddleware
 from .api import models, monitoring, system, proxy, config, websocket, alerts
 from .core.config import settings
 from .core.dependencies import initialize_services, shutdown_services
+from .models.schemas import build_hot_schemas
 from .middleware.logging import LoggingMiddleware
 from .utils.logging import setup_structured_logging, get_structured_logger, EventType
 
@@ -81,6 +82,7 @@ async def startup_event():
         logger.info("正在启动LLM推理服务...", 
                    event_type=EventType.CONFIGURATION,
                    extra_data={"action": "startup"})
+        build_hot_schemas()
         await initialize_services()
         logger.info("LLM推理服务启动完成",
                    event_type=EventType.CONFIGURATION,
@@ -2,28 +2,252 @@
 SQLAlchemy数据库模型定义
 用于配置持久化和系统状态管理
 """
-from sqlalchemy import Column, Integer, String, Text, Boolean, Float, DateTime, JSON, ForeignKey, Index
+from sqlalchemy import Column, Integer, SmallInteger, BigInteger, String, Text, Boolean, Float, DateTime, JSON, ForeignKey, Index, Computed, UniqueConstraint, text
+from sqlalchemy import Enum as SAEnum, LargeBinary, insert
+from sqlalchemy.dialects.mysql import LONGBLOB, insert as mysql_insert
+from sqlalchemy.types import TypeDecorator, BINARY, VARBINARY
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, Session
 from sqlalchemy.sql import func
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, FrozenSet, Iterable, List, Optional
+import functools
+import ipaddress
+import json
+import zlib
+
+try:
+    import zstandard
+except ImportError:  # zstandard为可选依赖，缺失时回退到zlib
+    zstandard = None
+
+from .enums import FrameworkType, FrameworkTypeCode, ModelStatus, HealthStatus, AlertSeverity
 
 Base = declarative_base()
 
+# 只追加的时间序列指标表按天RANGE分区。建表时只有兜底分区p_max，
+# 按天的分区由DatabaseManager.maintain_metrics_partitions从p_max中拆分，
+# 过期分区直接DROP PARTITION，避免大批量DELETE
+METRICS_PARTITION_BY = "RANGE (TO_DAYS(`timestamp`)) (PARTITION p_max VALUES LESS THAN MAXVALUE)"
+METRICS_PARTITIONED_TABLES = ("gpu_metrics", "system_metrics")
+
+# 标识列长度：模型ID/规则ID为可读字符串，告警实例ID由规则ID加时间戳组成。
+# 主键会嵌入每个二级索引，因此按实际长度收紧而非统一使用VARCHAR(255)
+ID_LENGTH = 64
+INSTANCE_ID_LENGTH = 96
+
+# 配置变更日志中可记录的字段，位置即changed_fields_mask中的位序号，只允许在末尾追加
+CONFIG_CHANGE_FIELDS = (
+    "id", "name", "framework", "model_path", "priority", "gpu_devices", "parameters",
+    "resource_requirements", "health_check", "retry_policy", "created_at", "updated_at",
+)
+
+def pack_bitmask(positions: Iterable[int]) -> int:
+    """将小整数集合打包为位图，第i位表示i存在"""
+    mask = 0
+    for position in positions or []:
+        mask |= 1 << int(position)
+    return mask
+
+def unpack_bitmask(mask: int) -> List[int]:
+    """将位图展开为升序的位序号列表"""
+    return [position for position in range(mask.bit_length()) if mask >> position & 1]
+
+def changed_fields_mask(fields: Iterable[str]) -> int:
+    """将变更字段名转换为位图，未登记的字段只保留在changed_fields中"""
+    return pack_bitmask(CONFIG_CHANGE_FIELDS.index(name) for name in fields if name in CONFIG_CHANGE_FIELDS)
+
+# TiDB上为指标表维护的TiFlash列存副本数，时间窗口聚合由列存按需读取少数列
+TIFLASH_REPLICA_COUNT = 1
+
+def enum_column(enum_cls) -> SAEnum:
+    """按枚举值存储的原生ENUM列类型
+    
+    MySQL/TiDB将ENUM按1-2字节序号存储，比VARCHAR存储重复短字符串更紧凑；
+    读取时返回对应的枚举成员（str子类，可直接与字符串比较）。
+    """
+    return SAEnum(
+        enum_cls,
+        name=enum_cls.__name__.lower(),
+        native_enum=True,
+        length=16,
+        values_callable=lambda members: [member.value for member in members]
+    )
+
+class IntCodedEnum(TypeDecorator):
+    """str枚举以整数编码存储（TINYINT）
+    
+    编码类为与枚举成员同名的IntEnum。读写都只做一次字典查找：写入时枚举成员与其字符串值
+    哈希相同，均可直接查表；读取时由编码直接取回枚举成员，不经过Enum的按值查找。
+    """
+    
+    impl = SmallInteger
+    cache_ok = True
+    
+    def __init__(self, enum_cls, code_cls):
+        super().__init__()
+        self.enum_cls = enum_cls
+        self.code_cls = code_cls
+        self._to_code = {member: int(code_cls[member.name]) for member in enum_cls}
+        self._from_code = {code: member for member, code in self._to_code.items()}
+    
+    def process_bind_param(self, value, dialect) -> Optional[int]:
+        if value is None:
+            return None
+        try:
+            return self._to_code[value]
+        except KeyError:
+            raise LookupError(f"{value!r} 不是有效的 {self.enum_cls.__name__} 值") from None
+    
+    def process_result_value(self, value: Optional[int], dialect):
+        if value is None:
+            return None
+        return self._from_code[value]
+
+class PackedIPAddress(TypeDecorator):
+    """IP地址以二进制存储（IPv4占4字节，IPv6占16字节），读写时使用字符串形式"""
+    
+    impl = VARBINARY(16)
+    cache_ok = True
+    
+    def process_bind_param(self, value: Optional[str], dialect) -> Optional[bytes]:
+        if value is None:
+            return None
+        return ipaddress.ip_address(value).packed
+    
+    def process_result_value(self, value: Optional[bytes], dialect) -> Optional[str]:
+        if value is None:
+            return None
+        return str(ipaddress.ip_address(bytes(value)))
+
+class HexDigest(TypeDecorator):
+    """摘要以原始字节存储（SHA-256为32字节），读写时使用十六进制字符串"""
+    
+    impl = BINARY(32)
+    cache_ok = True
+    
+    def process_bind_param(self, value: Optional[str], dialect) -> Optional[bytes]:
+        if value is None:
+            return None
+        return bytes.fromhex(value)
+    
+    def process_result_value(self, value: Optional[bytes], dialect) -> Optional[str]:
+        if value is None:
+            return None
+        return bytes(value).hex()
+
+# zstd帧头魔数，用于区分zstd与zlib压缩的数据
+ZSTD_FRAME_MAGIC = b"\x28\xb5\x2f\xfd"
+ZSTD_COMPRESSION_LEVEL = 3
+
+def encode_json_payload(value: Any) -> bytes:
+    """将JSON值序列化为紧凑的UTF-8字节，备份大小和校验和均基于此编码计算"""
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def compress_payload(payload: bytes) -> bytes:
+    """压缩字节数据，优先使用zstd，未安装zstandard时使用zlib"""
+    if zstandard is not None:
+        return zstandard.ZstdCompressor(level=ZSTD_COMPRESSION_LEVEL).compress(payload)
+    return zlib.compress(payload, 6)
+
+def decompress_payload(data: bytes) -> bytes:
+    """按帧头识别压缩格式并解压"""
+    data = bytes(data)
+    if data.startswith(ZSTD_FRAME_MAGIC):
+        if zstandard is None:
+            raise RuntimeError("数据为zstd压缩格式，需要安装zstandard")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return zlib.decompress(data)
+
+class ZstdJSON(TypeDecorator):
+    """JSON值压缩后以二进制存储，读写时使用Python对象
+    
+    绑定bytes时视为已压缩的数据直接写入，便于调用方预先压缩以获取压缩后大小。
+    """
+    
+    impl = LargeBinary
+    cache_ok = True
+    
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "mysql":
+            return dialect.type_descriptor(LONGBLOB())
+        return dialect.type_descriptor(LargeBinary())
+    
+    def process_bind_param(self, value: Any, dialect) -> Optional[bytes]:
+        if value is None:
+            return None
+        if isinstance(value, (bytes, bytearray)):
+            return bytes(value)
+        return compress_payload(encode_json_payload(value))
+    
+    def process_result_value(self, value: Optional[bytes], dialect) -> Any:
+        if value is None:
+            return None
+        return json.loads(decompress_payload(value))
+
+# 单条INSERT的最大行数，保持在TiDB默认txn-total-size-limit之内
+BULK_INSERT_BATCH_SIZE = 5000
+
+@functools.lru_cache(maxsize=64)
+def insert_statement(model_cls, columns: FrozenSet[str]):
+    """按(模型, 列集合)缓存的INSERT语句
+    
+    同一模型同一组列的写入复用同一个语句对象，避免每次调用重新遍历表元数据构造语句；
+    语句结构不变，引擎的编译缓存也总能命中。未知列在首次构造时即报错。
+    """
+    table = model_cls.__table__
+    unknown = columns - set(table.c.keys())
+    if unknown:
+        raise ValueError(f"{table.name} 没有列: {', '.join(sorted(unknown))}")
+    return insert(table)
+
+class BulkInsertMixin:
+    """只追加表的批量写入支持"""
+    
+    @classmethod
+    def bulk_write(cls, session: Session, rows: List[Dict[str, Any]],
+                   batch_size: int = BULK_INSERT_BATCH_SIZE) -> int:
+        """按批批量插入行字典，在同一事务内完成并只提交一次
+        
+        跳过ORM工作单元（身份映射、属性历史、级联），适用于无关联关系的只追加行。
+        所有行须包含相同的列，以首行的列集合取缓存的INSERT语句。
+        异步会话可通过 ``await session.run_sync(Model.bulk_write, rows)`` 调用。
+        """
+        if not rows:
+            return 0
+        
+        stmt = insert_statement(cls, frozenset(rows[0]))
+        try:
+            for start in range(0, len(rows), batch_size):
+                session.execute(stmt, rows[start:start + batch_size])
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        
+        return len(rows)
+
 class ModelConfigDB(Base):
     """模型配置数据库模型"""
     __tablename__ = "model_configs"
     
     # 主键和基本信息
-    id = Column(String(255), primary_key=True, comment="模型唯一标识")
+    id = Column(String(ID_LENGTH), primary_key=True, comment="模型唯一标识")
     name = Column(String(255), nullable=False, comment="模型名称")
-    framework = Column(String(50), nullable=False, comment="推理框架类型")
+    framework = Column(IntCodedEnum(FrameworkType, FrameworkTypeCode), nullable=False,
+                       comment="推理框架类型(FrameworkTypeCode)")
     model_path = Column(Text, nullable=False, comment="模型文件路径")
     priority = Column(Integer, nullable=False, default=5, comment="优先级(1-10)")
     
     # GPU和资源配置
     gpu_devices = Column(JSON, nullable=True, comment="指定GPU设备列表")
+    gpu_device_mask = Column(BigInteger, nullable=False, default=0, server_default=text("0"),
+                             comment="GPU设备位图(第i位表示设备i)")
+    gpu_device_first = Column(
+        Integer,
+        Computed("CAST(JSON_EXTRACT(gpu_devices, '$[0]') AS UNSIGNED)", persisted=True),
+        comment="首个GPU设备(由gpu_devices生成)"
+    )
     additional_parameters = Column(Text, nullable=True, comment="附加启动参数")
     parameters = Column(JSON, nullable=True, comment="框架特定参数")
     
@@ -48,16 +272,37 @@ class ModelConfigDB(Base):
     
     # 状态和时间戳
     is_active = Column(Boolean, default=True, comment="是否激活")
-    created_at = Column(DateTime, default=func.now(), comment="创建时间")
-    updated_at = Column(DateTime, default=func.now(), onupdate=func.now(), comment="更新时间")
+    created_at = Column(DateTime, server_default=func.now(), nullable=False, comment="创建时间")
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), nullable=False, comment="更新时间")
     
-    # 索引 - 暂时移除以避免TiDB临时空间问题
+    # 关联关系：运行状态随配置一次JOIN加载；变更日志量大，禁止隐式懒加载，
+    # 需要时显式使用 selectinload(ModelConfigDB.change_logs)
+    status = relationship("ModelStatusDB", back_populates="config", uselist=False, lazy="joined")
+    change_logs = relationship(
+        "ConfigChangeLogDB",
+        primaryjoin="foreign(ConfigChangeLogDB.model_id) == ModelConfigDB.id",
+        order_by="ConfigChangeLogDB.created_at",
+        viewonly=True,
+        lazy="raise"
+    )
+    
+    # JSON路径生成列上的索引，使按GPU设备过滤可走索引
+    __table_args__ = (
+        Index('idx_model_gpu_device_first', 'gpu_device_first'),
+    )
+    
+    # 其余索引 - 暂时移除以避免TiDB临时空间问题
     # __table_args__ = (
     #     Index('idx_model_priority', 'priority'),
     #     Index('idx_model_framework', 'framework'),
     #     Index('idx_model_active', 'is_active'),
     #     Index('idx_model_created', 'created_at'),
     # )
+    
+    @classmethod
+    def uses_gpu(cls, device_id: int):
+        """按位图判断配置是否使用指定GPU设备的查询条件"""
+        return cls.gpu_device_mask.op("&")(1 << device_id) != 0
 
 class SystemConfigDB(Base):
     """系统配置数据库模型"""
@@ -69,8 +314,8 @@ class SystemConfigDB(Base):
     config_type = Column(String(50), nullable=False, comment="配置类型")
     description = Column(Text, nullable=True, comment="配置描述")
     is_encrypted = Column(Boolean, default=False, comment="是否加密存储")
-    created_at = Column(DateTime, default=func.now(), comment="创建时间")
-    updated_at = Column(DateTime, default=func.now(), onupdate=func.now(), comment="更新时间")
+    created_at = Column(DateTime, server_default=func.now(), nullable=False, comment="创建时间")
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), nullable=False, comment="更新时间")
     
     # 索引 - 暂时移除以避免TiDB临时空间问题
     # __table_args__ = (
@@ -85,12 +330,17 @@ class ConfigBackupDB(Base):
     id = Column(Integer, primary_key=True, autoincrement=True)
     backup_name = Column(String(255), nullable=False, comment="备份名称")
     backup_type = Column(String(50), nullable=False, comment="备份类型")
-    backup_data = Column(Text, nullable=False, comment="备份数据(JSON)")
-    backup_size = Column(Integer, nullable=False, default=0, comment="备份大小(字节)")
-    checksum = Column(String(64), nullable=True, comment="数据校验和")
+    backup_data = Column(ZstdJSON, nullable=False, comment="备份数据(压缩JSON)")
+    backup_size = Column(Integer, nullable=False, default=0, comment="备份大小(未压缩字节)")
+    compressed_size = Column(
+        Integer,
+        Computed("OCTET_LENGTH(backup_data)", persisted=False),
+        comment="压缩后大小(字节，由backup_data生成)"
+    )
+    checksum = Column(HexDigest, nullable=True, comment="数据校验和(SHA-256)")
     description = Column(Text, nullable=True, comment="备份描述")
     created_by = Column(String(255), nullable=True, comment="创建者")
-    created_at = Column(DateTime, default=func.now(), comment="创建时间")
+    created_at = Column(DateTime, server_default=func.now(), nullable=False, comment="创建时间")
     
     # 索引 - 暂时移除以避免TiDB临时空间问题
     # __table_args__ = (
@@ -104,16 +354,18 @@ class ConfigChangeLogDB(Base):
     __tablename__ = "config_change_logs"
     
     id = Column(Integer, primary_key=True, autoincrement=True)
-    model_id = Column(String(255), nullable=True, comment="模型ID")
-    change_type = Column(String(50), nullable=False, comment="变更类型")
+    model_id = Column(String(ID_LENGTH), nullable=True, comment="模型ID")
+    change_type = Column(String(16), nullable=False, comment="变更类型")
     old_value = Column(JSON, nullable=True, comment="旧值")
     new_value = Column(JSON, nullable=True, comment="新值")
     changed_fields = Column(JSON, nullable=True, comment="变更字段列表")
+    changed_fields_mask = Column(SmallInteger, nullable=False, default=0, server_default=text("0"),
+                                 comment="变更字段位图(按CONFIG_CHANGE_FIELDS位序)")
     change_reason = Column(Text, nullable=True, comment="变更原因")
     changed_by = Column(String(255), nullable=True, comment="变更者")
-    ip_address = Column(String(45), nullable=True, comment="IP地址")
+    ip_address = Column(PackedIPAddress, nullable=True, comment="IP地址")
     user_agent = Column(Text, nullable=True, comment="用户代理")
-    created_at = Column(DateTime, default=func.now(), comment="变更时间")
+    created_at = Column(DateTime, server_default=func.now(), nullable=False, comment="变更时间")
     
     # 索引 - 暂时移除以避免TiDB临时空间问题
     # __table_args__ = (
@@ -127,33 +379,56 @@ class ModelStatusDB(Base):
     __tablename__ = "model_status"
     
     id = Column(Integer, primary_key=True, autoincrement=True)
-    model_id = Column(String(255), nullable=False, comment="模型ID")
-    status = Column(String(50), nullable=False, comment="模型状态")
+    model_id = Column(String(ID_LENGTH), ForeignKey("model_configs.id", ondelete="CASCADE"),
+                      nullable=False, comment="模型ID")
+    status = Column(enum_column(ModelStatus), nullable=False, comment="模型状态")
     pid = Column(Integer, nullable=True, comment="进程ID")
     api_endpoint = Column(String(255), nullable=True, comment="API端点")
     gpu_devices = Column(JSON, nullable=True, comment="使用的GPU设备")
     memory_usage = Column(Integer, nullable=True, comment="内存使用量(MB)")
     start_time = Column(DateTime, nullable=True, comment="启动时间")
     last_health_check = Column(DateTime, nullable=True, comment="最后健康检查时间")
-    health_status = Column(String(50), nullable=True, comment="健康状态")
+    health_status = Column(enum_column(HealthStatus), nullable=True, comment="健康状态")
     error_message = Column(Text, nullable=True, comment="错误信息")
     restart_count = Column(Integer, default=0, comment="重启次数")
-    updated_at = Column(DateTime, default=func.now(), onupdate=func.now(), comment="更新时间")
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), nullable=False, comment="更新时间")
     
-    # 索引 - 暂时移除以避免TiDB临时空间问题
+    config = relationship("ModelConfigDB", back_populates="status", lazy="raise")
+    
+    # 每个模型只保留一行状态，状态更新通过UPSERT一次往返完成
+    __table_args__ = (
+        UniqueConstraint('model_id', name='uq_model_status_model_id'),
+    )
+    
+    # 其余索引 - 暂时移除以避免TiDB临时空间问题
     # __table_args__ = (
-    #     Index('idx_status_model_id', 'model_id'),
     #     Index('idx_status_status', 'status'),
     #     Index('idx_status_updated', 'updated_at'),
     # )
+    
+    @classmethod
+    @functools.lru_cache(maxsize=64)
+    def upsert_statement(cls, columns: FrozenSet[str]):
+        """按列集合缓存的状态UPSERT语句（INSERT ... ON DUPLICATE KEY UPDATE）
+        
+        心跳每隔几秒为每个模型写一次状态，列集合基本固定，因此语句只构造一次，
+        行值在执行时作为参数传入: ``session.execute(stmt, row)``。
+        """
+        insert_statement(cls, columns)  # 校验列名
+        stmt = mysql_insert(cls.__table__)
+        return stmt.on_duplicate_key_update(
+            **{name: stmt.inserted[name] for name in sorted(columns) if name != "model_id"},
+            updated_at=func.now()
+        )
 
-class GPUMetricsDB(Base):
+class GPUMetricsDB(BulkInsertMixin, Base):
     """GPU指标数据库模型"""
     __tablename__ = "gpu_metrics"
     
+    # 分区表的主键必须包含分区键，因此主键为(id, timestamp)
     id = Column(Integer, primary_key=True, autoincrement=True)
     device_id = Column(Integer, nullable=False, comment="GPU设备ID")
-    timestamp = Column(DateTime, default=func.now(), comment="时间戳")
+    timestamp = Column(DateTime, primary_key=True, default=func.now(), comment="时间戳")
     utilization = Column(Float, nullable=False, comment="利用率(%)")
     memory_used = Column(Integer, nullable=False, comment="内存使用(MB)")
     memory_total = Column(Integer, nullable=False, comment="总内存(MB)")
@@ -161,24 +436,59 @@ class GPUMetricsDB(Base):
     power_usage = Column(Float, nullable=True, comment="功耗(瓦特)")
     fan_speed = Column(Float, nullable=True, comment="风扇转速(%)")
     
-    # 索引 - 暂时移除以避免TiDB临时空间问题
-    # __table_args__ = (
-    #     Index('idx_gpu_device_time', 'device_id', 'timestamp'),
-    #     Index('idx_gpu_timestamp', 'timestamp'),
-    # )
+    # 按天RANGE分区，(device_id, timestamp)索引随分区本地化；
+    # 时间戳单列索引由分区裁剪替代。info中记录TiFlash副本（由迁移创建）
+    __table_args__ = (
+        Index('idx_gpu_device_time', 'device_id', 'timestamp'),
+        {"mysql_partition_by": METRICS_PARTITION_BY,
+         "info": {"tiflash_replica": TIFLASH_REPLICA_COUNT}},
+    )
 
-class SystemMetricsDB(Base):
+class GPUMetricsRollupDB(BulkInsertMixin, Base):
+    """GPU指标汇总数据库模型（1分钟/1小时桶）"""
+    __tablename__ = "gpu_metrics_rollup"
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    device_id = Column(Integer, nullable=False, comment="GPU设备ID")
+    bucket_start = Column(DateTime, nullable=False, comment="时间桶起始时间")
+    bucket_width_seconds = Column(Integer, nullable=False, comment="时间桶宽度(秒)")
+    sample_count = Column(Integer, nullable=False, comment="样本数")
+    util_avg = Column(Float, nullable=False, comment="平均利用率(%)")
+    util_max = Column(Float, nullable=False, comment="最大利用率(%)")
+    util_min = Column(Float, nullable=False, comment="最小利用率(%)")
+    mem_used_avg = Column(Float, nullable=False, comment="平均内存使用(MB)")
+    mem_used_max = Column(Integer, nullable=False, comment="最大内存使用(MB)")
+    temperature_max = Column(Float, nullable=True, comment="最高温度(摄氏度)")
+    power_avg = Column(Float, nullable=True, comment="平均功耗(瓦特)")
+    
+    __table_args__ = (
+        UniqueConstraint('device_id', 'bucket_start', 'bucket_width_seconds', name='uq_gpu_rollup_bucket'),
+    )
+
+class HostInfoDB(Base):
+    """主机静态信息数据库模型"""
+    __tablename__ = "host_info"
+    
+    id = Column(SmallInteger, primary_key=True, autoincrement=True)
+    hostname = Column(String(255), nullable=False, unique=True, comment="主机名")
+    memory_total = Column(Integer, nullable=False, comment="总内存(MB)")
+    disk_total = Column(Integer, nullable=False, comment="总磁盘空间(GB)")
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), nullable=False, comment="更新时间")
+
+class SystemMetricsDB(BulkInsertMixin, Base):
     """系统指标数据库模型"""
     __tablename__ = "system_metrics"
     
+    # 分区表的主键必须包含分区键，因此主键为(id, timestamp)
     id = Column(Integer, primary_key=True, autoincrement=True)
-    timestamp = Column(DateTime, default=func.now(), comment="时间戳")
+    timestamp = Column(DateTime, primary_key=True, default=func.now(), comment="时间戳")
+    # 总内存/总磁盘在主机生命周期内不变，存于host_info而非每行重复存储；
+    # 分区表不支持外键，关联关系只在ORM层声明
+    host_id = Column(SmallInteger, nullable=False, comment="主机ID")
     cpu_usage = Column(Float, nullable=False, comment="CPU使用率(%)")
     memory_usage = Column(Float, nullable=False, comment="内存使用率(%)")
-    memory_total = Column(Integer, nullable=False, comment="总内存(MB)")
     memory_used = Column(Integer, nullable=False, comment="已用内存(MB)")
     disk_usage = Column(Float, nullable=False, comment="磁盘使用率(%)")
-    disk_total = Column(Integer, nullable=False, comment="总磁盘空间(GB)")
     disk_used = Column(Integer, nullable=False, comment="已用磁盘空间(GB)")
     network_sent = Column(Integer, default=0, comment="网络发送字节数")
     network_recv = Column(Integer, default=0, comment="网络接收字节数")
@@ -186,72 +496,47 @@ class SystemMetricsDB(Base):
     load_average_5m = Column(Float, nullable=True, comment="5分钟负载")
     load_average_15m = Column(Float, nullable=True, comment="15分钟负载")
     
-    # 索引 - 暂时移除以避免TiDB临时空间问题
-    # __table_args__ = (
-    #     Index('idx_system_timestamp', 'timestamp'),
-    # )
-
-class AlertRuleDB(Base):
-    """告警规则数据库模型"""
-    __tablename__ = "alert_rules"
-    
-    id = Column(String(255), primary_key=True, comment="规则ID")
-    name = Column(String(255), nullable=False, comment="规则名称")
-    condition = Column(Text, nullable=False, comment="告警条件")
-    threshold = Column(Float, nullable=False, comment="阈值")
-    level = Column(String(50), nullable=False, comment="告警级别")
-    enabled = Column(Boolean, default=True, comment="是否启用")
-    notification_channels = Column(JSON, nullable=True, comment="通知渠道")
-    description = Column(Text, nullable=True, comment="规则描述")
-    created_at = Column(DateTime, default=func.now(), comment="创建时间")
-    updated_at = Column(DateTime, default=func.now(), onupdate=func.now(), comment="更新时间")
+    host = relationship(
+        "HostInfoDB",
+        primaryjoin="foreign(SystemMetricsDB.host_id) == HostInfoDB.id",
+        viewonly=True,
+        lazy="raise"
+    )
     
-    # 索引 - 暂时移除以避免TiDB临时空间问题
-    # __table_args__ = (
-    #     Index('idx_alert_enabled', 'enabled'),
-    #     Index('idx_alert_level', 'level'),
-    # )
-
-class AlertEventDB(Base):
-    """告警事件数据库模型"""
-    __tablename__ = "alert_events"
-    
-    id = Column(String(255), primary_key=True, comment="告警ID")
-    rule_id = Column(String(255), nullable=False, comment="规则ID")
-    level = Column(String(50), nullable=False, comment="告警级别")
-    message = Column(Text, nullable=False, comment="告警消息")
-    details = Column(JSON, nullable=True, comment="告警详情")
-    resolved = Column(Boolean, default=False, comment="是否已解决")
-    resolved_at = Column(DateTime, nullable=True, comment="解决时间")
-    resolved_by = Column(String(255), nullable=True, comment="解决者")
-    created_at = Column(DateTime, default=func.now(), comment="告警时间")
-    
-    # 索引 - 暂时移除以避免TiDB临时空间问题
-    # __table_args__ = (
-    #     Index('idx_event_rule_id', 'rule_id'),
-    #     Index('idx_event_level', 'level'),
-    #     Index('idx_event_resolved', 'resolved'),
-    #     Index('idx_event_created', 'created_at'),
-    # )
+    # 按天RANGE分区，时间窗口查询由分区裁剪完成。info中记录TiFlash副本（由迁移创建）
+    __table_args__ = (
+        {"mysql_partition_by": METRICS_PARTITION_BY,
+         "info": {"tiflash_replica": TIFLASH_REPLICA_COUNT}},
+    )
 
 class AlertRule(Base):
     """新版告警规则数据库模型"""
     __tablename__ = "alert_rules_v2"
     
-    id = Column(String(255), primary_key=True, comment="规则ID")
+    id = Column(String(ID_LENGTH), primary_key=True, comment="规则ID")
     name = Column(String(255), nullable=False, comment="规则名称")
     description = Column(Text, nullable=True, comment="规则描述")
     condition = Column(JSON, nullable=False, comment="告警条件(JSON格式)")
-    severity = Column(String(50), nullable=False, comment="严重程度")
+    severity = Column(enum_column(AlertSeverity), nullable=False, comment="严重程度")
     enabled = Column(Boolean, default=True, comment="是否启用")
     notification_channels = Column(JSON, nullable=True, comment="通知渠道列表")
+    notification_channel_mask = Column(SmallInteger, nullable=False, default=0, server_default=text("0"),
+                                       comment="通知渠道位标志(NotificationChannelFlag)")
     notification_config = Column(JSON, nullable=True, comment="通知配置")
     labels = Column(JSON, nullable=True, comment="标签")
     annotations = Column(JSON, nullable=True, comment="注释")
-    created_at = Column(DateTime, default=func.now(), comment="创建时间")
-    updated_at = Column(DateTime, default=func.now(), onupdate=func.now(), comment="更新时间")
+    created_at = Column(DateTime, server_default=func.now(), nullable=False, comment="创建时间")
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), nullable=False, comment="更新时间")
     
-    # 索引 - 暂时移除以避免TiDB临时空间问题
+    # 通知渠道多值索引(MySQL 8.0.17+/TiDB 6.6+)，支持 MEMBER OF / JSON_CONTAINS 查询
+    __table_args__ = (
+        Index(
+            'idx_alert_rule_v2_channels',
+            text("(CAST(notification_channels AS CHAR(64) ARRAY))")
+        ).ddl_if(dialect="mysql"),
+    )
+    
+    # 其余索引 - 暂时移除以避免TiDB临时空间问题
     # __table_args__ = (
     #     Index('idx_alert_rule_v2_enabled', 'enabled'),
     #     Index('idx_alert_rule_v2_severity', 'severity'),
@@ -263,21 +548,40 @@ class AlertHistory(Base):
     __tablename__ = "alert_history"
     
     id = Column(Integer, primary_key=True, autoincrement=True)
-    alert_id = Column(String(255), nullable=False, comment="告警实例ID")
-    rule_id = Column(String(255), nullable=False, comment="规则ID")
+    alert_id = Column(String(INSTANCE_ID_LENGTH), nullable=False, comment="告警实例ID")
+    rule_id = Column(String(ID_LENGTH), nullable=False, comment="规则ID")
     rule_name = Column(String(255), nullable=False, comment="规则名称")
-    severity = Column(String(50), nullable=False, comment="严重程度")
+    severity = Column(enum_column(AlertSeverity), nullable=False, comment="严重程度")
     message = Column(Text, nullable=False, comment="告警消息")
     labels = Column(JSON, nullable=True, comment="标签")
+    env_label = Column(
+        String(32),
+        Computed("JSON_UNQUOTE(JSON_EXTRACT(labels, '$.env'))", persisted=True),
+        comment="env标签(由labels生成)"
+    )
     annotations = Column(JSON, nullable=True, comment="注释")
     starts_at = Column(DateTime, nullable=False, comment="开始时间")
     ends_at = Column(DateTime, nullable=True, comment="结束时间")
-    status = Column(String(50), nullable=False, comment="状态")
+    status = Column(String(16), nullable=False, comment="状态")
     notification_sent = Column(Boolean, default=False, comment="是否已发送通知")
-    created_at = Column(DateTime, default=func.now(), comment="创建时间")
-    updated_at = Column(DateTime, default=func.now(), onupdate=func.now(), comment="更新时间")
+    created_at = Column(DateTime, server_default=func.now(), nullable=False, comment="创建时间")
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), nullable=False, comment="更新时间")
     
-    # 索引 - 暂时移除以避免TiDB临时空间问题
+    # JSON路径生成列上的索引，使按env标签过滤可走索引。
+    # 仪表盘查询使用两个复合索引：按规则/状态筛选并按开始时间倒序取最近记录，
+    # 以及按时间范围统计状态和严重程度（索引覆盖，无需回表）。
+    # 只按规则筛选时状态列隔在中间无法免排序，另建(rule_id, starts_at)索引按序反向扫描取前N条。
+    # message为TEXT，只能建前缀索引而前缀索引无法覆盖查询，因此不纳入索引
+    __table_args__ = (
+        Index('idx_alert_history_env_label', 'env_label'),
+        Index('idx_alert_history_rule_status_time', 'rule_id', 'status', 'starts_at', 'severity'),
+        Index('idx_alert_history_rule_time', 'rule_id', 'starts_at'),
+        Index('idx_alert_history_time_status_severity', 'starts_at', 'status', 'severity'),
+        # info中记录TiFlash副本（由迁移创建），摘要统计由列存读取
+        {"info": {"tiflash_replica": TIFLASH_REPLICA_COUNT}},
+    )
+    
+    # 其余索引 - 暂时移除以避免TiDB临时空间问题
     # __table_args__ = (
     #     Index('idx_alert_history_rule_id', 'rule_id'),
     #     Index('idx_alert_history_severity', 'severity'),
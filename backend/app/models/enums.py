@@ -1,7 +1,8 @@
 """
 枚举类型定义
 """
-from enum import Enum
+from enum import Enum, IntEnum, IntFlag
+from typing import Iterable, Optional
 
 class FrameworkType(str, Enum):
     """推理框架类型"""
@@ -9,6 +10,12 @@ class FrameworkType(str, Enum):
     VLLM = "vllm"
     DOCKER = "docker"
 
+class FrameworkTypeCode(IntEnum):
+    """推理框架类型的整数编码，成员名与FrameworkType一一对应，用于数据库存储"""
+    LLAMA_CPP = 1
+    VLLM = 2
+    DOCKER = 3
+
 class ModelStatus(str, Enum):
     """模型状态"""
     STOPPED = "stopped"          # 已停止
@@ -31,6 +38,23 @@ class HealthStatus(str, Enum):
     UNHEALTHY = "unhealthy"      # 不健康
     UNKNOWN = "unknown"          # 未知
 
+class NotificationChannelFlag(IntFlag):
+    """通知渠道位标志，多个渠道按位或后存储为一个SMALLINT"""
+    EMAIL = 1
+    WEBHOOK = 2
+    SLACK = 4
+    DINGTALK = 8
+    
+    @classmethod
+    def from_names(cls, names: Optional[Iterable[str]]) -> "NotificationChannelFlag":
+        """由渠道名列表构造位标志，忽略未知渠道"""
+        flags = cls(0)
+        for name in names or []:
+            member = cls.__members__.get(str(name).upper())
+            if member is not None:
+                flags |= member
+        return flags
+
 class AlertLevel(str, Enum):
     """告警级别"""
     INFO = "info"
@@ -1,16 +1,79 @@
 """
-Pydantic数据模式定义
+数据模式定义
+
+API请求/响应使用Pydantic模型；按采样周期大量创建的指标记录使用msgspec结构体，
+构造时不做校验、不参与GC跟踪，序列化使用模块级编码器。
 """
-from pydantic import BaseModel, Field
-from typing import Dict, List, Optional, Any
+from pydantic import (
+    AfterValidator, BaseModel, ConfigDict, Field, PlainValidator, PlainSerializer, TypeAdapter,
+    WithJsonSchema, create_model
+)
+from typing import Annotated, Dict, List, Literal, Optional, Any, Tuple, Union
+from array import array
+from dataclasses import dataclass
 from datetime import datetime
+import msgspec
+import operator
+from typing_extensions import TypedDict
+import sys
 from .enums import (
     FrameworkType, ModelStatus, GPUVendor, HealthStatus, AlertLevel, 
     ScheduleResult, ComparisonOperator, PreemptionReason, RecoveryReason, 
     ScheduleDecisionType
 )
 
-class GPUInfo(BaseModel):
+# 告警条件比较操作符到比较函数的映射。接口按此表校验操作符，
+# 告警服务在构造条件时一次性取出比较函数，评估时不再按字符串分支
+CONDITION_OPERATORS = {
+    ">": operator.gt,
+    "<": operator.lt,
+    ">=": operator.ge,
+    "<=": operator.le,
+    "==": operator.eq,
+    "!=": operator.ne,
+}
+ConditionOperatorLiteral = Literal[">", "<", ">=", "<=", "==", "!="]
+
+class LazyModel(BaseModel):
+    """延迟构建校验器的模型基类
+    
+    导入本模块时不为每个模型构建pydantic-core校验器和序列化器，而是在首次校验时构建；
+    启动后立即使用的模型由build_hot_schemas()预先构建。
+    """
+    model_config = ConfigDict(defer_build=True)
+
+def _to_float_series(value: Any) -> array:
+    """将数值序列转换为float32紧凑数组"""
+    if isinstance(value, array) and value.typecode == "f":
+        return value
+    try:
+        return array("f", value)
+    except TypeError as e:
+        raise ValueError(f"需要数值序列: {e}") from e
+
+# 时间序列以array('f')存储（每个采样4字节，而非每个PyFloat对象约24字节），
+# 序列化和JSON Schema仍为数值列表
+FloatSeries = Annotated[
+    array,
+    PlainValidator(_to_float_series),
+    PlainSerializer(lambda series: series.tolist(), return_type=List[float]),
+    WithJsonSchema({"type": "array", "items": {"type": "number"}}),
+]
+
+# 告警接口的严重程度和状态使用Literal，由pydantic-core直接按字面量校验，
+# 取值与AlertSeverity及告警服务中的告警状态一致
+SeverityLiteral = Literal["low", "medium", "high", "critical"]
+AlertStatusLiteral = Literal["active", "resolved", "suppressed"]
+
+def _intern_label_keys(labels: Dict[str, str]) -> Dict[str, str]:
+    """驻留标签键，使各条告警的相同键共享同一字符串对象"""
+    return {sys.intern(key): value for key, value in labels.items()}
+
+# 告警标签和注释的键来自少量重复的词汇（severity、instance、alertname等），
+# 校验后驻留键字符串，避免每条告警各存一份
+LabelDict = Annotated[Dict[str, str], AfterValidator(_intern_label_keys)]
+
+class GPUInfo(LazyModel):
     """GPU设备信息"""
     device_id: int = Field(..., description="GPU设备ID")
     name: str = Field(..., description="GPU设备名称")
@@ -23,32 +86,42 @@ class GPUInfo(BaseModel):
     power_usage: float = Field(..., description="功耗(瓦特)")
     driver_version: Optional[str] = Field(None, description="驱动版本")
 
-class ResourceRequirement(BaseModel):
+class ResourceRequirement(LazyModel):
     """资源需求"""
+    model_config = ConfigDict(frozen=True)
+    
     gpu_memory: int = Field(..., description="所需GPU内存(MB)")
     gpu_devices: List[int] = Field(default_factory=list, description="指定GPU设备ID列表")
     cpu_cores: Optional[int] = Field(None, description="所需CPU核心数")
     system_memory: Optional[int] = Field(None, description="所需系统内存(MB)")
 
-class HealthCheckConfig(BaseModel):
+class HealthCheckConfig(LazyModel):
     """健康检查配置"""
+    model_config = ConfigDict(frozen=True)
+    
     enabled: bool = Field(True, description="是否启用健康检查")
     interval: int = Field(30, description="检查间隔(秒)")
     timeout: int = Field(10, description="检查超时(秒)")
     max_failures: int = Field(3, description="最大失败次数")
     endpoint: Optional[str] = Field(None, description="健康检查端点")
 
-class RetryPolicy(BaseModel):
+class RetryPolicy(LazyModel):
     """重试策略"""
+    model_config = ConfigDict(frozen=True)
+    
     enabled: bool = Field(True, description="是否启用重试")
     max_attempts: int = Field(3, description="最大重试次数")
     initial_delay: int = Field(5, description="初始延迟(秒)")
     max_delay: int = Field(300, description="最大延迟(秒)")
     backoff_factor: float = Field(2.0, description="退避因子")
 
-class ModelConfig(BaseModel):
+# 不可变的默认配置由所有模型配置共享，不再为每个ModelConfig各构造一份
+DEFAULT_HEALTH_CHECK = HealthCheckConfig()
+DEFAULT_RETRY_POLICY = RetryPolicy()
+
+class ModelConfig(LazyModel):
     """模型配置"""
-    id: str = Field(..., description="模型唯一标识")
+    id: str = Field(..., max_length=64, description="模型唯一标识")
     name: str = Field(..., description="模型名称")
     framework: FrameworkType = Field(..., description="推理框架类型")
     model_path: str = Field(..., description="模型文件路径")
@@ -57,12 +130,12 @@ class ModelConfig(BaseModel):
     additional_parameters: Optional[str] = Field(None, description="附加启动参数")
     parameters: Dict[str, Any] = Field(default_factory=dict, description="框架特定参数")
     resource_requirements: ResourceRequirement = Field(..., description="资源需求")
-    health_check: HealthCheckConfig = Field(default_factory=HealthCheckConfig, description="健康检查配置")
-    retry_policy: RetryPolicy = Field(default_factory=RetryPolicy, description="重试策略")
+    health_check: HealthCheckConfig = Field(DEFAULT_HEALTH_CHECK, description="健康检查配置")
+    retry_policy: RetryPolicy = Field(DEFAULT_RETRY_POLICY, description="重试策略")
     created_at: Optional[datetime] = Field(None, description="创建时间")
     updated_at: Optional[datetime] = Field(None, description="更新时间")
 
-class ModelInfo(BaseModel):
+class ModelInfo(LazyModel):
     """模型信息"""
     id: str = Field(..., description="模型ID")
     name: str = Field(..., description="模型名称")
@@ -76,13 +149,13 @@ class ModelInfo(BaseModel):
     uptime: Optional[int] = Field(None, description="运行时间(秒)")
     last_health_check: Optional[datetime] = Field(None, description="最后健康检查时间")
 
-class ResourceAllocation(BaseModel):
+class ResourceAllocation(LazyModel):
     """资源分配"""
     gpu_devices: List[int] = Field(..., description="分配的GPU设备")
     memory_allocated: int = Field(..., description="分配的内存(MB)")
     allocation_time: datetime = Field(..., description="分配时间")
 
-class SystemOverview(BaseModel):
+class SystemOverview(LazyModel):
     """系统概览"""
     total_models: int = Field(..., description="模型总数")
     running_models: int = Field(..., description="运行中模型数")
@@ -93,17 +166,65 @@ class SystemOverview(BaseModel):
     system_uptime: int = Field(..., description="系统运行时间(秒)")
     last_updated: datetime = Field(..., description="最后更新时间")
 
-class GPUMetrics(BaseModel):
+class GPUMetrics(msgspec.Struct, gc=False, frozen=True):
     """GPU指标"""
-    device_id: int = Field(..., description="GPU设备ID")
-    timestamp: datetime = Field(..., description="时间戳")
-    utilization: float = Field(..., description="利用率(%)")
-    memory_used: int = Field(..., description="内存使用(MB)")
-    memory_total: int = Field(..., description="总内存(MB)")
-    temperature: float = Field(..., description="温度(摄氏度)")
-    power_usage: float = Field(..., description="功耗(瓦特)")
+    device_id: int               # GPU设备ID
+    timestamp: datetime          # 时间戳
+    utilization: float           # 利用率(%)
+    memory_used: int             # 内存使用(MB)
+    memory_total: int            # 总内存(MB)
+    temperature: float           # 温度(摄氏度)
+    power_usage: float           # 功耗(瓦特)
+
+# 定点整数类型，取值范围与对应的int16/uint8/uint32一致，解码时由msgspec校验
+Int16 = Annotated[int, msgspec.Meta(ge=-32768, le=32767)]
+UInt8 = Annotated[int, msgspec.Meta(ge=0, le=255)]
+UInt32 = Annotated[int, msgspec.Meta(ge=0, le=4294967295)]
+
+def _quantize(value: float, scale: int, low: int, high: int) -> int:
+    """按比例取整并截断到定点类型的取值范围"""
+    return max(low, min(high, round(value * scale)))
 
-class AlertRule(BaseModel):
+class GPUMetricsPacked(msgspec.Struct, gc=False, frozen=True, array_like=True):
+    """GPU指标的定点存储形式，用于采集历史
+    
+    温度以0.1摄氏度、功耗以0.1瓦特、利用率以整数百分比存储，精度满足监控需要；
+    字段均为小整数，按数组编码。对外接口仍使用GPUMetrics，查询历史时按需还原。
+    """
+    device_id: int                   # GPU设备ID
+    timestamp: datetime              # 时间戳
+    utilization_pc: UInt8            # 利用率(%)
+    memory_used_mb: UInt32           # 内存使用(MB)
+    memory_total_mb: UInt32          # 总内存(MB)
+    temperature_dc: Int16            # 温度(0.1摄氏度)
+    power_dw: Int16                  # 功耗(0.1瓦特)
+    
+    @classmethod
+    def from_raw(cls, metric: GPUMetrics) -> "GPUMetricsPacked":
+        """由采集到的GPU指标量化生成"""
+        return cls(
+            device_id=metric.device_id,
+            timestamp=metric.timestamp,
+            utilization_pc=_quantize(metric.utilization, 1, 0, 100),
+            memory_used_mb=_quantize(metric.memory_used, 1, 0, 4294967295),
+            memory_total_mb=_quantize(metric.memory_total, 1, 0, 4294967295),
+            temperature_dc=_quantize(metric.temperature, 10, -32768, 32767),
+            power_dw=_quantize(metric.power_usage, 10, -32768, 32767),
+        )
+    
+    def unpack(self) -> GPUMetrics:
+        """还原为GPU指标"""
+        return GPUMetrics(
+            device_id=self.device_id,
+            timestamp=self.timestamp,
+            utilization=float(self.utilization_pc),
+            memory_used=self.memory_used_mb,
+            memory_total=self.memory_total_mb,
+            temperature=self.temperature_dc / 10,
+            power_usage=self.power_dw / 10,
+        )
+
+class AlertRule(LazyModel):
     """告警规则"""
     id: str = Field(..., description="规则ID")
     name: str = Field(..., description="规则名称")
@@ -111,20 +232,20 @@ class AlertRule(BaseModel):
     threshold: float = Field(..., description="阈值")
     level: AlertLevel = Field(..., description="告警级别")
     enabled: bool = Field(True, description="是否启用")
-    notification_channels: List[str] = Field(default_factory=list, description="通知渠道")
+    notification_channels: Tuple[str, ...] = Field((), description="通知渠道")
 
-class ValidationResult(BaseModel):
+class ValidationResult(LazyModel):
     """验证结果"""
     is_valid: bool = Field(..., description="是否有效")
     errors: List[str] = Field(default_factory=list, description="错误信息列表")
     warnings: List[str] = Field(default_factory=list, description="警告信息列表")
 
-class TimeRange(BaseModel):
+class TimeRange(LazyModel):
     """时间范围"""
     start_time: datetime = Field(..., description="开始时间")
     end_time: datetime = Field(..., description="结束时间")
 
-class Metrics(BaseModel):
+class Metrics(LazyModel):
     """性能指标"""
     model_id: str = Field(..., description="模型ID")
     time_range: TimeRange = Field(..., description="时间范围")
@@ -132,35 +253,38 @@ class Metrics(BaseModel):
     average_response_time: float = Field(..., description="平均响应时间(毫秒)")
     error_rate: float = Field(..., description="错误率(%)")
     throughput: float = Field(..., description="吞吐量(请求/秒)")
-    gpu_utilization: List[float] = Field(..., description="GPU利用率历史数据")
+    gpu_utilization: FloatSeries = Field(..., description="GPU利用率历史数据")
 
-class ModelPerformanceMetrics(BaseModel):
+class ModelPerformanceMetrics(msgspec.Struct, gc=False, frozen=True):
     """模型性能指标"""
-    model_id: str = Field(..., description="模型ID")
-    timestamp: datetime = Field(..., description="时间戳")
-    request_count: int = Field(0, description="请求数量")
-    total_response_time: float = Field(0.0, description="总响应时间(毫秒)")
-    error_count: int = Field(0, description="错误数量")
-    active_connections: int = Field(0, description="活跃连接数")
-    memory_usage: int = Field(0, description="内存使用量(MB)")
-    cpu_usage: float = Field(0.0, description="CPU使用率(%)")
-    gpu_utilization: float = Field(0.0, description="GPU利用率(%)")
-
-class SystemResourceMetrics(BaseModel):
+    model_id: str                    # 模型ID
+    timestamp: datetime              # 时间戳
+    request_count: int = 0           # 请求数量
+    total_response_time: float = 0.0 # 总响应时间(毫秒)
+    error_count: int = 0             # 错误数量
+    active_connections: int = 0      # 活跃连接数
+    memory_usage: int = 0            # 内存使用量(MB)
+    cpu_usage: float = 0.0           # CPU使用率(%)
+    gpu_utilization: float = 0.0     # GPU利用率(%)
+
+class SystemResourceMetrics(msgspec.Struct, gc=False, frozen=True):
     """系统资源指标"""
-    timestamp: datetime = Field(..., description="时间戳")
-    cpu_usage: float = Field(0.0, description="CPU使用率(%)")
-    memory_usage: float = Field(0.0, description="内存使用率(%)")
-    memory_total: int = Field(0, description="总内存(MB)")
-    memory_used: int = Field(0, description="已用内存(MB)")
-    disk_usage: float = Field(0.0, description="磁盘使用率(%)")
-    disk_total: int = Field(0, description="总磁盘空间(GB)")
-    disk_used: int = Field(0, description="已用磁盘空间(GB)")
-    network_sent: int = Field(0, description="网络发送字节数")
-    network_recv: int = Field(0, description="网络接收字节数")
-    load_average: List[float] = Field(default_factory=list, description="系统负载(1,5,15分钟)")
-
-class AlertEvent(BaseModel):
+    timestamp: datetime              # 时间戳
+    cpu_usage: float = 0.0           # CPU使用率(%)
+    memory_usage: float = 0.0        # 内存使用率(%)
+    memory_total: int = 0            # 总内存(MB)
+    memory_used: int = 0             # 已用内存(MB)
+    disk_usage: float = 0.0          # 磁盘使用率(%)
+    disk_total: int = 0              # 总磁盘空间(GB)
+    disk_used: int = 0               # 已用磁盘空间(GB)
+    network_sent: int = 0            # 网络发送字节数
+    network_recv: int = 0            # 网络接收字节数
+    load_average: Tuple[float, ...] = ()  # 系统负载(1,5,15分钟)
+
+# 指标结构体的JSON编码器，复用同一实例避免每次编码重新构造
+metrics_encoder = msgspec.json.Encoder()
+
+class AlertEvent(LazyModel):
     """告警事件"""
     id: str = Field(..., description="告警ID")
     rule_id: str = Field(..., description="规则ID")
@@ -170,97 +294,149 @@ class AlertEvent(BaseModel):
     resolved: bool = Field(False, description="是否已解决")
     resolved_at: Optional[datetime] = Field(None, description="解决时间")
 
-class AlertCondition(BaseModel):
+class AlertCondition(LazyModel):
     """告警条件"""
     operator: ComparisonOperator = Field(..., description="比较操作符")
     threshold: Any = Field(..., description="阈值")
     duration: Optional[int] = Field(None, description="持续时间(秒)")
 
 # 新版告警系统模式
-class AlertConditionSchema(BaseModel):
+class AlertConditionSchema(LazyModel):
     """告警条件模式"""
     metric: str = Field(..., description="监控指标名称")
-    operator: str = Field(..., description="比较操作符")
+    operator: ConditionOperatorLiteral = Field(..., description="比较操作符")
     threshold: float = Field(..., description="阈值")
     duration: int = Field(..., description="持续时间(秒)")
 
-class NotificationConfig(BaseModel):
+class EmailNotification(LazyModel):
+    """邮件通知配置，字段完整性由发送器在发送时检查"""
+    model_config = ConfigDict(frozen=True)
+    
+    smtp_server: Optional[str] = Field(None, description="SMTP服务器")
+    smtp_port: int = Field(587, description="SMTP端口")
+    username: Optional[str] = Field(None, description="用户名")
+    password: Optional[str] = Field(None, description="密码")
+    from_email: Optional[str] = Field(None, description="发件人")
+    to_emails: List[str] = Field(default_factory=list, description="收件人列表")
+
+class WebhookNotification(LazyModel):
+    """Webhook通知配置"""
+    model_config = ConfigDict(frozen=True)
+    
+    url: Optional[str] = Field(None, description="Webhook地址")
+    headers: Dict[str, str] = Field(default_factory=dict, description="请求头")
+    timeout: int = Field(30, description="超时时间(秒)")
+
+class SlackNotification(LazyModel):
+    """Slack通知配置"""
+    model_config = ConfigDict(frozen=True)
+    
+    webhook_url: Optional[str] = Field(None, description="Slack Webhook地址")
+    channel: str = Field("#alerts", description="频道")
+    username: str = Field("LLM Alert Bot", description="发送者名称")
+
+class DingTalkNotification(LazyModel):
+    """钉钉通知配置"""
+    model_config = ConfigDict(frozen=True)
+    
+    webhook_url: Optional[str] = Field(None, description="钉钉机器人Webhook地址")
+    secret: Optional[str] = Field(None, description="加签密钥")
+
+class NotificationConfig(LazyModel):
     """通知配置模式"""
-    email: Optional[Dict[str, Any]] = Field(None, description="邮件通知配置")
-    webhook: Optional[Dict[str, Any]] = Field(None, description="Webhook通知配置")
-    slack: Optional[Dict[str, Any]] = Field(None, description="Slack通知配置")
-    dingtalk: Optional[Dict[str, Any]] = Field(None, description="钉钉通知配置")
+    email: Optional[EmailNotification] = Field(None, description="邮件通知配置")
+    webhook: Optional[WebhookNotification] = Field(None, description="Webhook通知配置")
+    slack: Optional[SlackNotification] = Field(None, description="Slack通知配置")
+    dingtalk: Optional[DingTalkNotification] = Field(None, description="钉钉通知配置")
 
-class AlertRuleCreate(BaseModel):
-    """创建告警规则请求"""
+class _AlertRuleBase(LazyModel):
+    """告警规则公共字段"""
     name: str = Field(..., description="规则名称")
     description: Optional[str] = Field(None, description="规则描述")
     condition: AlertConditionSchema = Field(..., description="告警条件")
-    severity: str = Field(..., description="严重程度")
+    severity: SeverityLiteral = Field(..., description="严重程度")
     enabled: bool = Field(True, description="是否启用")
-    notification_channels: List[str] = Field(default_factory=list, description="通知渠道")
+    notification_channels: Tuple[str, ...] = Field((), description="通知渠道")
     notification_config: NotificationConfig = Field(default_factory=NotificationConfig, description="通知配置")
-    labels: Optional[Dict[str, str]] = Field(None, description="标签")
-    annotations: Optional[Dict[str, str]] = Field(None, description="注释")
+    labels: Optional[LabelDict] = Field(None, description="标签")
+    annotations: Optional[LabelDict] = Field(None, description="注释")
 
-class AlertRuleUpdate(BaseModel):
-    """更新告警规则请求"""
-    name: Optional[str] = Field(None, description="规则名称")
-    description: Optional[str] = Field(None, description="规则描述")
-    condition: Optional[AlertConditionSchema] = Field(None, description="告警条件")
-    severity: Optional[str] = Field(None, description="严重程度")
-    enabled: Optional[bool] = Field(None, description="是否启用")
-    notification_channels: Optional[List[str]] = Field(None, description="通知渠道")
-    notification_config: Optional[NotificationConfig] = Field(None, description="通知配置")
-    labels: Optional[Dict[str, str]] = Field(None, description="标签")
-    annotations: Optional[Dict[str, str]] = Field(None, description="注释")
-
-class AlertRuleResponse(BaseModel):
+class AlertRuleCreate(_AlertRuleBase):
+    """创建告警规则请求"""
+
+def _partial_fields(model: type) -> Dict[str, Any]:
+    """将模型字段转换为全部可选、默认None的字段定义，保留Literal及校验器等注解元数据"""
+    fields = {}
+    for name, field in model.model_fields.items():
+        annotation = field.annotation
+        if field.metadata:
+            annotation = Annotated[(annotation, *field.metadata)]
+        fields[name] = (Optional[annotation], Field(None, description=field.description))
+    return fields
+
+# 更新请求的字段由公共字段派生，只是全部可选，新增规则字段时无需在两处同步
+AlertRuleUpdate = create_model(
+    "AlertRuleUpdate",
+    __doc__="更新告警规则请求",
+    __base__=LazyModel,
+    __module__=__name__,
+    **_partial_fields(_AlertRuleBase),
+)
+
+class AlertRuleResponse(_AlertRuleBase):
     """告警规则响应"""
     id: str = Field(..., description="规则ID")
-    name: str = Field(..., description="规则名称")
-    description: Optional[str] = Field(None, description="规则描述")
-    condition: AlertConditionSchema = Field(..., description="告警条件")
-    severity: str = Field(..., description="严重程度")
-    enabled: bool = Field(..., description="是否启用")
-    notification_channels: List[str] = Field(..., description="通知渠道")
-    notification_config: NotificationConfig = Field(..., description="通知配置")
-    labels: Dict[str, str] = Field(..., description="标签")
-    annotations: Dict[str, str] = Field(..., description="注释")
+    labels: LabelDict = Field(..., description="标签")
+    annotations: LabelDict = Field(..., description="注释")
     created_at: datetime = Field(..., description="创建时间")
     updated_at: datetime = Field(..., description="更新时间")
 
-class AlertResponse(BaseModel):
+class AlertResponse(LazyModel):
     """告警响应"""
     id: str = Field(..., description="告警ID")
     rule_id: str = Field(..., description="规则ID")
     rule_name: str = Field(..., description="规则名称")
-    severity: str = Field(..., description="严重程度")
+    severity: SeverityLiteral = Field(..., description="严重程度")
     message: str = Field(..., description="告警消息")
-    labels: Dict[str, str] = Field(..., description="标签")
-    annotations: Dict[str, str] = Field(..., description="注释")
+    labels: LabelDict = Field(..., description="标签")
+    annotations: LabelDict = Field(..., description="注释")
     starts_at: datetime = Field(..., description="开始时间")
     ends_at: Optional[datetime] = Field(None, description="结束时间")
-    status: str = Field(..., description="状态")
+    status: AlertStatusLiteral = Field(..., description="状态")
 
-class AlertHistoryResponse(BaseModel):
+class AlertHistoryResponse(LazyModel):
     """告警历史响应"""
     id: int = Field(..., description="历史记录ID")
     alert_id: str = Field(..., description="告警实例ID")
     rule_id: str = Field(..., description="规则ID")
     rule_name: str = Field(..., description="规则名称")
-    severity: str = Field(..., description="严重程度")
+    severity: SeverityLiteral = Field(..., description="严重程度")
     message: str = Field(..., description="告警消息")
-    labels: Dict[str, str] = Field(..., description="标签")
-    annotations: Dict[str, str] = Field(..., description="注释")
+    labels: LabelDict = Field(..., description="标签")
+    annotations: LabelDict = Field(..., description="注释")
     starts_at: datetime = Field(..., description="开始时间")
     ends_at: Optional[datetime] = Field(None, description="结束时间")
-    status: str = Field(..., description="状态")
+    status: AlertStatusLiteral = Field(..., description="状态")
     notification_sent: bool = Field(..., description="是否已发送通知")
     created_at: datetime = Field(..., description="创建时间")
     updated_at: datetime = Field(..., description="更新时间")
 
-class AlertSummary(BaseModel):
+class AlertHistoryRow(TypedDict):
+    """告警历史列表行
+    
+    列表只返回表格展示所需的列，完整记录由详情接口返回。行直接来自数据库投影查询，
+    由适配器按对象序列化，不再逐行构造和校验响应模型。
+    """
+    id: int
+    alert_id: str
+    rule_name: str
+    severity: SeverityLiteral
+    starts_at: datetime
+    status: AlertStatusLiteral
+
+alert_history_rows_adapter = TypeAdapter(List[AlertHistoryRow])
+
+class AlertSummary(LazyModel):
     """告警摘要"""
     total_alerts: int = Field(..., description="总告警数")
     active_alerts: int = Field(..., description="活跃告警数")
@@ -273,16 +449,37 @@ class AlertSummary(BaseModel):
     last_updated: datetime = Field(..., description="最后更新时间")
 
 # 调度相关类
-class ScheduleDecision(BaseModel):
+class ScheduleDecision(LazyModel):
     """调度决策"""
     model_id: str = Field(..., description="模型ID")
     decision_time: datetime = Field(..., description="决策时间")
     result: ScheduleResult = Field(..., description="调度结果")
-    gpu_devices: List[int] = Field(default_factory=list, description="分配的GPU设备")
-    preempted_models: List[str] = Field(default_factory=list, description="被抢占的模型")
+    gpu_devices: Tuple[int, ...] = Field((), description="分配的GPU设备")
+    preempted_models: Tuple[str, ...] = Field((), description="被抢占的模型")
     reason: Optional[str] = Field(None, description="决策原因")
 
-class RecoveryAttempt(BaseModel):
+# 按result区分的决策变体，每种结果只携带并校验自身需要的字段；
+# 解析时按result一次查表选中变体，而不是逐个尝试联合类型的成员
+class AllocatedDecision(ScheduleDecision):
+    """调度成功的决策"""
+    result: Literal[ScheduleResult.SUCCESS] = Field(..., description="调度结果")
+
+class PreemptionRequiredDecision(ScheduleDecision):
+    """需要抢占才能调度的决策"""
+    result: Literal[ScheduleResult.PREEMPTION_REQUIRED] = Field(..., description="调度结果")
+    preempted_models: Tuple[str, ...] = Field(..., min_length=1, description="需要抢占的模型")
+
+class RejectedDecision(ScheduleDecision):
+    """资源不足或调度失败的决策"""
+    result: Literal[ScheduleResult.INSUFFICIENT_RESOURCES, ScheduleResult.FAILED] = Field(..., description="调度结果")
+
+TaggedScheduleDecision = Annotated[
+    Union[AllocatedDecision, PreemptionRequiredDecision, RejectedDecision],
+    Field(discriminator="result"),
+]
+schedule_decision_adapter = TypeAdapter(TaggedScheduleDecision)
+
+class RecoveryAttempt(LazyModel):
     """恢复尝试"""
     model_id: str = Field(..., description="模型ID")
     attempt_time: datetime = Field(..., description="尝试时间")
@@ -291,18 +488,48 @@ class RecoveryAttempt(BaseModel):
     attempt_number: Optional[int] = Field(None, description="尝试次数")
     error_message: Optional[str] = Field(None, description="错误信息")
 
-class PreemptionStats(BaseModel):
+# 抢占/恢复统计是调度器内部反复累加的计数器，不经过请求校验，使用slots数据类
+@dataclass(slots=True)
+class PreemptionStats:
     """抢占统计"""
-    total_preemptions: int = Field(0, description="总抢占次数")
-    successful_preemptions: int = Field(0, description="成功抢占次数")
-    failed_preemptions: int = Field(0, description="失败抢占次数")
-    average_preemption_time: float = Field(0.0, description="平均抢占时间(秒)")
-    last_preemption_time: Optional[datetime] = Field(None, description="最后抢占时间")
+    total_preemptions: int = 0                        # 总抢占次数
+    successful_preemptions: int = 0                   # 成功抢占次数
+    failed_preemptions: int = 0                       # 失败抢占次数
+    average_preemption_time: float = 0.0              # 平均抢占时间(秒)
+    last_preemption_time: Optional[datetime] = None   # 最后抢占时间
 
-class RecoveryStats(BaseModel):
+@dataclass(slots=True)
+class RecoveryStats:
     """恢复统计"""
-    total_recoveries: int = Field(0, description="总恢复次数")
-    successful_recoveries: int = Field(0, description="成功恢复次数")
-    failed_recoveries: int = Field(0, description="失败恢复次数")
-    average_recovery_time: float = Field(0.0, description="平均恢复时间(秒)")
-    last_recovery_time: Optional[datetime] = Field(None, description="最后恢复时间")
\ No newline at end of file
+    total_recoveries: int = 0                         # 总恢复次数
+    successful_recoveries: int = 0                    # 成功恢复次数
+    failed_recoveries: int = 0                        # 失败恢复次数
+    average_recovery_time: float = 0.0                # 平均恢复时间(秒)
+    last_recovery_time: Optional[datetime] = None     # 最后恢复时间
+
+# 启动后每个采集周期都会构造的模型，在应用启动时预先构建以免首个请求承担构建开销
+HOT_SCHEMAS = (GPUInfo, ModelInfo, ModelConfig)
+
+def build_hot_schemas() -> None:
+    """构建常用模型的校验器"""
+    for schema in HOT_SCHEMAS:
+        schema.model_rebuild()
+
+def iter_lazy_models(base: type = LazyModel):
+    """遍历全部延迟构建的模型类（含create_model生成的模型）"""
+    for model in base.__subclasses__():
+        yield model
+        yield from iter_lazy_models(model)
+
+def build_deferred_schemas() -> List[type]:
+    """构建所有尚未构建的模型，返回本次构建的模型
+    
+    运行时模型按需构建；测试中调用本函数一次性构建全部模型，
+    使模式定义错误在测试阶段暴露，而不是在首次请求时。
+    """
+    built = []
+    for model in iter_lazy_models():
+        if not model.__pydantic_complete__:
+            model.model_rebuild()
+            built.append(model)
+    return built
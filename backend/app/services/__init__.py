@@ -1,15 +1,41 @@
 # 业务逻辑服务模块
 
-from .model_manager import ModelManager
-from .config_manager import FileConfigManager
-from .health_checker import ModelHealthChecker, AutoRecoveryManager
+import importlib
+from typing import TYPE_CHECKING
+
 from .base import (
     ModelManagerInterface,
     ConfigManagerInterface,
     ResourceSchedulerInterface,
     MonitoringServiceInterface
 )
-from ..adapters.base import FrameworkAdapterInterface
+
+if TYPE_CHECKING:
+    from .model_manager import ModelManager
+    from .config_manager import FileConfigManager
+    from .health_checker import ModelHealthChecker, AutoRecoveryManager
+    from ..adapters.base import FrameworkAdapterInterface
+
+# 服务实现及适配器接口按需导入（PEP 562），导入任一服务子模块时不再连带加载
+# 模型管理器、健康检查器和全部框架适配器
+_LAZY_IMPORTS = {
+    "ModelManager": ".model_manager",
+    "FileConfigManager": ".config_manager",
+    "ModelHealthChecker": ".health_checker",
+    "AutoRecoveryManager": ".health_checker",
+    "FrameworkAdapterInterface": "..adapters.base",
+}
+
+def __getattr__(name: str):
+    module_name = _LAZY_IMPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_IMPORTS))
 
 __all__ = [
     "ModelManager",
@@ -17,8 +43,8 @@ __all__ = [
     "ModelHealthChecker",
     "AutoRecoveryManager",
     "ModelManagerInterface",
-    "ConfigManagerInterface", 
+    "ConfigManagerInterface",
     "ResourceSchedulerInterface",
     "MonitoringServiceInterface",
     "FrameworkAdapterInterface"
-]
\ No newline at end of file
+]
@@ -5,22 +5,48 @@
 import asyncio
 import json
 import smtplib
+import string
+import time
+from collections import OrderedDict, defaultdict, deque
 from datetime import datetime, timedelta
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from typing import Dict, List, Optional, Any, Callable
-from dataclasses import dataclass, asdict
+from typing import Dict, List, Optional, Any, Callable, Tuple
+from dataclasses import dataclass, field, asdict
 from enum import Enum
 import aiohttp
+import msgspec
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 
-from ..core.database import get_db
+from ..core.config import settings
+from ..core.database import get_db, WriteBehindQueue
 from ..models.database import AlertRule, AlertHistory
-from ..models.schemas import AlertRuleCreate, AlertRuleUpdate
+from ..models.schemas import AlertRuleCreate, AlertRuleUpdate, CONDITION_OPERATORS
+from ..models.enums import NotificationChannelFlag
 from ..utils.logging import get_structured_logger, EventType
 
 logger = get_structured_logger(__name__)
 
+# 预先构造的插入语句，热路径复用同一对象以命中编译缓存
+INSERT_ALERT_HISTORY = insert(AlertHistory.__table__)
+
+# 告警历史后写队列，告警评估路径不等待数据库写入
+alert_history_writer = WriteBehindQueue(INSERT_ALERT_HISTORY, name="alert_history")
+
+# 通知请求体编码器：直接编码告警dataclass、枚举和datetime，不再先转换为字典和ISO字符串
+notification_encoder = msgspec.json.Encoder()
+
+# 每个指标保留的历史样本上限（按1秒评估一次约1小时），评估频率异常升高时也不会无限增长
+METRIC_HISTORY_MAXLEN = 3600
+
+# 通知去重表的条目上限，告警风暴时按最早到期的顺序淘汰
+NOTIFICATION_DEDUP_MAXSIZE = 4096
+
+# 告警规则快照的最长复用时间（秒）。本进程的规则增删改会立即置空快照；
+# 多worker部署时其他进程的规则变更在快照到期重新加载后生效
+RULES_SNAPSHOT_MAX_AGE = 60
+
 class AlertSeverity(Enum):
     """告警严重程度"""
     LOW = "low"
@@ -41,6 +67,10 @@ class NotificationChannel(Enum):
     SLACK = "slack"
     DINGTALK = "dingtalk"
 
+def _never_matches(value: float, threshold: float) -> bool:
+    """未知操作符的比较函数"""
+    return False
+
 @dataclass
 class AlertCondition:
     """告警条件"""
@@ -49,27 +79,18 @@ class AlertCondition:
     threshold: float  # 阈值
     duration: int  # 持续时间（秒）
     
+    def __post_init__(self):
+        # 构造时绑定比较函数，评估时无需再按操作符分派；未知操作符绑定为恒不满足，
+        # 每个样本不再额外判断比较函数是否存在
+        self._compare = CONDITION_OPERATORS.get(self.operator, _never_matches)
+    
+    def matches(self, value: float) -> bool:
+        """检查指标值是否满足阈值条件"""
+        return self._compare(value, self.threshold)
+    
     def evaluate(self, value: float, duration: int) -> bool:
-        """评估告警条件"""
-        # 检查持续时间
-        if duration < self.duration:
-            return False
-            
-        # 检查阈值条件
-        if self.operator == ">":
-            return value > self.threshold
-        elif self.operator == "<":
-            return value < self.threshold
-        elif self.operator == ">=":
-            return value >= self.threshold
-        elif self.operator == "<=":
-            return value <= self.threshold
-        elif self.operator == "==":
-            return value == self.threshold
-        elif self.operator == "!=":
-            return value != self.threshold
-        else:
-            return False
+        """评估告警条件：持续时间足够且满足阈值条件"""
+        return duration >= self.duration and self._compare(value, self.threshold)
 
 @dataclass
 class Alert:
@@ -100,16 +121,259 @@ class Alert:
             "status": self.status.value
         }
 
+@dataclass(frozen=True)
+class NotificationTarget:
+    """规则的一个通知目标：渠道、发送器及该渠道配置，在规则变更后构造一次"""
+    channel: str
+    sender: "NotificationSender"
+    config: Dict[str, Any]
+
+class ActiveAlerts(dict):
+    """活跃告警表（告警键 -> 告警），同时维护告警ID到告警键的索引，按ID查找为O(1)"""
+    
+    def __init__(self):
+        super().__init__()
+        self._keys_by_id: Dict[str, str] = {}
+    
+    def __setitem__(self, alert_key: str, alert: Alert):
+        previous = self.get(alert_key)
+        if previous is not None:
+            self._keys_by_id.pop(previous.id, None)
+        super().__setitem__(alert_key, alert)
+        self._keys_by_id[alert.id] = alert_key
+    
+    def __delitem__(self, alert_key: str):
+        alert = self[alert_key]
+        super().__delitem__(alert_key)
+        self._keys_by_id.pop(alert.id, None)
+    
+    def pop(self, alert_key: str, *default):
+        if alert_key in self:
+            alert = self[alert_key]
+            del self[alert_key]
+            return alert
+        return super().pop(alert_key, *default)
+    
+    def clear(self):
+        super().clear()
+        self._keys_by_id.clear()
+    
+    def key_for(self, alert_id: str) -> Optional[str]:
+        """按告警ID获取告警键"""
+        return self._keys_by_id.get(alert_id)
+
 class NotificationSender:
-    """通知发送器基类"""
+    """通知发送器基类
+    
+    HTTP类发送器共用一个带连接池的会话，告警之间复用keep-alive连接，
+    不再每次发送都重新建立TCP/TLS连接。会话在首次发送时创建，服务关闭时释放。
+    """
+    
+    _session: Optional[aiohttp.ClientSession] = None
+    _session_lock = asyncio.Lock()
+    
+    @staticmethod
+    async def get_session() -> aiohttp.ClientSession:
+        """获取共享的HTTP会话"""
+        if NotificationSender._session is None or NotificationSender._session.closed:
+            async with NotificationSender._session_lock:
+                if NotificationSender._session is None or NotificationSender._session.closed:
+                    NotificationSender._session = aiohttp.ClientSession(
+                        connector=aiohttp.TCPConnector(
+                            limit=100, limit_per_host=20, keepalive_timeout=30, ttl_dns_cache=300
+                        )
+                    )
+        return NotificationSender._session
+    
+    @staticmethod
+    async def close_session():
+        """关闭共享的HTTP会话"""
+        session, NotificationSender._session = NotificationSender._session, None
+        if session is not None and not session.closed:
+            await session.close()
     
     async def send(self, alert: Alert, config: Dict[str, Any]) -> bool:
         """发送通知"""
         raise NotImplementedError
 
+@dataclass
+class _PooledSMTPConnection:
+    """连接池中已登录的SMTP连接"""
+    server: smtplib.SMTP
+    sent: int = 0
+    last_used: float = field(default_factory=time.monotonic)
+
+class SMTPConnectionPool:
+    """SMTP连接池
+    
+    按(服务器, 端口, 用户名)复用已完成STARTTLS和登录的连接，告警风暴时不再每封邮件
+    重新握手认证；每个服务器的并发连接数受max_size限制，发送速率由令牌桶限制在
+    max_rate封/秒以内。连接发送messages_per_connection封后重建，空闲超过
+    idle_timeout秒的连接在下次取用时关闭。smtplib为阻塞调用，均在线程中执行。
+    """
+    
+    def __init__(self, max_size: int = 4, messages_per_connection: int = 5000,
+                 max_rate: float = 10.0, idle_timeout: float = 60.0, timeout: float = 30.0):
+        self.max_size = max_size
+        self.messages_per_connection = messages_per_connection
+        self.max_rate = max_rate
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self._idle: Dict[Tuple[str, int, str], List[_PooledSMTPConnection]] = defaultdict(list)
+        self._slots: Dict[Tuple[str, int, str], asyncio.Semaphore] = {}
+        self._tokens = max(1.0, max_rate)
+        self._tokens_updated = time.monotonic()
+        self._rate_lock = asyncio.Lock()
+    
+    async def send(self, msg: MIMEMultipart, smtp_server: str, smtp_port: int,
+                   username: str, password: str):
+        """通过池中的连接发送邮件"""
+        key = (smtp_server, smtp_port, username)
+        slots = self._slots.setdefault(key, asyncio.Semaphore(self.max_size))
+        
+        async with slots:
+            await self._acquire_token()
+            conn = await self._take_idle(key)
+            reused = conn is not None
+            if conn is None:
+                conn = await self._connect(smtp_server, smtp_port, username, password)
+            
+            try:
+                await self._send_on(conn, msg)
+            except smtplib.SMTPServerDisconnected:
+                # 复用的连接可能已被服务器关闭，重新连接后重试一次
+                if not reused:
+                    raise
+                conn = await self._connect(smtp_server, smtp_port, username, password)
+                await self._send_on(conn, msg)
+            
+            conn.sent += 1
+            conn.last_used = time.monotonic()
+            if conn.sent >= self.messages_per_connection:
+                await asyncio.to_thread(self._quit, conn.server)
+            else:
+                self._idle[key].append(conn)
+    
+    async def close(self):
+        """关闭所有空闲连接"""
+        connections = [conn for idle in self._idle.values() for conn in idle]
+        self._idle.clear()
+        for conn in connections:
+            await asyncio.to_thread(self._quit, conn.server)
+    
+    async def _acquire_token(self):
+        """按令牌桶限制发送速率"""
+        async with self._rate_lock:
+            now = time.monotonic()
+            capacity = max(1.0, self.max_rate)
+            self._tokens = min(capacity, self._tokens + (now - self._tokens_updated) * self.max_rate)
+            self._tokens_updated = now
+            if self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.max_rate)
+                self._tokens = 1.0
+                self._tokens_updated = time.monotonic()
+            self._tokens -= 1
+    
+    async def _send_on(self, conn: _PooledSMTPConnection, msg: MIMEMultipart):
+        """在指定连接上发送，失败时关闭该连接"""
+        try:
+            await asyncio.to_thread(conn.server.send_message, msg)
+        except Exception:
+            await asyncio.to_thread(self._quit, conn.server)
+            raise
+    
+    async def _take_idle(self, key: Tuple[str, int, str]) -> Optional[_PooledSMTPConnection]:
+        """取出一个未过期的空闲连接，过期连接直接关闭"""
+        idle = self._idle.get(key)
+        while idle:
+            conn = idle.pop()
+            if time.monotonic() - conn.last_used <= self.idle_timeout:
+                return conn
+            await asyncio.to_thread(self._quit, conn.server)
+        return None
+    
+    async def _connect(self, smtp_server: str, smtp_port: int,
+                       username: str, password: str) -> _PooledSMTPConnection:
+        """建立连接并完成STARTTLS和登录"""
+        def connect() -> smtplib.SMTP:
+            server = smtplib.SMTP(smtp_server, smtp_port, timeout=self.timeout)
+            try:
+                server.starttls()
+                server.login(username, password)
+            except Exception:
+                self._quit(server)
+                raise
+            return server
+        
+        return _PooledSMTPConnection(await asyncio.to_thread(connect))
+    
+    @staticmethod
+    def _quit(server: smtplib.SMTP):
+        """关闭连接，忽略已断开的连接"""
+        try:
+            server.quit()
+        except Exception:
+            server.close()
+
+# 邮件告警共用的SMTP连接池
+smtp_pool = SMTPConnectionPool(
+    max_size=settings.smtp_pool_size,
+    messages_per_connection=settings.smtp_messages_per_connection,
+    max_rate=settings.smtp_max_rate,
+    idle_timeout=settings.smtp_idle_timeout,
+)
+
+# 邮件正文模板，颜色和严重程度文本在导入时按严重程度填入，发送时只替换告警字段
+EMAIL_BODY_TEMPLATE = """
+        <html>
+        <body>
+            <h2 style="color: {color};">告警通知</h2>
+            <table border="1" cellpadding="5" cellspacing="0">
+                <tr><td><strong>告警规则</strong></td><td>$rule_name</td></tr>
+                <tr><td><strong>严重程度</strong></td><td style="color: {color};">{severity}</td></tr>
+                <tr><td><strong>告警消息</strong></td><td>$message</td></tr>
+                <tr><td><strong>开始时间</strong></td><td>$starts_at</td></tr>
+                <tr><td><strong>状态</strong></td><td>$status</td></tr>
+            </table>
+            
+            <h3>标签信息</h3>
+            <table border="1" cellpadding="5" cellspacing="0">
+                $label_rows
+            </table>
+            
+            <h3>注释信息</h3>
+            <table border="1" cellpadding="5" cellspacing="0">
+                $annotation_rows
+            </table>
+            
+            <p><small>此邮件由LLM推理服务告警系统自动发送</small></p>
+        </body>
+        </html>
+        """
+
+EMAIL_SEVERITY_COLORS = {
+    AlertSeverity.LOW: "#28a745",
+    AlertSeverity.MEDIUM: "#ffc107",
+    AlertSeverity.HIGH: "#fd7e14",
+    AlertSeverity.CRITICAL: "#dc3545"
+}
+
+EMAIL_TEMPLATES: Dict[AlertSeverity, string.Template] = {
+    severity: string.Template(EMAIL_BODY_TEMPLATE.format(color=color, severity=severity.value.upper()))
+    for severity, color in EMAIL_SEVERITY_COLORS.items()
+}
+_DEFAULT_EMAIL_TEMPLATE = string.Template(EMAIL_BODY_TEMPLATE.format(color="#6c757d", severity=""))
+
+def _table_rows(items: Dict[str, str]) -> str:
+    """将键值对渲染为HTML表格行"""
+    return "".join(f"<tr><td>{k}</td><td>{v}</td></tr>" for k, v in items.items())
+
 class EmailNotificationSender(NotificationSender):
     """邮件通知发送器"""
     
+    def __init__(self, pool: Optional[SMTPConnectionPool] = None):
+        self.pool = pool or smtp_pool
+    
     async def send(self, alert: Alert, config: Dict[str, Any]) -> bool:
         """发送邮件通知"""
         try:
@@ -134,11 +398,8 @@ class EmailNotificationSender(NotificationSender):
             body = self._create_email_body(alert)
             msg.attach(MIMEText(body, 'html', 'utf-8'))
             
-            # 发送邮件
-            with smtplib.SMTP(smtp_server, smtp_port) as server:
-                server.starttls()
-                server.login(username, password)
-                server.send_message(msg)
+            # 通过连接池发送，复用已登录的连接并限制发送速率
+            await self.pool.send(msg, smtp_server, smtp_port, username, password)
             
             logger.info(f"邮件告警发送成功: {alert.rule_name}", 
                        extra_data={"alert_id": alert.id, "recipients": to_emails})
@@ -151,41 +412,14 @@ class EmailNotificationSender(NotificationSender):
     
     def _create_email_body(self, alert: Alert) -> str:
         """创建邮件正文"""
-        severity_colors = {
-            AlertSeverity.LOW: "#28a745",
-            AlertSeverity.MEDIUM: "#ffc107", 
-            AlertSeverity.HIGH: "#fd7e14",
-            AlertSeverity.CRITICAL: "#dc3545"
-        }
-        
-        color = severity_colors.get(alert.severity, "#6c757d")
-        
-        return f"""
-        <html>
-        <body>
-            <h2 style="color: {color};">告警通知</h2>
-            <table border="1" cellpadding="5" cellspacing="0">
-                <tr><td><strong>告警规则</strong></td><td>{alert.rule_name}</td></tr>
-                <tr><td><strong>严重程度</strong></td><td style="color: {color};">{alert.severity.value.upper()}</td></tr>
-                <tr><td><strong>告警消息</strong></td><td>{alert.message}</td></tr>
-                <tr><td><strong>开始时间</strong></td><td>{alert.starts_at.strftime('%Y-%m-%d %H:%M:%S')}</td></tr>
-                <tr><td><strong>状态</strong></td><td>{alert.status.value}</td></tr>
-            </table>
-            
-            <h3>标签信息</h3>
-            <table border="1" cellpadding="5" cellspacing="0">
-                {"".join(f"<tr><td>{k}</td><td>{v}</td></tr>" for k, v in alert.labels.items())}
-            </table>
-            
-            <h3>注释信息</h3>
-            <table border="1" cellpadding="5" cellspacing="0">
-                {"".join(f"<tr><td>{k}</td><td>{v}</td></tr>" for k, v in alert.annotations.items())}
-            </table>
-            
-            <p><small>此邮件由LLM推理服务告警系统自动发送</small></p>
-        </body>
-        </html>
-        """
+        return EMAIL_TEMPLATES.get(alert.severity, _DEFAULT_EMAIL_TEMPLATE).substitute(
+            rule_name=alert.rule_name,
+            message=alert.message,
+            starts_at=alert.starts_at.strftime('%Y-%m-%d %H:%M:%S'),
+            status=alert.status.value,
+            label_rows=_table_rows(alert.labels),
+            annotation_rows=_table_rows(alert.annotations)
+        )
 
 class WebhookNotificationSender(NotificationSender):
     """Webhook通知发送器"""
@@ -203,33 +437,48 @@ class WebhookNotificationSender(NotificationSender):
             
             # 准备请求数据
             payload = {
-                "alert": alert.to_dict(),
-                "timestamp": datetime.now().isoformat(),
+                "alert": alert,
+                "timestamp": datetime.now(),
                 "source": "llm-inference-service"
             }
             
             # 发送HTTP请求
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    url, 
-                    json=payload, 
-                    headers=headers,
-                    timeout=aiohttp.ClientTimeout(total=timeout)
-                ) as response:
-                    if response.status == 200:
-                        logger.info(f"Webhook告警发送成功: {alert.rule_name}",
-                                   extra_data={"alert_id": alert.id, "url": url})
-                        return True
-                    else:
-                        logger.error(f"Webhook告警发送失败: HTTP {response.status}",
-                                    extra_data={"alert_id": alert.id, "url": url})
-                        return False
+            session = await self.get_session()
+            async with session.post(
+                url, 
+                data=notification_encoder.encode(payload), 
+                headers={**headers, "Content-Type": "application/json"},
+                timeout=aiohttp.ClientTimeout(total=timeout)
+            ) as response:
+                if response.status == 200:
+                    logger.info(f"Webhook告警发送成功: {alert.rule_name}",
+                               extra_data={"alert_id": alert.id, "url": url})
+                    return True
+                else:
+                    logger.error(f"Webhook告警发送失败: HTTP {response.status}",
+                                extra_data={"alert_id": alert.id, "url": url})
+                    return False
                         
         except Exception as e:
             logger.error(f"Webhook告警发送失败: {e}",
                         extra_data={"alert_id": alert.id, "error": str(e)})
             return False
 
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+SLACK_SEVERITY_COLORS = {
+    AlertSeverity.LOW: "good",
+    AlertSeverity.MEDIUM: "warning",
+    AlertSeverity.HIGH: "danger",
+    AlertSeverity.CRITICAL: "danger"
+}
+
+# 严重程度 -> (消息颜色, 严重程度字段)，各条消息共用且不修改
+SLACK_SEVERITY_ATTACHMENTS: Dict[AlertSeverity, Tuple[str, Dict[str, Any]]] = {
+    severity: (color, {"title": "严重程度", "value": severity.value.upper(), "short": True})
+    for severity, color in SLACK_SEVERITY_COLORS.items()
+}
+
 class SlackNotificationSender(NotificationSender):
     """Slack通知发送器"""
     
@@ -244,8 +493,8 @@ class SlackNotificationSender(NotificationSender):
                 logger.error("Slack Webhook URL未配置")
                 return False
             
-            # 创建Slack消息
-            color = self._get_slack_color(alert.severity)
+            # 创建Slack消息，颜色和严重程度字段取导入时按严重程度构造好的对象
+            color, severity_field = SLACK_SEVERITY_ATTACHMENTS[alert.severity]
             
             payload = {
                 "channel": channel,
@@ -255,7 +504,7 @@ class SlackNotificationSender(NotificationSender):
                     "title": f"告警: {alert.rule_name}",
                     "text": alert.message,
                     "fields": [
-                        {"title": "严重程度", "value": alert.severity.value.upper(), "short": True},
+                        severity_field,
                         {"title": "状态", "value": alert.status.value, "short": True},
                         {"title": "开始时间", "value": alert.starts_at.strftime('%Y-%m-%d %H:%M:%S'), "short": True}
                     ],
@@ -265,16 +514,17 @@ class SlackNotificationSender(NotificationSender):
             }
             
             # 发送到Slack
-            async with aiohttp.ClientSession() as session:
-                async with session.post(webhook_url, json=payload) as response:
-                    if response.status == 200:
-                        logger.info(f"Slack告警发送成功: {alert.rule_name}",
-                                   extra_data={"alert_id": alert.id})
-                        return True
-                    else:
-                        logger.error(f"Slack告警发送失败: HTTP {response.status}",
-                                    extra_data={"alert_id": alert.id})
-                        return False
+            session = await self.get_session()
+            async with session.post(webhook_url, data=notification_encoder.encode(payload),
+                                    headers=JSON_HEADERS) as response:
+                if response.status == 200:
+                    logger.info(f"Slack告警发送成功: {alert.rule_name}",
+                               extra_data={"alert_id": alert.id})
+                    return True
+                else:
+                    logger.error(f"Slack告警发送失败: HTTP {response.status}",
+                                extra_data={"alert_id": alert.id})
+                    return False
                         
         except Exception as e:
             logger.error(f"Slack告警发送失败: {e}",
@@ -283,48 +533,66 @@ class SlackNotificationSender(NotificationSender):
     
     def _get_slack_color(self, severity: AlertSeverity) -> str:
         """获取Slack消息颜色"""
-        colors = {
-            AlertSeverity.LOW: "good",
-            AlertSeverity.MEDIUM: "warning",
-            AlertSeverity.HIGH: "danger",
-            AlertSeverity.CRITICAL: "danger"
-        }
-        return colors.get(severity, "good")
+        return SLACK_SEVERITY_COLORS.get(severity, "good")
 
 class AlertingService:
     """告警服务"""
     
     def __init__(self):
-        self.active_alerts: Dict[str, Alert] = {}
+        self.active_alerts = ActiveAlerts()
         self.notification_senders = {
             NotificationChannel.EMAIL: EmailNotificationSender(),
             NotificationChannel.WEBHOOK: WebhookNotificationSender(),
             NotificationChannel.SLACK: SlackNotificationSender()
         }
-        self.metric_history: Dict[str, List[tuple]] = {}  # (timestamp, value)
+        self.metric_history: Dict[str, deque] = {}  # (timestamp, value)，按时间递增
+        # 规则ID -> (规则更新时间, 已编译条件)，评估时按更新时间判断是否需要重新编译
+        self._condition_cache: Dict[str, Tuple[float, AlertCondition]] = {}
+        # 规则ID -> (规则更新时间, 连续满足条件的起始时间, 最近一次评估的样本时间)
+        self._match_streaks: Dict[str, Tuple[float, datetime, datetime]] = {}
+        # 规则ID -> (规则更新时间, 通知目标)，发送通知时不再逐个解析渠道名和配置
+        self._notification_targets: Dict[str, Tuple[float, Tuple[NotificationTarget, ...]]] = {}
+        # 启用的告警规则快照（指标名 -> 规则列表），本进程增删改规则时置空，下次评估时重新加载
+        self._rules_by_metric: Optional[Dict[str, List[AlertRule]]] = None
+        # 快照加载时间(monotonic)；快照代数在每次置空时递增，加载期间规则有变更则不复用加载结果
+        self._rules_loaded_at = 0.0
+        self._rules_generation = 0
+        # 告警键 -> 解除抑制定时任务，同一告警只保留最近一次抑制的定时器
+        self._suppress_timers: Dict[str, asyncio.Task] = {}
+        # 通知去重键 -> 去重到期时间(monotonic)，按到期时间递增排列
+        self._notification_dedup: "OrderedDict[str, float]" = OrderedDict()
         
-    async def create_alert_rule(self, rule_data: AlertRuleCreate, db: Session) -> AlertRule:
+    async def create_alert_rule(self, rule_data: AlertRuleCreate, db: Session,
+                                rule_id: Optional[str] = None) -> AlertRule:
         """创建告警规则"""
         try:
-            # 验证告警条件
-            condition = AlertCondition(**rule_data.condition)
+            # 验证告警条件；请求体中的条件是已校验的模型，入库前转换为字典
+            condition_data = rule_data.condition.model_dump()
+            AlertCondition(**condition_data)
             
             # 创建数据库记录
             db_rule = AlertRule(
+                id=rule_id,
                 name=rule_data.name,
                 description=rule_data.description,
-                condition=rule_data.condition,
+                condition=condition_data,
                 severity=rule_data.severity,
                 enabled=rule_data.enabled,
                 notification_channels=rule_data.notification_channels,
-                notification_config=rule_data.notification_config,
+                notification_channel_mask=int(NotificationChannelFlag.from_names(rule_data.notification_channels)),
+                notification_config=rule_data.notification_config.model_dump(exclude_none=True),
                 labels=rule_data.labels or {},
                 annotations=rule_data.annotations or {}
             )
             
-            db.add(db_rule)
-            db.commit()
-            db.refresh(db_rule)
+            def save():
+                db.add(db_rule)
+                db.commit()
+                db.refresh(db_rule)
+            
+            # 同步会话的提交在线程中执行，不阻塞事件循环上的告警评估和通知发送
+            await asyncio.to_thread(save)
+            self._invalidate_rules_snapshot()
             
             logger.info(f"告警规则创建成功: {rule_data.name}",
                        event_type=EventType.CONFIGURATION,
@@ -335,22 +603,31 @@ class AlertingService:
         except Exception as e:
             logger.error(f"创建告警规则失败: {e}",
                         extra_data={"rule_name": rule_data.name, "error": str(e)})
-            db.rollback()
+            await asyncio.to_thread(db.rollback)
             raise
     
     async def update_alert_rule(self, rule_id: str, rule_data: AlertRuleUpdate, db: Session) -> Optional[AlertRule]:
         """更新告警规则"""
-        try:
+        def update() -> Optional[AlertRule]:
             db_rule = db.query(AlertRule).filter(AlertRule.id == rule_id).first()
             if not db_rule:
                 return None
             
             # 更新字段
-            for field, value in rule_data.dict(exclude_unset=True).items():
-                setattr(db_rule, field, value)
+            for field_name, value in rule_data.model_dump(exclude_unset=True).items():
+                setattr(db_rule, field_name, value)
+                if field_name == "notification_channels":
+                    db_rule.notification_channel_mask = int(NotificationChannelFlag.from_names(value))
             
             db.commit()
             db.refresh(db_rule)
+            return db_rule
+        
+        try:
+            db_rule = await asyncio.to_thread(update)
+            if not db_rule:
+                return None
+            self._invalidate_rule(rule_id)
             
             logger.info(f"告警规则更新成功: {db_rule.name}",
                        event_type=EventType.CONFIGURATION,
@@ -361,18 +638,23 @@ class AlertingService:
         except Exception as e:
             logger.error(f"更新告警规则失败: {e}",
                         extra_data={"rule_id": rule_id, "error": str(e)})
-            db.rollback()
+            await asyncio.to_thread(db.rollback)
             raise
     
     async def delete_alert_rule(self, rule_id: str, db: Session) -> bool:
         """删除告警规则"""
-        try:
+        def delete() -> Optional[AlertRule]:
             db_rule = db.query(AlertRule).filter(AlertRule.id == rule_id).first()
+            if db_rule:
+                db.delete(db_rule)
+                db.commit()
+            return db_rule
+        
+        try:
+            db_rule = await asyncio.to_thread(delete)
             if not db_rule:
                 return False
-            
-            db.delete(db_rule)
-            db.commit()
+            self._invalidate_rule(rule_id)
             
             logger.info(f"告警规则删除成功: {db_rule.name}",
                        event_type=EventType.CONFIGURATION,
@@ -383,53 +665,108 @@ class AlertingService:
         except Exception as e:
             logger.error(f"删除告警规则失败: {e}",
                         extra_data={"rule_id": rule_id, "error": str(e)})
-            db.rollback()
+            await asyncio.to_thread(db.rollback)
             raise
     
+    def _invalidate_rule(self, rule_id: str):
+        """规则变更后丢弃该规则的缓存和规则快照"""
+        self._condition_cache.pop(rule_id, None)
+        self._match_streaks.pop(rule_id, None)
+        self._notification_targets.pop(rule_id, None)
+        self._invalidate_rules_snapshot()
+    
+    def _invalidate_rules_snapshot(self):
+        """置空启用规则快照，下次评估时重新加载"""
+        self._rules_by_metric = None
+        self._rules_generation += 1
+    
     async def evaluate_metrics(self, metrics: Dict[str, float], db: Session):
         """评估指标并触发告警"""
         current_time = datetime.now()
         
         # 更新指标历史
+        cutoff_time = current_time - timedelta(hours=1)
         for metric_name, value in metrics.items():
-            if metric_name not in self.metric_history:
-                self.metric_history[metric_name] = []
+            history = self.metric_history.get(metric_name)
+            if history is None:
+                history = self.metric_history[metric_name] = deque(maxlen=METRIC_HISTORY_MAXLEN)
             
-            self.metric_history[metric_name].append((current_time, value))
+            history.append((current_time, value))
             
-            # 保留最近1小时的数据
-            cutoff_time = current_time - timedelta(hours=1)
-            self.metric_history[metric_name] = [
-                (ts, val) for ts, val in self.metric_history[metric_name]
-                if ts > cutoff_time
-            ]
+            # 保留最近1小时的数据；时间戳递增，只需从队头弹出过期数据
+            while history and history[0][0] <= cutoff_time:
+                history.popleft()
         
-        # 获取启用的告警规则
-        alert_rules = db.query(AlertRule).filter(AlertRule.enabled == True).all()
+        # 只评估本次上报了对应指标的规则
+        rules_by_metric = await self._get_rules_by_metric(db)
+        for metric_name, value in metrics.items():
+            for rule in rules_by_metric.get(metric_name, ()):
+                try:
+                    await self._evaluate_rule(rule, value, current_time, db)
+                except Exception as e:
+                    logger.error(f"评估告警规则失败: {rule.name} - {e}",
+                                extra_data={"rule_id": rule.id, "error": str(e)})
+    
+    async def _get_rules_by_metric(self, db: Session) -> Dict[str, List[AlertRule]]:
+        """获取按指标名分组的启用告警规则，快照未过期时直接复用，评估时不查询数据库
         
-        for rule in alert_rules:
-            try:
-                await self._evaluate_rule(rule, metrics, current_time, db)
-            except Exception as e:
-                logger.error(f"评估告警规则失败: {rule.name} - {e}",
-                            extra_data={"rule_id": rule.id, "error": str(e)})
+        本进程增删改规则时快照立即置空；其他worker进程的变更在快照超过RULES_SNAPSHOT_MAX_AGE后
+        重新加载时生效。加载在工作线程中执行，不阻塞事件循环。
+        """
+        now = time.monotonic()
+        if self._rules_by_metric is not None and now - self._rules_loaded_at < RULES_SNAPSHOT_MAX_AGE:
+            return self._rules_by_metric
+        
+        def load() -> List[AlertRule]:
+            rules = db.query(AlertRule).filter(AlertRule.enabled == True).all()
+            for rule in rules:
+                # 从会话中分离，快照不受该会话后续提交或关闭的影响
+                db.expunge(rule)
+            return rules
+        
+        generation = self._rules_generation
+        rules = await asyncio.to_thread(load)
+        
+        rules_by_metric: Dict[str, List[AlertRule]] = defaultdict(list)
+        for rule in rules:
+            rules_by_metric[(rule.condition or {}).get("metric")].append(rule)
+        
+        # 其他进程可能在同一秒内修改了规则而更新时间不变，重新加载时一并丢弃按更新时间缓存的条件和通知目标；
+        # 已不再启用的规则的连续满足记录随之清理
+        rule_ids = {rule.id for rule in rules}
+        self._condition_cache.clear()
+        self._notification_targets.clear()
+        for rule_id in self._match_streaks.keys() - rule_ids:
+            del self._match_streaks[rule_id]
+        
+        self._rules_by_metric = dict(rules_by_metric)
+        # 加载期间本进程修改了规则时，本次结果只用于当前评估，下次评估重新加载
+        self._rules_loaded_at = now if generation == self._rules_generation else float("-inf")
+        return self._rules_by_metric
     
-    async def _evaluate_rule(self, rule: AlertRule, metrics: Dict[str, float], 
+    def _get_condition(self, rule: AlertRule) -> AlertCondition:
+        """获取规则的已编译条件，规则未更新时直接复用，条件只缓存在本服务实例上"""
+        updated_at_ts = rule.updated_at.timestamp() if rule.updated_at else 0.0
+        cached = self._condition_cache.get(rule.id)
+        if cached is not None and cached[0] == updated_at_ts:
+            return cached[1]
+        
+        condition = AlertCondition(**rule.condition)
+        self._condition_cache[rule.id] = (updated_at_ts, condition)
+        return condition
+    
+    async def _evaluate_rule(self, rule: AlertRule, current_value: float, 
                            current_time: datetime, db: Session):
         """评估单个告警规则"""
-        condition = AlertCondition(**rule.condition)
+        condition = self._get_condition(rule)
         metric_name = condition.metric
         
-        if metric_name not in metrics:
-            return
-        
-        current_value = metrics[metric_name]
-        
-        # 计算指标持续时间
-        duration = self._calculate_metric_duration(metric_name, condition, current_time)
-        
-        # 评估告警条件
-        should_alert = condition.evaluate(current_value, duration)
+        # 评估告警条件；当前值不满足阈值时无需计算持续时间
+        if condition.matches(current_value):
+            should_alert = self._rule_match_duration(rule, condition, current_time) >= condition.duration
+        else:
+            self._match_streaks.pop(rule.id, None)
+            should_alert = False
         alert_key = f"{rule.id}_{metric_name}"
         
         if should_alert and alert_key not in self.active_alerts:
@@ -451,7 +788,8 @@ class AlertingService:
             await self._save_alert_history(alert, db)
             
             # 发送通知
-            await self._send_notifications(alert, rule.notification_channels, rule.notification_config)
+            if self._should_notify(rule, metric_name, current_value, alert.status):
+                await self._send_notifications(alert, self._get_notification_targets(rule))
             
             logger.warning(f"告警触发: {rule.name}",
                           event_type=EventType.SYSTEM_ERROR,
@@ -472,7 +810,8 @@ class AlertingService:
             await self._update_alert_history(alert, db)
             
             # 发送解决通知
-            await self._send_notifications(alert, rule.notification_channels, rule.notification_config)
+            if self._should_notify(rule, metric_name, current_value, alert.status):
+                await self._send_notifications(alert, self._get_notification_targets(rule))
             
             del self.active_alerts[alert_key]
             
@@ -480,90 +819,153 @@ class AlertingService:
                        event_type=EventType.SYSTEM_ERROR,
                        extra_data={"alert_id": alert.id})
     
-    def _calculate_metric_duration(self, metric_name: str, condition: AlertCondition, 
-                                 current_time: datetime) -> int:
-        """计算指标满足条件的持续时间"""
-        if metric_name not in self.metric_history:
-            return 0
+    def _rule_match_duration(self, rule: AlertRule, condition: AlertCondition,
+                             current_time: datetime) -> int:
+        """计算规则指标满足条件的持续时间
         
-        history = self.metric_history[metric_name]
+        记录每条规则当前连续满足条件的起始时间；自上次评估以来只新增了满足条件的样本时
+        直接沿用，指标平稳时不再每次从尾部回扫历史。
+        """
+        history = self.metric_history.get(condition.metric)
         if not history:
+            self._match_streaks.pop(rule.id, None)
             return 0
         
-        # 从最新时间向前查找连续满足条件的时间
-        duration = 0
-        for i in range(len(history) - 1, -1, -1):
-            timestamp, value = history[i]
-            
-            # 检查是否满足条件
-            if condition.operator == ">" and value > condition.threshold:
-                duration = int((current_time - timestamp).total_seconds())
-            elif condition.operator == "<" and value < condition.threshold:
-                duration = int((current_time - timestamp).total_seconds())
-            elif condition.operator == ">=" and value >= condition.threshold:
-                duration = int((current_time - timestamp).total_seconds())
-            elif condition.operator == "<=" and value <= condition.threshold:
-                duration = int((current_time - timestamp).total_seconds())
-            elif condition.operator == "==" and value == condition.threshold:
-                duration = int((current_time - timestamp).total_seconds())
-            elif condition.operator == "!=" and value != condition.threshold:
-                duration = int((current_time - timestamp).total_seconds())
-            else:
-                break
+        updated_at_ts = rule.updated_at.timestamp() if rule.updated_at else 0.0
+        latest_timestamp, latest_value = history[-1]
+        streak = self._match_streaks.get(rule.id)
+        if (streak is not None and streak[0] == updated_at_ts and condition.matches(latest_value)
+                and (streak[2] == latest_timestamp
+                     or (len(history) > 1 and history[-2][0] == streak[2]))):
+            # 起始样本可能已被移出历史窗口，与完整回扫的结果保持一致
+            since = max(streak[1], history[0][0])
+        else:
+            since = self._matching_since(history, condition)
         
-        return duration
+        if since is None:
+            self._match_streaks.pop(rule.id, None)
+            return 0
+        
+        self._match_streaks[rule.id] = (updated_at_ts, since, latest_timestamp)
+        return int((current_time - since).total_seconds())
+    
+    @staticmethod
+    def _matching_since(history: deque, condition: AlertCondition) -> Optional[datetime]:
+        """从最新样本向前查找连续满足条件的最早时间点，遇到不满足条件的值即停止"""
+        # 比较函数和阈值提到循环外，逐个样本只做一次函数调用
+        compare, threshold = condition._compare, condition.threshold
+        since = None
+        for timestamp, value in reversed(history):
+            if not compare(value, threshold):
+                break
+            since = timestamp
+        return since
     
     async def _save_alert_history(self, alert: Alert, db: Session):
-        """保存告警历史"""
-        try:
-            history = AlertHistory(
-                alert_id=alert.id,
-                rule_id=alert.rule_id,
-                rule_name=alert.rule_name,
-                severity=alert.severity.value,
-                message=alert.message,
-                labels=alert.labels,
-                annotations=alert.annotations,
-                starts_at=alert.starts_at,
-                status=alert.status.value
-            )
-            
-            db.add(history)
-            db.commit()
-            
-        except Exception as e:
-            logger.error(f"保存告警历史失败: {e}",
-                        extra_data={"alert_id": alert.id, "error": str(e)})
-            db.rollback()
+        """保存告警历史（放入后写队列，由后台任务批量写入）
+        
+        严重告警在返回前立即写出队列，确保发送通知前历史已落库。
+        """
+        alert_history_writer.enqueue({
+            "alert_id": alert.id,
+            "rule_id": alert.rule_id,
+            "rule_name": alert.rule_name,
+            "severity": alert.severity.value,
+            "message": alert.message,
+            "labels": alert.labels,
+            "annotations": alert.annotations,
+            "starts_at": alert.starts_at,
+            "status": alert.status.value
+        })
+        if alert.severity == AlertSeverity.CRITICAL:
+            await alert_history_writer.flush()
     
     async def _update_alert_history(self, alert: Alert, db: Session):
         """更新告警历史"""
         try:
-            history = db.query(AlertHistory).filter(AlertHistory.alert_id == alert.id).first()
-            if history:
-                history.status = alert.status.value
-                history.ends_at = alert.ends_at
-                db.commit()
+            # 先写入队列中尚未落库的告警历史，确保待更新的行已存在
+            await alert_history_writer.flush()
+            
+            def update():
+                history = db.query(AlertHistory).filter(AlertHistory.alert_id == alert.id).first()
+                if history:
+                    history.status = alert.status.value
+                    history.ends_at = alert.ends_at
+                    db.commit()
+            
+            await asyncio.to_thread(update)
                 
         except Exception as e:
             logger.error(f"更新告警历史失败: {e}",
                         extra_data={"alert_id": alert.id, "error": str(e)})
-            db.rollback()
+            await asyncio.to_thread(db.rollback)
     
-    async def _send_notifications(self, alert: Alert, channels: List[str], config: Dict[str, Any]):
-        """发送通知"""
-        for channel_name in channels:
+    def _should_notify(self, rule: AlertRule, metric_name: str, value: float, status: AlertStatus) -> bool:
+        """判断是否发送通知：去重窗口内规则、指标、取值(保留两位小数)、严重程度和状态都相同的通知只发送一次，
+        避免告警抖动或同时越限时重复通知
+        
+        发送某个状态的通知时清除同一规则、指标其他状态的去重记录，告警触发→解除→再次触发时
+        再次触发的通知照常发送，接收方看到的最后状态与实际一致。
+        """
+        cooldown = settings.alert_notification_cooldown
+        if cooldown <= 0:
+            return True
+        
+        now = time.monotonic()
+        dedup = self._notification_dedup
+        # 去重窗口固定，按插入顺序即按到期顺序，只需从头部清理过期条目
+        while dedup and next(iter(dedup.values())) <= now:
+            dedup.popitem(last=False)
+        
+        prefix = f"{rule.id}:{metric_name}:"
+        suffix = f":{status.value}"
+        key = f"{prefix}{round(value, 2)}:{rule.severity}{suffix}"
+        if key in dedup:
+            return False
+        
+        # 状态发生变化，之前其他状态的通知不再代表当前状态，不能再用于去重
+        for stale in [k for k in dedup if k.startswith(prefix) and not k.endswith(suffix)]:
+            del dedup[stale]
+        
+        dedup[key] = now + cooldown
+        if len(dedup) > NOTIFICATION_DEDUP_MAXSIZE:
+            dedup.popitem(last=False)
+        return True
+    
+    def _build_notification_targets(self, channels: List[str],
+                                    config: Dict[str, Any]) -> Tuple[NotificationTarget, ...]:
+        """解析通知渠道和配置，跳过未知渠道和未配置的渠道"""
+        targets = []
+        for channel_name in channels or ():
             try:
-                channel = NotificationChannel(channel_name)
-                sender = self.notification_senders.get(channel)
-                
-                if sender and channel_name in config:
-                    channel_config = config[channel_name]
-                    await sender.send(alert, channel_config)
-                    
-            except Exception as e:
-                logger.error(f"发送通知失败: {channel_name} - {e}",
-                            extra_data={"alert_id": alert.id, "channel": channel_name, "error": str(e)})
+                sender = self.notification_senders.get(NotificationChannel(channel_name))
+            except ValueError:
+                logger.error(f"未知的通知渠道: {channel_name}", extra_data={"channel": channel_name})
+                continue
+            if sender and channel_name in (config or {}):
+                targets.append(NotificationTarget(channel_name, sender, config[channel_name]))
+        return tuple(targets)
+    
+    def _get_notification_targets(self, rule: AlertRule) -> Tuple[NotificationTarget, ...]:
+        """获取规则的通知目标，规则未更新时直接复用"""
+        updated_at_ts = rule.updated_at.timestamp() if rule.updated_at else 0.0
+        cached = self._notification_targets.get(rule.id)
+        if cached is not None and cached[0] == updated_at_ts:
+            return cached[1]
+        
+        targets = self._build_notification_targets(rule.notification_channels, rule.notification_config)
+        self._notification_targets[rule.id] = (updated_at_ts, targets)
+        return targets
+    
+    async def _send_notifications(self, alert: Alert, targets: Tuple[NotificationTarget, ...]):
+        """发送通知，各渠道并发发送，单个渠道失败不影响其他渠道"""
+        results = await asyncio.gather(
+            *(target.sender.send(alert, target.config) for target in targets), return_exceptions=True
+        )
+        for target, result in zip(targets, results):
+            if isinstance(result, Exception):
+                logger.error(f"发送通知失败: {target.channel} - {result}",
+                            extra_data={"alert_id": alert.id, "channel": target.channel, "error": str(result)})
     
     async def get_active_alerts(self) -> List[Alert]:
         """获取活跃告警"""
@@ -577,26 +979,37 @@ class AlertingService:
         if rule_id:
             query = query.filter(AlertHistory.rule_id == rule_id)
         
-        return query.order_by(AlertHistory.starts_at.desc()).limit(limit).all()
+        return await asyncio.to_thread(query.order_by(AlertHistory.starts_at.desc()).limit(limit).all)
     
     async def suppress_alert(self, alert_id: str, duration_minutes: int = 60):
         """抑制告警"""
-        for alert_key, alert in self.active_alerts.items():
-            if alert.id == alert_id:
-                alert.status = AlertStatus.SUPPRESSED
-                
-                # 设置定时器自动恢复
-                asyncio.create_task(self._unsuppress_alert_after_delay(alert_key, duration_minutes * 60))
-                
-                logger.info(f"告警已抑制: {alert.rule_name}",
-                           extra_data={"alert_id": alert_id, "duration_minutes": duration_minutes})
-                return True
+        alert_key = self.active_alerts.key_for(alert_id)
+        if alert_key is None:
+            return False
+        
+        alert = self.active_alerts[alert_key]
+        alert.status = AlertStatus.SUPPRESSED
         
-        return False
+        # 设置定时器自动恢复；重复抑制时取消旧定时器，避免提前恢复和任务堆积
+        old_timer = self._suppress_timers.pop(alert_key, None)
+        if old_timer is not None:
+            old_timer.cancel()
+        self._suppress_timers[alert_key] = asyncio.create_task(
+            self._unsuppress_alert_after_delay(alert_key, duration_minutes * 60)
+        )
+        
+        logger.info(f"告警已抑制: {alert.rule_name}",
+                   extra_data={"alert_id": alert_id, "duration_minutes": duration_minutes})
+        return True
     
     async def _unsuppress_alert_after_delay(self, alert_key: str, delay_seconds: int):
         """延迟后取消告警抑制"""
-        await asyncio.sleep(delay_seconds)
+        try:
+            await asyncio.sleep(delay_seconds)
+        finally:
+            # 被新的抑制替换时字典中已是新定时器，不能误删
+            if self._suppress_timers.get(alert_key) is asyncio.current_task():
+                del self._suppress_timers[alert_key]
         
         if alert_key in self.active_alerts:
             alert = self.active_alerts[alert_key]
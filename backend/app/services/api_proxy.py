@@ -2,24 +2,37 @@
 API代理服务
 """
 import asyncio
+import heapq
+from contextlib import contextmanager
 import httpx
 from datetime import datetime
-from typing import Dict, List, Optional, Any
-from dataclasses import dataclass
+from typing import Dict, List, Optional, Any, Collection, FrozenSet, Pattern, Tuple
+from dataclasses import dataclass, field
 from enum import Enum
 import logging
+import random
 import re
+import time
 
 from ..models.schemas import ModelInfo
 from ..models.enums import ModelStatus, HealthStatus
 
 logger = logging.getLogger(__name__)
 
+# 代理请求和健康检查的超时(秒)
+PROXY_TIMEOUT = 30.0
+HEALTH_CHECK_TIMEOUT = 5.0
+
+# 支持代理的HTTP方法，其中只有POST/PUT/PATCH携带JSON请求体
+PROXY_METHODS = frozenset({"POST", "GET", "PUT", "DELETE", "PATCH"})
+BODY_METHODS = frozenset({"POST", "PUT", "PATCH"})
+
 
 class LoadBalancingStrategy(Enum):
     """负载均衡策略"""
     ROUND_ROBIN = "round_robin"
     LEAST_CONNECTIONS = "least_connections"
+    POWER_OF_TWO = "power_of_two"
     RANDOM = "random"
 
 
@@ -31,6 +44,14 @@ class ProxyRule:
     methods: List[str]
     auth_required: bool = False
     rate_limit: Optional[int] = None
+    compiled: Pattern = field(init=False, repr=False, compare=False)
+    method_set: FrozenSet[str] = field(init=False, repr=False, compare=False)
+    
+    def __post_init__(self):
+        # 构造时编译路径模式（{name}转为命名分组），匹配请求时不再重复替换和解析正则
+        pattern = self.path_pattern.replace('{', '(?P<').replace('}', '>[^/]+)')
+        self.compiled = re.compile(f"^{pattern}$")
+        self.method_set = frozenset(self.methods)
 
 
 @dataclass
@@ -48,70 +69,213 @@ class RequestMetrics:
     error_message: Optional[str] = None
 
 
+class ConnectionCounts(dict):
+    """端点连接数表（模型ID -> 连接数），同时维护按连接数排序的最小堆
+    
+    计数变化时压入新条目，旧条目在取堆顶时按计数不一致惰性丢弃；选择最少连接的端点
+    只需查看堆顶，不再遍历全部端点。
+    """
+    
+    def __init__(self):
+        super().__init__()
+        self._heap: List[tuple] = []
+    
+    def __setitem__(self, model_id: str, count: int):
+        if self.get(model_id) == count and model_id in self:
+            return
+        super().__setitem__(model_id, count)
+        heapq.heappush(self._heap, (count, model_id))
+        # 过期条目过多时按当前计数重建堆
+        if len(self._heap) > 2 * len(self) + 64:
+            self._heap = [(c, m) for m, c in self.items()]
+            heapq.heapify(self._heap)
+    
+    def update(self, *args, **kwargs):
+        for model_id, count in dict(*args, **kwargs).items():
+            self[model_id] = count
+    
+    def least(self, candidates: Collection[str]) -> Optional[str]:
+        """返回候选端点中连接数最少的模型ID，没有候选时返回None"""
+        heap = self._heap
+        skipped = []
+        selected = None
+        while heap:
+            count, model_id = heap[0]
+            if self.get(model_id) != count:
+                heapq.heappop(heap)
+            elif model_id in candidates:
+                selected = model_id
+                break
+            else:
+                skipped.append(heapq.heappop(heap))
+        # 暂不可用的端点放回堆中
+        for entry in skipped:
+            heapq.heappush(heap, entry)
+        return selected
+
+
+class RequestCounts(dict):
+    """端点请求数表（模型ID -> 请求数），同时维护全部端点的请求总数"""
+    
+    def __init__(self):
+        super().__init__()
+        self.total = 0
+    
+    def __setitem__(self, model_id: str, count: int):
+        self.total += count - self.get(model_id, 0)
+        super().__setitem__(model_id, count)
+    
+    def __delitem__(self, model_id: str):
+        self.total -= self[model_id]
+        super().__delitem__(model_id)
+    
+    def pop(self, model_id: str, *default):
+        if model_id in self:
+            self.total -= self[model_id]
+        return super().pop(model_id, *default)
+    
+    def update(self, *args, **kwargs):
+        for model_id, count in dict(*args, **kwargs).items():
+            self[model_id] = count
+
+
+def _enum_value(value: Any) -> str:
+    """枚举取其值，其他对象转为字符串"""
+    return str(getattr(value, 'value', value))
+
+
 class APIProxyService:
     """API代理服务"""
     
-    def __init__(self, load_balancing_strategy: LoadBalancingStrategy = LoadBalancingStrategy.ROUND_ROBIN):
+    def __init__(self, load_balancing_strategy: LoadBalancingStrategy = LoadBalancingStrategy.ROUND_ROBIN,
+                 health_check_ttl: float = 5.0):
         self._model_endpoints: Dict[str, Dict[str, Any]] = {}
+        # 可用端点快照及其模型ID，端点注册、注销或状态变化时置空；快照构造后不再原地修改
+        self._available_cache: Optional[Dict[str, Dict[str, Any]]] = None
+        self._available_ids: Tuple[str, ...] = ()
         self._proxy_rules: List[ProxyRule] = []
+        # HTTP方法 -> (合并后的规则正则, 规则分组名 -> (规则, 参数分组名 -> 参数名))
+        self._fused_rules: Dict[str, Tuple[Pattern, Dict[str, Tuple[ProxyRule, Dict[str, str]]]]] = {}
         self._load_balancing_strategy = load_balancing_strategy
         self._round_robin_index = 0
-        self._connection_counts: Dict[str, int] = {}
-        self._request_counts: Dict[str, int] = {}
-        self._rate_limits: Dict[str, Dict[str, Any]] = {}
+        self._connection_counts = ConnectionCounts()
+        self._request_counts = RequestCounts()
+        # 模型ID -> 令牌桶 {'tokens', 'capacity', 'rate'(每秒补充), 'last'(monotonic)}
+        self._rate_limits: Dict[str, Dict[str, float]] = {}
         self._enable_failover = True
+        # 健康状态在该时间(秒)内视为有效，不再重复请求上游
+        self._health_check_ttl = health_check_ttl
+        # 健康检查URL -> 进行中的检查任务，同一URL的并发检查共用一次请求
+        self._inflight_health: Dict[str, asyncio.Task] = {}
+        # 所有代理请求和健康检查共用一个客户端，复用到各模型端点的长连接
+        self._client = httpx.AsyncClient(
+            timeout=httpx.Timeout(PROXY_TIMEOUT),
+            limits=httpx.Limits(max_connections=1000, max_keepalive_connections=100)
+        )
+    
+    async def stop(self):
+        """关闭共用的HTTP客户端"""
+        await self._client.aclose()
     
     async def register_model_endpoint(self, model_info: ModelInfo):
         """注册模型端点"""
+        health = getattr(model_info, 'health', HealthStatus.UNKNOWN)
         self._model_endpoints[model_info.id] = {
             'model_info': model_info,
             'endpoint': model_info.api_endpoint or model_info.endpoint,
             'status': model_info.status,
-            'health': getattr(model_info, 'health', HealthStatus.UNKNOWN),
-            'last_updated': datetime.now(),
+            'health': health,
+            # 状态的字符串形式在变化时渲染一次，统计输出直接取用
+            'status_value': _enum_value(model_info.status),
+            'health_value': _enum_value(health),
+            # 时间戳均为浮点秒：last_updated为墙上时间，仅在输出统计时转换；
+            # last_health_check为monotonic时间，只用于计算健康检查有效期
+            'last_updated': time.time(),
             'last_health_check': None
         }
         
+        self._available_cache = None
+        
         # 初始化计数器
         self._connection_counts[model_info.id] = 0
         self._request_counts[model_info.id] = 0
         
-        logger.info(f"已注册模型端点: {model_info.id} -> {self._model_endpoints[model_info.id]['endpoint']}")
+        logger.info("已注册模型端点: %s -> %s", model_info.id, self._model_endpoints[model_info.id]['endpoint'])
     
     async def unregister_model_endpoint(self, model_id: str):
         """注销模型端点"""
         if model_id in self._model_endpoints:
             del self._model_endpoints[model_id]
+            self._available_cache = None
             self._connection_counts.pop(model_id, None)
             self._request_counts.pop(model_id, None)
             self._rate_limits.pop(model_id, None)
-            logger.info(f"已注销模型端点: {model_id}")
+            logger.info("已注销模型端点: %s", model_id)
     
     async def update_model_status(self, model_id: str, status: ModelStatus):
         """更新模型状态"""
-        if model_id in self._model_endpoints:
-            self._model_endpoints[model_id]['status'] = status
-            self._model_endpoints[model_id]['last_updated'] = datetime.now()
+        endpoint_info = self._model_endpoints.get(model_id)
+        if endpoint_info is not None:
+            endpoint_info['status'] = status
+            endpoint_info['status_value'] = _enum_value(status)
+            endpoint_info['last_updated'] = time.time()
+            self._refresh_availability(model_id, endpoint_info)
     
     async def update_model_health(self, model_id: str, health: HealthStatus):
         """更新模型健康状态"""
-        if model_id in self._model_endpoints:
-            self._model_endpoints[model_id]['health'] = health
-            self._model_endpoints[model_id]['last_health_check'] = datetime.now()
+        endpoint_info = self._model_endpoints.get(model_id)
+        if endpoint_info is not None:
+            endpoint_info['health'] = health
+            endpoint_info['health_value'] = _enum_value(health)
+            endpoint_info['last_health_check'] = time.monotonic()
+            self._refresh_availability(model_id, endpoint_info)
+    
+    @staticmethod
+    def _is_available(endpoint_info: Dict[str, Any]) -> bool:
+        """端点运行中且健康时可用"""
+        return (endpoint_info['status'] == ModelStatus.RUNNING and
+                endpoint_info['health'] == HealthStatus.HEALTHY)
+    
+    def _refresh_availability(self, model_id: str, endpoint_info: Dict[str, Any]):
+        """状态变化后检查端点可用性，只有可用性翻转时才丢弃可用端点快照
+        
+        定期健康检查和状态上报多数不改变可用性，快照得以复用。
+        """
+        if (self._available_cache is not None and
+                (model_id in self._available_cache) != self._is_available(endpoint_info)):
+            self._available_cache = None
+    
+    def _available_snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """返回可用端点快照，失效时按注册顺序重建"""
+        if self._available_cache is None:
+            available = {
+                model_id: endpoint_info for model_id, endpoint_info in self._model_endpoints.items()
+                if self._is_available(endpoint_info)
+            }
+            self._available_cache = available
+            self._available_ids = tuple(available)
+        return self._available_cache
     
     async def get_available_endpoints(self) -> Dict[str, Dict[str, Any]]:
-        """获取可用的端点"""
-        available = {}
-        for model_id, endpoint_info in self._model_endpoints.items():
-            if (endpoint_info['status'] == ModelStatus.RUNNING and 
-                endpoint_info['health'] == HealthStatus.HEALTHY):
-                available[model_id] = endpoint_info
-        return available
+        """获取可用的端点（共享快照，调用方不应修改）"""
+        return self._available_snapshot()
     
     async def select_endpoint(self) -> Optional[Dict[str, Any]]:
         """根据负载均衡策略选择端点"""
+        return self._select_from(await self.get_available_endpoints())
+    
+    async def select_endpoint_excluding(self, excluded: Collection[str]) -> Optional[Dict[str, Any]]:
+        """按负载均衡策略在排除指定模型后的可用端点中选择"""
         available_endpoints = await self.get_available_endpoints()
-        
+        if excluded:
+            available_endpoints = {
+                model_id: endpoint_info for model_id, endpoint_info in available_endpoints.items()
+                if model_id not in excluded
+            }
+        return self._select_from(available_endpoints)
+    
+    def _select_from(self, available_endpoints: Dict[str, Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """按配置的负载均衡策略从给定端点中选择"""
         if not available_endpoints:
             return None
         
@@ -119,22 +283,29 @@ class APIProxyService:
             return self._select_round_robin(available_endpoints)
         elif self._load_balancing_strategy == LoadBalancingStrategy.LEAST_CONNECTIONS:
             return self._select_least_connections(available_endpoints)
+        elif self._load_balancing_strategy == LoadBalancingStrategy.POWER_OF_TWO:
+            return self._select_power_of_two(available_endpoints)
         else:  # RANDOM
-            import random
-            model_id = random.choice(list(available_endpoints.keys()))
+            model_id = random.choice(self._available_ids if available_endpoints is self._available_cache
+                                     else tuple(available_endpoints))
             endpoint_info = available_endpoints[model_id]
             endpoint_info['model_id'] = model_id
             return endpoint_info
     
     def _select_round_robin(self, available_endpoints: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
         """轮询选择端点"""
-        endpoint_list = list(available_endpoints.items())
-        if not endpoint_list:
+        # 传入的是可用端点快照时直接使用预先生成的模型ID元组
+        model_ids = (self._available_ids if available_endpoints is self._available_cache
+                     else tuple(available_endpoints))
+        if not model_ids:
             return None
         
-        model_id, endpoint_info = endpoint_list[self._round_robin_index % len(endpoint_list)]
-        self._round_robin_index += 1
+        index = self._round_robin_index % len(model_ids)
+        model_id = model_ids[index]
+        # 下标对端点数取模保存，长时间运行也不会无限增长
+        self._round_robin_index = (index + 1) % len(model_ids)
         
+        endpoint_info = available_endpoints[model_id]
         endpoint_info['model_id'] = model_id
         return endpoint_info
     
@@ -143,15 +314,9 @@ class APIProxyService:
         if not available_endpoints:
             return None
         
-        # 找到连接数最少的端点
-        min_connections = float('inf')
-        selected_model_id = None
-        
-        for model_id in available_endpoints.keys():
-            connections = self._connection_counts.get(model_id, 0)
-            if connections < min_connections:
-                min_connections = connections
-                selected_model_id = model_id
+        # 从连接数最小堆中取连接数最少的可用端点；可用端点都未登记连接数时取第一个
+        selected_model_id = (self._connection_counts.least(available_endpoints)
+                             or next(iter(available_endpoints)))
         
         if selected_model_id:
             endpoint_info = available_endpoints[selected_model_id]
@@ -160,6 +325,22 @@ class APIProxyService:
         
         return None
     
+    def _select_power_of_two(self, available_endpoints: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        """随机取两个端点，选择连接数较少的一个（Power of Two Choices）
+        
+        只比较两个候选的连接数，不再遍历全部端点，负载仍接近最少连接。
+        """
+        model_ids = list(available_endpoints)
+        if len(model_ids) == 1:
+            selected_model_id = model_ids[0]
+        else:
+            a, b = random.sample(model_ids, 2)
+            selected_model_id = a if self._connection_counts.get(a, 0) <= self._connection_counts.get(b, 0) else b
+        
+        endpoint_info = available_endpoints[selected_model_id]
+        endpoint_info['model_id'] = selected_model_id
+        return endpoint_info
+    
     async def proxy_request(self, model_id: str, path: str, method: str = "POST", 
                           data: Optional[Dict[str, Any]] = None, 
                           headers: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
@@ -170,16 +351,21 @@ class APIProxyService:
                 'error': '模型不存在或不可用'
             }
         
-        endpoint_info = self._model_endpoints[model_id]
-        
-        # 检查模型状态
-        if (endpoint_info['status'] != ModelStatus.RUNNING or 
-            endpoint_info['health'] != HealthStatus.HEALTHY):
+        # 检查模型状态：可用端点快照中没有即不可用
+        endpoint_info = self._available_snapshot().get(model_id)
+        if endpoint_info is None:
             return {
                 'status_code': 503,
                 'error': '模型当前不可用'
             }
         
+        method = method.upper()
+        if method not in PROXY_METHODS:
+            return {
+                'status_code': 405,
+                'error': f'不支持的HTTP方法: {method}'
+            }
+        
         # 检查速率限制
         if not self._check_rate_limit(model_id):
             return {
@@ -187,52 +373,45 @@ class APIProxyService:
                 'error': '请求频率超限'
             }
         
-        # 增加连接计数
-        self.increment_connection_count(model_id)
+        endpoint = endpoint_info['endpoint']
+        url = f"{endpoint.rstrip('/')}{path}"
         
-        try:
-            endpoint = endpoint_info['endpoint']
-            url = f"{endpoint.rstrip('/')}{path}"
-            
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                if method.upper() == "POST":
-                    response = await client.post(url, json=data, headers=headers)
-                elif method.upper() == "GET":
-                    response = await client.get(url, headers=headers)
-                elif method.upper() == "PUT":
-                    response = await client.put(url, json=data, headers=headers)
-                elif method.upper() == "DELETE":
-                    response = await client.delete(url, headers=headers)
-                else:
-                    return {
-                        'status_code': 405,
-                        'error': f'不支持的HTTP方法: {method}'
-                    }
-                
-                # 增加请求计数
-                self._request_counts[model_id] = self._request_counts.get(model_id, 0) + 1
-                
-                # 返回响应
-                try:
-                    response_data = response.json()
-                except:
-                    response_data = response.text
-                
+        with self._track_connection(model_id):
+            try:
+                response = await self._client.request(
+                    method, url, json=data if method in BODY_METHODS else None, headers=headers
+                )
+            except Exception as e:
+                logger.error("代理请求失败: %s", e)
                 return {
-                    'status_code': response.status_code,
-                    'data': response_data,
-                    'headers': dict(response.headers)
+                    'status_code': 500,
+                    'error': f'代理请求失败: {str(e)}'
                 }
         
-        except Exception as e:
-            logger.error(f"代理请求失败: {e}")
-            return {
-                'status_code': 500,
-                'error': f'代理请求失败: {str(e)}'
-            }
+        # 增加请求计数
+        self._request_counts[model_id] = self._request_counts.get(model_id, 0) + 1
+        
+        # 返回响应；仅JSON内容类型才尝试解析，响应头直接返回httpx.Headers（大小写不敏感的映射）
+        response_data = response.text
+        if 'json' in response.headers.get('content-type', ''):
+            try:
+                response_data = response.json()
+            except ValueError:
+                pass
         
+        return {
+            'status_code': response.status_code,
+            'data': response_data,
+            'headers': response.headers
+        }
+    
+    @contextmanager
+    def _track_connection(self, model_id: str):
+        """在上游请求期间计入端点连接数，无论请求成功、失败还是被取消都会减回"""
+        self.increment_connection_count(model_id)
+        try:
+            yield
         finally:
-            # 减少连接计数
             self.decrement_connection_count(model_id)
     
     async def proxy_request_with_failover(self, path: str, method: str = "POST",
@@ -248,16 +427,20 @@ class APIProxyService:
                 }
             return await self.proxy_request(endpoint['model_id'], path, method, data, headers)
         
-        # 尝试多个端点
-        available_endpoints = await self.get_available_endpoints()
-        
-        for model_id in available_endpoints.keys():
+        # 按负载均衡策略依次尝试尚未尝试过的端点，重试负载不会集中到第一个注册的端点
+        tried = set()
+        for _ in range(len(await self.get_available_endpoints())):
+            endpoint = await self.select_endpoint_excluding(tried)
+            if not endpoint:
+                break
+            model_id = endpoint['model_id']
+            tried.add(model_id)
             try:
                 result = await self.proxy_request(model_id, path, method, data, headers)
                 if result['status_code'] < 500:  # 非服务器错误
                     return result
             except Exception as e:
-                logger.warning(f"端点 {model_id} 请求失败，尝试下一个: {e}")
+                logger.warning("端点 %s 请求失败，尝试下一个: %s", model_id, e)
                 continue
         
         return {
@@ -268,25 +451,47 @@ class APIProxyService:
     def add_proxy_rule(self, rule: ProxyRule):
         """添加代理规则"""
         self._proxy_rules.append(rule)
+        self._rebuild_fused_rules()
     
     def remove_proxy_rule(self, path_pattern: str):
         """移除代理规则"""
         self._proxy_rules = [rule for rule in self._proxy_rules if rule.path_pattern != path_pattern]
+        self._rebuild_fused_rules()
+    
+    def _rebuild_fused_rules(self):
+        """按HTTP方法将代理规则合并为一个按添加顺序排列的交替正则，匹配时一次扫描即可确定规则
+        
+        各规则的参数分组加上规则前缀，避免不同规则的同名参数在同一正则中冲突。
+        """
+        alternatives: Dict[str, List[str]] = {}
+        groups: Dict[str, Dict[str, Tuple[ProxyRule, Dict[str, str]]]] = {}
+        for index, rule in enumerate(self._proxy_rules):
+            prefix = f"r{index}"
+            pattern = rule.path_pattern.replace('{', f'(?P<{prefix}_').replace('}', '>[^/]+)')
+            params = {f"{prefix}_{name}": name for name in rule.compiled.groupindex}
+            for method in rule.method_set:
+                alternatives.setdefault(method, []).append(f"(?P<{prefix}>{pattern})")
+                groups.setdefault(method, {})[prefix] = (rule, params)
+        
+        self._fused_rules = {
+            method: (re.compile(f"^(?:{'|'.join(patterns)})$"), groups[method])
+            for method, patterns in alternatives.items()
+        }
     
     def _match_proxy_rule(self, path: str, method: str) -> tuple[Optional[ProxyRule], Dict[str, str]]:
         """匹配代理规则"""
-        for rule in self._proxy_rules:
-            if method not in rule.methods:
-                continue
-            
-            # 简单的路径匹配（支持参数）
-            pattern = rule.path_pattern.replace('{', '(?P<').replace('}', '>[^/]+)')
-            match = re.match(f"^{pattern}$", path)
-            
-            if match:
-                return rule, match.groupdict()
+        fused = self._fused_rules.get(method)
+        if fused is None:
+            return None, {}
+        
+        pattern, groups = fused
+        match = pattern.match(path)
+        if not match:
+            return None, {}
         
-        return None, {}
+        # 最后闭合的分组即命中规则的外层分组
+        rule, params = groups[match.lastgroup]
+        return rule, {name: match.group(group) for group, name in params.items()}
     
     def increment_connection_count(self, model_id: str):
         """增加连接计数"""
@@ -297,26 +502,33 @@ class APIProxyService:
         if model_id in self._connection_counts:
             self._connection_counts[model_id] = max(0, self._connection_counts[model_id] - 1)
     
+    def set_rate_limit(self, model_id: str, requests_per_minute: int, burst: Optional[int] = None):
+        """设置模型的请求速率限制，burst为允许的突发请求数，默认等于每分钟请求数"""
+        capacity = float(burst if burst is not None else requests_per_minute)
+        self._rate_limits[model_id] = {
+            'tokens': capacity,
+            'capacity': capacity,
+            'rate': requests_per_minute / 60.0,
+            'last': time.monotonic()
+        }
+    
     def _check_rate_limit(self, model_id: str) -> bool:
-        """检查速率限制"""
-        if model_id not in self._rate_limits:
-            return True
+        """检查速率限制（令牌桶，按流逝时间连续补充令牌，不会在固定窗口边界集中放行）
         
-        rate_limit_info = self._rate_limits[model_id]
-        current_time = datetime.now()
-        
-        # 检查时间窗口
-        if (current_time - rate_limit_info['window_start']).total_seconds() >= 60:
-            # 重置窗口
-            rate_limit_info['window_start'] = current_time
-            rate_limit_info['current_count'] = 0
+        检查过程中没有await，在事件循环内天然是原子的，无需加锁。
+        """
+        bucket = self._rate_limits.get(model_id)
+        if bucket is None:
+            return True
         
-        # 检查是否超过限制
-        if rate_limit_info['current_count'] >= rate_limit_info['requests_per_minute']:
-            return False
+        now = time.monotonic()
+        bucket['tokens'] = min(bucket['capacity'], bucket['tokens'] + (now - bucket['last']) * bucket['rate'])
+        bucket['last'] = now
         
-        rate_limit_info['current_count'] += 1
-        return True
+        if bucket['tokens'] >= 1.0:
+            bucket['tokens'] -= 1.0
+            return True
+        return False
     
     async def get_proxy_stats(self) -> Dict[str, Any]:
         """获取代理统计信息"""
@@ -325,34 +537,48 @@ class APIProxyService:
         return {
             'total_endpoints': len(self._model_endpoints),
             'available_endpoints': len(available_endpoints),
-            'total_requests': sum(self._request_counts.values()),
+            'total_requests': self._request_counts.total,
             'total_connections': sum(self._connection_counts.values()),
             'model_stats': {
                 model_id: {
                     'requests': self._request_counts.get(model_id, 0),
                     'connections': self._connection_counts.get(model_id, 0),
-                    'status': endpoint_info['status'].value if hasattr(endpoint_info['status'], 'value') else str(endpoint_info['status']),
-                    'health': endpoint_info['health'].value if hasattr(endpoint_info['health'], 'value') else str(endpoint_info['health'])
+                    'status': endpoint_info['status_value'],
+                    'health': endpoint_info['health_value'],
+                    'last_updated': datetime.fromtimestamp(endpoint_info['last_updated']).isoformat()
                 }
                 for model_id, endpoint_info in self._model_endpoints.items()
             }
         }
     
     async def health_check_endpoints(self):
-        """检查所有端点的健康状态"""
-        for model_id, endpoint_info in self._model_endpoints.items():
-            try:
-                endpoint = endpoint_info['endpoint']
-                health_url = f"{endpoint.rstrip('/')}/health"
-                
-                async with httpx.AsyncClient(timeout=5.0) as client:
-                    response = await client.get(health_url)
-                    
-                    if response.status_code == 200:
-                        await self.update_model_health(model_id, HealthStatus.HEALTHY)
-                    else:
-                        await self.update_model_health(model_id, HealthStatus.UNHEALTHY)
-            
-            except Exception as e:
-                logger.warning(f"端点 {model_id} 健康检查失败: {e}")
-                await self.update_model_health(model_id, HealthStatus.UNHEALTHY)
\ No newline at end of file
+        """检查所有端点的健康状态，各端点并发检查，单个端点超时不影响其他端点"""
+        endpoints = list(self._model_endpoints.items())
+        await asyncio.gather(
+            *(self._check_endpoint_health(model_id, endpoint_info) for model_id, endpoint_info in endpoints),
+            return_exceptions=True
+        )
+    
+    async def _check_endpoint_health(self, model_id: str, endpoint_info: Dict[str, Any]):
+        """检查单个端点的健康状态，有效期内的结果直接沿用"""
+        last_check = endpoint_info.get('last_health_check')
+        if last_check is not None and time.monotonic() - last_check < self._health_check_ttl:
+            return
+        
+        health_url = f"{endpoint_info['endpoint'].rstrip('/')}/health"
+        task = self._inflight_health.get(health_url)
+        if task is None:
+            task = asyncio.create_task(self._probe_health(model_id, health_url))
+            self._inflight_health[health_url] = task
+            task.add_done_callback(lambda _: self._inflight_health.pop(health_url, None))
+        
+        await self.update_model_health(model_id, await asyncio.shield(task))
+    
+    async def _probe_health(self, model_id: str, health_url: str) -> HealthStatus:
+        """请求端点的健康检查接口"""
+        try:
+            response = await self._client.get(health_url, timeout=HEALTH_CHECK_TIMEOUT)
+            return HealthStatus.HEALTHY if response.status_code == 200 else HealthStatus.UNHEALTHY
+        except Exception as e:
+            logger.warning("端点 %s 健康检查失败: %s", model_id, e)
+            return HealthStatus.UNHEALTHY
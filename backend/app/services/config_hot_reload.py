@@ -4,9 +4,11 @@
 """
 import asyncio
 import logging
-import json
+import msgspec
+import time
+from types import MappingProxyType
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Callable, Any, Set
+from typing import Dict, List, Mapping, Optional, Callable, Any, Set, Tuple
 from dataclasses import dataclass
 from enum import Enum
 
@@ -16,6 +18,30 @@ from .database_config_manager import DatabaseConfigManager
 
 logger = logging.getLogger(__name__)
 
+# 参数按键排序编码为JSON字节，用于与键顺序无关的参数比较
+_params_encoder = msgspec.json.Encoder(order="sorted")
+
+# 参与变更比较的配置字段，与_config_key生成的元组逐项对应
+CONFIG_KEY_FIELDS = (
+    'name', 'framework', 'model_path', 'priority', 'gpu_devices', 'parameters',
+    'resource_requirements', 'health_check', 'retry_policy'
+)
+
+def _config_key(config: ModelConfig) -> tuple:
+    """生成配置比较键，两个配置的键相等即视为未变更
+    
+    参数按键排序编码为JSON字节后比较；资源需求、健康检查和重试策略是冻结模型，直接按字段值比较。
+    """
+    return (
+        config.name, config.framework, config.model_path, config.priority, config.gpu_devices,
+        _params_encoder.encode(config.parameters),
+        config.resource_requirements, config.health_check, config.retry_policy
+    )
+
+def _changed_fields(old_key: tuple, new_key: tuple) -> List[str]:
+    """逐项比较两个配置键，返回发生变更的字段名"""
+    return [field for field, old, new in zip(CONFIG_KEY_FIELDS, old_key, new_key) if old != new]
+
 class ConfigChangeType(Enum):
     """配置变更类型"""
     CREATED = "created"
@@ -38,36 +64,7 @@ class ConfigChangeEvent:
             self.timestamp = datetime.now()
         
         if self.change_fields is None and self.old_config and self.new_config:
-            self.change_fields = self._detect_changed_fields()
-    
-    def _detect_changed_fields(self) -> List[str]:
-        """检测变更字段"""
-        changed_fields = []
-        
-        if not self.old_config or not self.new_config:
-            return changed_fields
-        
-        # 比较基本字段
-        basic_fields = ['name', 'framework', 'model_path', 'priority', 'gpu_devices', 'parameters']
-        for field in basic_fields:
-            old_value = getattr(self.old_config, field)
-            new_value = getattr(self.new_config, field)
-            if old_value != new_value:
-                changed_fields.append(field)
-        
-        # 比较资源需求
-        if self.old_config.resource_requirements != self.new_config.resource_requirements:
-            changed_fields.append('resource_requirements')
-        
-        # 比较健康检查配置
-        if self.old_config.health_check != self.new_config.health_check:
-            changed_fields.append('health_check')
-        
-        # 比较重试策略
-        if self.old_config.retry_policy != self.new_config.retry_policy:
-            changed_fields.append('retry_policy')
-        
-        return changed_fields
+            self.change_fields = _changed_fields(_config_key(self.old_config), _config_key(self.new_config))
 
 class ConfigHotReloadService:
     """配置热重载服务"""
@@ -76,17 +73,33 @@ class ConfigHotReloadService:
         self.config_manager = config_manager
         self.model_manager = model_manager
         
-        # 配置缓存
+        # 配置缓存，只能原地修改，不能重新赋值，否则只读视图会与缓存脱节
         self._config_cache: Dict[str, ModelConfig] = {}
-        self._last_check_time = datetime.now()
+        self._config_cache_view: Mapping[str, ModelConfig] = MappingProxyType(self._config_cache)
+        # 已处理到的配置更新时间（数据库时间），增量检查只加载此后更新的记录
+        self._updated_watermark: Optional[datetime] = None
+        # 缓存配置的比较键 {模型ID: (配置对象, 比较键)}，配置对象被替换后按对象身份判定失效
+        self._config_keys: Dict[str, Tuple[ModelConfig, tuple]] = {}
+        # 上次检查的时间（time.time()秒数），只在输出状态时转换为datetime
+        self._last_check_time = time.time()
         
         # 事件监听器
         self._change_listeners: List[Callable[[ConfigChangeEvent], None]] = []
+        # 注册时按同步/异步分组，通知时不再逐个判断
+        self._sync_listeners: List[Callable[[ConfigChangeEvent], None]] = []
+        self._async_listeners: List[Callable[[ConfigChangeEvent], Any]] = []
+        
+        # 配置写入通知：DatabaseConfigManager提交后推送模型ID，重载循环只重新加载这些配置
+        self._pending_changes: asyncio.Queue = asyncio.Queue()
         
         # 热重载设置
-        self.check_interval = 5  # 检查间隔（秒）
+        # 写入通知只在本进程内传递，多worker部署时其他worker的写入只能靠对账发现，间隔需保持较短
+        self.check_interval = 5  # 对账间隔（秒），兜底发现其他进程写入等未通知的变更
+        self.max_check_interval = 30  # 连续无变更时对账间隔退避的上限（秒）
+        self._idle_sweeps = 0  # 连续未发现变更的对账次数
         self.enabled = True
         self.auto_apply_changes = True  # 是否自动应用配置变更
+        self.max_concurrent_applies = 4  # 同时应用的配置变更数上限（模型重启耗时较长）
         
         # 任务控制
         self._reload_task: Optional[asyncio.Task] = None
@@ -104,6 +117,9 @@ class ConfigHotReloadService:
             logger.info("启动配置热重载服务...")
             self._running = True
             
+            # 先订阅写入通知再初始化缓存，初始化期间的写入不会遗漏
+            self.config_manager.add_change_listener(self._on_config_written)
+            
             # 初始化配置缓存
             await self._initialize_cache()
             
@@ -114,6 +130,7 @@ class ConfigHotReloadService:
             
         except Exception as e:
             logger.error(f"启动配置热重载服务失败: {e}")
+            self.config_manager.remove_change_listener(self._on_config_written)
             self._running = False
             raise
     
@@ -125,6 +142,7 @@ class ConfigHotReloadService:
         try:
             logger.info("停止配置热重载服务...")
             self._running = False
+            self.config_manager.remove_change_listener(self._on_config_written)
             
             # 取消监控任务
             if self._reload_task and not self._reload_task.done():
@@ -143,31 +161,39 @@ class ConfigHotReloadService:
         """添加配置变更监听器"""
         if listener not in self._change_listeners:
             self._change_listeners.append(listener)
+            self._listener_group(listener).append(listener)
             logger.info(f"添加配置变更监听器: {listener.__name__}")
     
     def remove_change_listener(self, listener: Callable[[ConfigChangeEvent], None]):
         """移除配置变更监听器"""
         if listener in self._change_listeners:
             self._change_listeners.remove(listener)
+            self._listener_group(listener).remove(listener)
             logger.info(f"移除配置变更监听器: {listener.__name__}")
     
+    def _listener_group(self, listener: Callable[[ConfigChangeEvent], Any]) -> list:
+        """返回监听器所属的同步或异步分组"""
+        return self._async_listeners if asyncio.iscoroutinefunction(listener) else self._sync_listeners
+    
     async def force_reload(self) -> List[ConfigChangeEvent]:
         """强制重新加载配置"""
         logger.info("强制重新加载配置...")
-        return await self._check_and_apply_changes()
+        return await self._check_and_apply_changes(full=True)
     
     async def reload_model_config(self, model_id: str) -> Optional[ConfigChangeEvent]:
         """重新加载指定模型配置"""
+        event = await self._detect_model_change(model_id)
+        if event is not None:
+            await self._apply_changes([event])
+        return event
+    
+    async def _detect_model_change(self, model_id: str) -> Optional[ConfigChangeEvent]:
+        """从数据库加载指定模型的最新配置，与缓存比较并更新缓存，返回变更事件（不应用变更）"""
         try:
             logger.info(f"重新加载模型配置: {model_id}")
             
-            # 从数据库加载最新配置
-            configs = await self.config_manager.load_model_configs()
-            new_config = None
-            for config in configs:
-                if config.id == model_id:
-                    new_config = config
-                    break
+            # 从数据库加载该模型的最新配置
+            new_config = await self.config_manager.load_model_config(model_id)
             
             old_config = self._config_cache.get(model_id)
             
@@ -179,19 +205,13 @@ class ConfigHotReloadService:
                         change_type=ConfigChangeType.UPDATED,
                         model_id=model_id,
                         old_config=old_config,
-                        new_config=new_config
+                        new_config=new_config,
+                        change_fields=_changed_fields(self._cached_key(old_config), self._cached_key(new_config))
                     )
                     
                     # 更新缓存
                     self._config_cache[model_id] = new_config
                     
-                    # 应用变更
-                    if self.auto_apply_changes:
-                        await self._apply_config_change(event)
-                    
-                    # 通知监听器
-                    await self._notify_listeners(event)
-                    
                     return event
             elif new_config and not old_config:
                 # 新增配置
@@ -204,13 +224,6 @@ class ConfigHotReloadService:
                 # 更新缓存
                 self._config_cache[model_id] = new_config
                 
-                # 应用变更
-                if self.auto_apply_changes:
-                    await self._apply_config_change(event)
-                
-                # 通知监听器
-                await self._notify_listeners(event)
-                
                 return event
             elif not new_config and old_config:
                 # 删除配置
@@ -223,13 +236,7 @@ class ConfigHotReloadService:
                 # 更新缓存
                 if model_id in self._config_cache:
                     del self._config_cache[model_id]
-                
-                # 应用变更
-                if self.auto_apply_changes:
-                    await self._apply_config_change(event)
-                
-                # 通知监听器
-                await self._notify_listeners(event)
+                self._config_keys.pop(model_id, None)
                 
                 return event
             
@@ -243,9 +250,13 @@ class ConfigHotReloadService:
         """获取缓存的配置"""
         return self._config_cache.get(model_id)
     
-    def get_all_cached_configs(self) -> Dict[str, ModelConfig]:
-        """获取所有缓存的配置"""
-        return self._config_cache.copy()
+    def get_all_cached_configs(self) -> Mapping[str, ModelConfig]:
+        """获取所有缓存的配置
+        
+        返回缓存的只读实时视图，不复制；视图随缓存更新，调用方需要快照时自行dict()，
+        遍历期间不应await。
+        """
+        return self._config_cache_view
     
     async def _initialize_cache(self):
         """初始化配置缓存"""
@@ -256,6 +267,7 @@ class ConfigHotReloadService:
             self._config_cache.clear()
             for config in configs:
                 self._config_cache[config.id] = config
+            self._updated_watermark = self._latest_updated_at(configs)
             
             logger.info(f"配置缓存初始化完成，加载了 {len(configs)} 个配置")
             
@@ -263,39 +275,86 @@ class ConfigHotReloadService:
             logger.error(f"初始化配置缓存失败: {e}")
             raise
     
+    def _on_config_written(self, model_id: str):
+        """配置写入回调，记录待重新加载的模型ID"""
+        self._pending_changes.put_nowait(model_id)
+    
+    @staticmethod
+    def _latest_updated_at(configs: List[ModelConfig]) -> Optional[datetime]:
+        """返回配置中最晚的更新时间"""
+        return max((config.updated_at for config in configs if config.updated_at is not None), default=None)
+    
     async def _reload_loop(self):
-        """配置重载循环"""
+        """配置重载循环
+        
+        平时等待配置写入通知，只重新加载被写入的模型配置；到达对账间隔仍无通知时
+        按更新时间增量检查一次。
+        """
         logger.info("配置重载监控循环启动")
+        loop = asyncio.get_running_loop()
+        next_sweep = loop.time() + self._current_interval()
         
         while self._running:
             try:
+                try:
+                    model_id = await asyncio.wait_for(
+                        self._pending_changes.get(), max(0.0, next_sweep - loop.time())
+                    )
+                except asyncio.TimeoutError:
+                    if self.enabled:
+                        changes = await self._check_and_apply_changes()
+                        self._idle_sweeps = 0 if changes else self._idle_sweeps + 1
+                    next_sweep = loop.time() + self._current_interval()
+                    continue
+                
+                # 合并同一批通知中重复的模型ID
+                model_ids = {model_id}
+                while not self._pending_changes.empty():
+                    model_ids.add(self._pending_changes.get_nowait())
+                
                 if self.enabled:
-                    await self._check_and_apply_changes()
+                    # 逐个加载并更新缓存，再与对账路径一样在并发数限制内应用整批变更
+                    events = [await self._detect_model_change(model_id) for model_id in model_ids]
+                    await self._apply_changes([event for event in events if event is not None])
                 
-                # 等待下次检查
-                await asyncio.sleep(self.check_interval)
+                # 有写入说明配置正在变化，下次对账起恢复基础间隔
+                self._idle_sweeps = 0
                 
             except asyncio.CancelledError:
                 logger.info("配置重载监控循环被取消")
                 break
             except Exception as e:
-                logger.error(f"配置重载监控循环异常: {e}")
                 # 继续运行，避免因单次错误导致服务停止
-                await asyncio.sleep(self.check_interval)
+                logger.error(f"配置重载监控循环异常: {e}")
         
         logger.info("配置重载监控循环结束")
     
-    async def _check_and_apply_changes(self) -> List[ConfigChangeEvent]:
-        """检查并应用配置变更"""
+    def _current_interval(self) -> float:
+        """当前对账间隔：连续无变更时按2的幂退避，最多为基础间隔的16倍且不超过上限"""
+        return min(self.check_interval * (2 ** min(self._idle_sweeps, 4)),
+                   max(self.max_check_interval, self.check_interval))
+    
+    async def _check_and_apply_changes(self, full: bool = False) -> List[ConfigChangeEvent]:
+        """检查并应用配置变更
+        
+        默认只加载上次检查以来更新过的配置（含软删除的记录）；full为True时加载全部配置，
+        并把缓存中不再存在的配置视为删除。
+        """
         try:
-            # 从数据库加载最新配置
-            current_configs = await self.config_manager.load_model_configs()
-            current_config_dict = {config.id: config for config in current_configs}
+            if full:
+                current_configs = await self.config_manager.load_model_configs()
+                current_ids = {config.id for config in current_configs}
+                deleted_ids = [model_id for model_id in self._config_cache if model_id not in current_ids]
+                watermark = self._latest_updated_at(current_configs)
+            else:
+                current_configs, deleted_ids, watermark = \
+                    await self.config_manager.load_model_configs_since(self._updated_watermark)
             
             changes = []
             
             # 检查新增和更新的配置
-            for model_id, new_config in current_config_dict.items():
+            for new_config in current_configs:
+                model_id = new_config.id
                 old_config = self._config_cache.get(model_id)
                 
                 if old_config is None:
@@ -313,13 +372,14 @@ class ConfigHotReloadService:
                         change_type=ConfigChangeType.UPDATED,
                         model_id=model_id,
                         old_config=old_config,
-                        new_config=new_config
+                        new_config=new_config,
+                        change_fields=_changed_fields(self._cached_key(old_config), self._cached_key(new_config))
                     )
                     changes.append(event)
             
             # 检查删除的配置
-            for model_id in self._config_cache:
-                if model_id not in current_config_dict:
+            for model_id in deleted_ids:
+                if model_id in self._config_cache:
                     event = ConfigChangeEvent(
                         change_type=ConfigChangeType.DELETED,
                         model_id=model_id,
@@ -327,68 +387,59 @@ class ConfigHotReloadService:
                     )
                     changes.append(event)
             
+            if watermark is not None:
+                self._updated_watermark = watermark
+            
             # 应用变更
             if changes:
                 logger.info(f"检测到 {len(changes)} 个配置变更")
                 
+                # 先同步更新缓存，再并发应用各模型的变更，多个模型重启时互相重叠
                 for event in changes:
-                    # 更新缓存
                     if event.change_type == ConfigChangeType.DELETED:
                         if event.model_id in self._config_cache:
                             del self._config_cache[event.model_id]
+                        self._config_keys.pop(event.model_id, None)
                     else:
                         self._config_cache[event.model_id] = event.new_config
-                    
-                    # 应用变更
-                    if self.auto_apply_changes:
-                        await self._apply_config_change(event)
-                    
-                    # 通知监听器
-                    await self._notify_listeners(event)
+                
+                await self._apply_changes(changes)
             
-            self._last_check_time = datetime.now()
+            self._last_check_time = time.time()
             return changes
             
         except Exception as e:
             logger.error(f"检查配置变更失败: {e}")
             return []
     
+    async def _apply_changes(self, changes: List[ConfigChangeEvent]):
+        """并发应用一批配置变更，同时进行的数量不超过max_concurrent_applies"""
+        if not changes:
+            return
+        semaphore = asyncio.Semaphore(self.max_concurrent_applies)
+        await asyncio.gather(*(self._apply_one(semaphore, event) for event in changes))
+    
+    async def _apply_one(self, semaphore: asyncio.Semaphore, event: ConfigChangeEvent):
+        """在并发数限制内应用单个配置变更并通知监听器"""
+        async with semaphore:
+            if self.auto_apply_changes:
+                await self._apply_config_change(event)
+            await self._notify_listeners(event)
+    
+    def _cached_key(self, config: ModelConfig) -> tuple:
+        """返回配置比较键，缓存中的配置只生成一次"""
+        entry = self._config_keys.get(config.id)
+        if entry is not None and entry[0] is config:
+            return entry[1]
+        key = _config_key(config)
+        if self._config_cache.get(config.id) is config:
+            self._config_keys[config.id] = (config, key)
+        return key
+    
     def _configs_differ(self, config1: ModelConfig, config2: ModelConfig) -> bool:
         """比较两个配置是否不同"""
         try:
-            # 比较基本字段
-            basic_fields = ['name', 'framework', 'model_path', 'priority', 'gpu_devices']
-            for field in basic_fields:
-                if getattr(config1, field) != getattr(config2, field):
-                    return True
-            
-            # 比较参数（JSON序列化后比较）
-            if json.dumps(config1.parameters, sort_keys=True) != json.dumps(config2.parameters, sort_keys=True):
-                return True
-            
-            # 比较资源需求
-            if (config1.resource_requirements.gpu_memory != config2.resource_requirements.gpu_memory or
-                config1.resource_requirements.gpu_devices != config2.resource_requirements.gpu_devices or
-                config1.resource_requirements.cpu_cores != config2.resource_requirements.cpu_cores or
-                config1.resource_requirements.system_memory != config2.resource_requirements.system_memory):
-                return True
-            
-            # 比较健康检查配置
-            hc1, hc2 = config1.health_check, config2.health_check
-            if (hc1.enabled != hc2.enabled or hc1.interval != hc2.interval or
-                hc1.timeout != hc2.timeout or hc1.max_failures != hc2.max_failures or
-                hc1.endpoint != hc2.endpoint):
-                return True
-            
-            # 比较重试策略
-            rp1, rp2 = config1.retry_policy, config2.retry_policy
-            if (rp1.enabled != rp2.enabled or rp1.max_attempts != rp2.max_attempts or
-                rp1.initial_delay != rp2.initial_delay or rp1.max_delay != rp2.max_delay or
-                rp1.backoff_factor != rp2.backoff_factor):
-                return True
-            
-            return False
-            
+            return self._cached_key(config1) != self._cached_key(config2)
         except Exception as e:
             logger.error(f"比较配置时发生异常: {e}")
             return True  # 发生异常时认为配置不同，触发更新
@@ -483,16 +534,22 @@ class ConfigHotReloadService:
         return False
     
     async def _notify_listeners(self, event: ConfigChangeEvent):
-        """通知配置变更监听器"""
+        """通知配置变更监听器：同步监听器依次调用，异步监听器并发执行"""
         try:
-            for listener in self._change_listeners:
+            for listener in self._sync_listeners:
                 try:
-                    if asyncio.iscoroutinefunction(listener):
-                        await listener(event)
-                    else:
-                        listener(event)
+                    listener(event)
                 except Exception as e:
                     logger.error(f"配置变更监听器 {listener.__name__} 执行失败: {e}")
+            
+            if self._async_listeners:
+                listeners = tuple(self._async_listeners)
+                results = await asyncio.gather(
+                    *(listener(event) for listener in listeners), return_exceptions=True
+                )
+                for listener, result in zip(listeners, results):
+                    if isinstance(result, Exception):
+                        logger.error(f"配置变更监听器 {listener.__name__} 执行失败: {result}")
         except Exception as e:
             logger.error(f"通知配置变更监听器失败: {e}")
     
@@ -503,9 +560,10 @@ class ConfigHotReloadService:
             "enabled": self.enabled,
             "auto_apply_changes": self.auto_apply_changes,
             "check_interval": self.check_interval,
+            "current_interval": self._current_interval(),
             "cached_configs_count": len(self._config_cache),
             "listeners_count": len(self._change_listeners),
-            "last_check_time": self._last_check_time.isoformat() if self._last_check_time else None
+            "last_check_time": datetime.fromtimestamp(self._last_check_time).isoformat() if self._last_check_time else None
         }
     
     def set_check_interval(self, interval: int):
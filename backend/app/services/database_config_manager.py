@@ -6,8 +6,8 @@ import json
 import logging
 import hashlib
 from datetime import datetime
-from typing import List, Dict, Any, Optional
-from sqlalchemy import select, delete, update, and_, or_
+from typing import List, Dict, Any, Optional, Callable, Tuple
+from sqlalchemy import select, delete, update, insert, and_, or_
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from sqlalchemy.orm import selectinload
 
@@ -15,20 +15,46 @@ from .base import ConfigManagerInterface
 from ..models.schemas import ModelConfig, ValidationResult, ResourceRequirement, HealthCheckConfig, RetryPolicy
 from ..models.database import (
     ModelConfigDB, SystemConfigDB, ConfigBackupDB, ConfigChangeLogDB, 
-    ModelStatusDB, AlertRuleDB
+    ModelStatusDB, encode_json_payload, compress_payload, pack_bitmask, changed_fields_mask
 )
-from ..models.enums import FrameworkType
-from ..core.database import AsyncSessionLocal, get_async_db
+from ..models.enums import FrameworkType, ModelStatus
+from ..core.database import AsyncSessionLocal, get_async_db, WriteBehindQueue
 
 logger = logging.getLogger(__name__)
 
+# 预先构造的插入语句，热路径复用同一对象以命中编译缓存
+INSERT_CHANGE_LOG = insert(ConfigChangeLogDB.__table__)
+
+# 配置变更日志后写队列，审计日志不阻塞配置保存路径
+change_log_writer = WriteBehindQueue(INSERT_CHANGE_LOG, name="config_change_logs")
+
 class DatabaseConfigManager(ConfigManagerInterface):
     """基于数据库的配置管理器"""
     
     def __init__(self):
         self.session_factory = AsyncSessionLocal
+        # 配置写入监听器，提交成功后以模型ID回调，供热重载服务只重新加载变更的配置
+        self._change_listeners: List[Callable[[str], None]] = []
         logger.info("数据库配置管理器初始化")
     
+    def add_change_listener(self, listener: Callable[[str], None]):
+        """添加配置写入监听器"""
+        if listener not in self._change_listeners:
+            self._change_listeners.append(listener)
+    
+    def remove_change_listener(self, listener: Callable[[str], None]):
+        """移除配置写入监听器"""
+        if listener in self._change_listeners:
+            self._change_listeners.remove(listener)
+    
+    def _publish_change(self, model_id: str):
+        """通知监听器模型配置已写入"""
+        for listener in self._change_listeners:
+            try:
+                listener(model_id)
+            except Exception as e:
+                logger.error(f"配置写入监听器执行失败: {e}")
+    
     async def initialize(self):
         """初始化配置管理器"""
         try:
@@ -65,9 +91,9 @@ class DatabaseConfigManager(ConfigManagerInterface):
                 existing_config = existing.scalar_one_or_none()
                 
                 if existing_config:
-                    # 记录变更日志
-                    await self._log_config_change(
-                        session, config.id, "update", 
+                    # 生成变更日志
+                    change_log = self._build_change_log(
+                        config.id, "update", 
                         self._db_to_dict(existing_config), 
                         self._config_to_dict(config)
                     )
@@ -79,27 +105,35 @@ class DatabaseConfigManager(ConfigManagerInterface):
                     db_config = self._config_to_db(config)
                     session.add(db_config)
                     
-                    # 记录变更日志
-                    await self._log_config_change(
-                        session, config.id, "create", 
+                    # 生成变更日志
+                    change_log = self._build_change_log(
+                        config.id, "create", 
                         None, self._config_to_dict(config)
                     )
                 
                 await session.commit()
                 logger.info(f"模型配置 {config.id} 保存成功")
-                return True
+            
+            # 提交成功后才放入后写队列，保存失败回滚时不会留下不存在的变更记录
+            change_log_writer.enqueue(change_log)
+            
+            self._publish_change(config.id)
+            return True
                 
         except Exception as e:
             logger.error(f"保存模型配置 {config.id} 失败: {e}")
             return False
     
-    async def load_model_configs(self) -> List[ModelConfig]:
-        """从数据库加载所有模型配置"""
+    async def load_model_configs(self, gpu_device: Optional[int] = None) -> List[ModelConfig]:
+        """从数据库加载所有模型配置，指定gpu_device时只加载使用该GPU设备的配置"""
         try:
             async with self.session_factory() as session:
+                stmt = select(ModelConfigDB).where(ModelConfigDB.is_active == True)
+                if gpu_device is not None:
+                    # 按GPU设备位图过滤，不再解析gpu_devices JSON
+                    stmt = stmt.where(ModelConfigDB.uses_gpu(gpu_device))
                 result = await session.execute(
-                    select(ModelConfigDB).where(ModelConfigDB.is_active == True)
-                    .order_by(ModelConfigDB.priority.desc(), ModelConfigDB.created_at)
+                    stmt.order_by(ModelConfigDB.priority.desc(), ModelConfigDB.created_at)
                 )
                 db_configs = result.scalars().all()
                 
@@ -119,6 +153,51 @@ class DatabaseConfigManager(ConfigManagerInterface):
             logger.error(f"从数据库加载模型配置失败: {e}")
             return []
     
+    async def load_model_configs_since(
+        self, since: Optional[datetime]
+    ) -> Tuple[List[ModelConfig], List[str], Optional[datetime]]:
+        """加载更新时间不早于since的模型配置变更
+        
+        删除为软删除且会刷新更新时间，因此同一查询即可得到已删除配置的ID。since为None时
+        返回全部记录。返回(活跃配置列表, 已删除模型ID列表, 本批记录的最大更新时间)；没有
+        变更时最大更新时间沿用since。查询失败时抛出异常，避免被当作没有变更。
+        """
+        stmt = select(ModelConfigDB)
+        if since is not None:
+            # 更新时间精度为秒，同一秒内稍后的写入需要用>=才不会漏掉，重复返回的记录由调用方去重
+            stmt = stmt.where(ModelConfigDB.updated_at >= since)
+        
+        async with self.session_factory() as session:
+            result = await session.execute(stmt)
+            db_configs = result.scalars().all()
+        
+        configs, deleted_ids = [], []
+        watermark = since
+        for db_config in db_configs:
+            if watermark is None or db_config.updated_at > watermark:
+                watermark = db_config.updated_at
+            if not db_config.is_active:
+                deleted_ids.append(db_config.id)
+                continue
+            try:
+                configs.append(self._db_to_config(db_config))
+            except Exception as e:
+                logger.error(f"反序列化配置 {db_config.id} 失败: {e}")
+        
+        return configs, deleted_ids, watermark
+    
+    async def load_model_config(self, model_id: str) -> Optional[ModelConfig]:
+        """从数据库加载单个活跃的模型配置，不存在时返回None
+        
+        查询失败时直接抛出异常，避免调用方把查询失败误判为配置已删除。
+        """
+        async with self.session_factory() as session:
+            result = await session.execute(
+                select(ModelConfigDB).where(ModelConfigDB.id == model_id, ModelConfigDB.is_active == True)
+            )
+            db_config = result.scalar_one_or_none()
+            return self._db_to_config(db_config) if db_config is not None else None
+    
     async def delete_model_config(self, model_id: str) -> bool:
         """从数据库删除模型配置"""
         try:
@@ -134,11 +213,10 @@ class DatabaseConfigManager(ConfigManagerInterface):
                 if existing_config:
                     # 软删除：标记为非活跃
                     existing_config.is_active = False
-                    existing_config.updated_at = datetime.now()
                     
-                    # 记录变更日志
-                    await self._log_config_change(
-                        session, model_id, "delete", 
+                    # 生成变更日志
+                    change_log = self._build_change_log(
+                        model_id, "delete", 
                         self._db_to_dict(existing_config), None
                     )
                     
@@ -146,13 +224,33 @@ class DatabaseConfigManager(ConfigManagerInterface):
                     logger.info(f"模型配置 {model_id} 删除成功")
                 else:
                     logger.warning(f"模型配置 {model_id} 不存在")
+                    return True
+            
+            change_log_writer.enqueue(change_log)
+            self._publish_change(model_id)
+            return True
                 
+        except Exception as e:
+            logger.error(f"删除模型配置 {model_id} 失败: {e}")
+            return False
+    
+    async def save_model_status(self, model_id: str, status: ModelStatus, **fields: Any) -> bool:
+        """保存模型运行状态，单条UPSERT语句完成插入或更新"""
+        try:
+            async with self.session_factory() as session:
+                row = {"model_id": model_id, "status": status, **fields}
+                await session.execute(ModelStatusDB.upsert_statement(frozenset(row)), row)
+                await session.commit()
                 return True
                 
         except Exception as e:
-            logger.error(f"删除模型配置 {model_id} 失败: {e}")
+            logger.error(f"保存模型状态 {model_id} 失败: {e}")
             return False
     
+    async def on_model_status_change(self, model_id: str, old_status: ModelStatus, new_status: ModelStatus):
+        """模型管理器状态变更回调，将新状态写入model_status表"""
+        await self.save_model_status(model_id, new_status)
+    
     async def validate_config(self, config: ModelConfig) -> ValidationResult:
         """验证模型配置"""
         errors = []
@@ -266,18 +364,18 @@ class DatabaseConfigManager(ConfigManagerInterface):
                     "configs": [self._db_to_dict(config) for config in configs]
                 }
                 
-                backup_json = json.dumps(backup_data, ensure_ascii=False, indent=2)
-                backup_size = len(backup_json.encode('utf-8'))
+                payload = encode_json_payload(backup_data)
+                compressed = compress_payload(payload)
                 
-                # 计算校验和
-                checksum = hashlib.sha256(backup_json.encode('utf-8')).hexdigest()
+                # 计算校验和（基于未压缩数据）
+                checksum = hashlib.sha256(payload).hexdigest()
                 
                 # 创建备份记录
                 backup_record = ConfigBackupDB(
                     backup_name=backup_name,
                     backup_type="model_configs",
-                    backup_data=backup_json,
-                    backup_size=backup_size,
+                    backup_data=compressed,
+                    backup_size=len(payload),
                     checksum=checksum,
                     description=f"模型配置自动备份，包含 {len(configs)} 个配置"
                 )
@@ -309,15 +407,13 @@ class DatabaseConfigManager(ConfigManagerInterface):
                     return False
                 
                 # 验证备份数据完整性
-                backup_json = backup_record.backup_data
-                checksum = hashlib.sha256(backup_json.encode('utf-8')).hexdigest()
+                backup_data = backup_record.backup_data
+                checksum = hashlib.sha256(encode_json_payload(backup_data)).hexdigest()
                 
                 if checksum != backup_record.checksum:
                     logger.error(f"备份数据校验失败: {backup_name}")
                     return False
                 
-                # 解析备份数据
-                backup_data = json.loads(backup_json)
                 configs_data = backup_data.get("configs", [])
                 
                 # 创建当前配置的备份
@@ -361,6 +457,7 @@ class DatabaseConfigManager(ConfigManagerInterface):
                         "backup_name": record.backup_name,
                         "backup_type": record.backup_type,
                         "backup_size": record.backup_size,
+                        "compressed_size": record.compressed_size,
                         "description": record.description,
                         "created_at": record.created_at,
                         "checksum": record.checksum
@@ -414,6 +511,7 @@ class DatabaseConfigManager(ConfigManagerInterface):
             model_path=config.model_path,
             priority=config.priority,
             gpu_devices=config.gpu_devices,
+            gpu_device_mask=pack_bitmask(config.gpu_devices),
             parameters=config.parameters,
             gpu_memory=config.resource_requirements.gpu_memory,
             cpu_cores=config.resource_requirements.cpu_cores,
@@ -428,8 +526,9 @@ class DatabaseConfigManager(ConfigManagerInterface):
             retry_initial_delay=config.retry_policy.initial_delay,
             retry_max_delay=config.retry_policy.max_delay,
             retry_backoff_factor=config.retry_policy.backoff_factor,
-            created_at=config.created_at or datetime.now(),
-            updated_at=config.updated_at or datetime.now()
+            # 未指定时由数据库服务端填充时间戳
+            created_at=config.created_at,
+            updated_at=config.updated_at
         )
     
     def _db_to_config(self, db_config: ModelConfigDB) -> ModelConfig:
@@ -479,6 +578,7 @@ class DatabaseConfigManager(ConfigManagerInterface):
         db_config.model_path = config.model_path
         db_config.priority = config.priority
         db_config.gpu_devices = config.gpu_devices
+        db_config.gpu_device_mask = pack_bitmask(config.gpu_devices)
         db_config.parameters = config.parameters
         db_config.gpu_memory = config.resource_requirements.gpu_memory
         db_config.cpu_cores = config.resource_requirements.cpu_cores
@@ -493,7 +593,6 @@ class DatabaseConfigManager(ConfigManagerInterface):
         db_config.retry_initial_delay = config.retry_policy.initial_delay
         db_config.retry_max_delay = config.retry_policy.max_delay
         db_config.retry_backoff_factor = config.retry_policy.backoff_factor
-        db_config.updated_at = datetime.now()
     
     def _config_to_dict(self, config: ModelConfig) -> Dict[str, Any]:
         """将ModelConfig转换为字典"""
@@ -644,32 +743,26 @@ class DatabaseConfigManager(ConfigManagerInterface):
             updated_at=updated_at
         )
     
-    async def _log_config_change(self, session, model_id: str, change_type: str, 
-                                old_value: Optional[Dict], new_value: Optional[Dict]):
-        """记录配置变更日志"""
-        try:
-            # 计算变更字段
-            changed_fields = []
-            if old_value and new_value:
-                for key in new_value:
-                    if key not in old_value or old_value[key] != new_value[key]:
-                        changed_fields.append(key)
-            
-            change_log = ConfigChangeLogDB(
-                model_id=model_id,
-                change_type=change_type,
-                old_value=old_value,
-                new_value=new_value,
-                changed_fields=changed_fields,
-                change_reason=f"通过API {change_type} 配置",
-                changed_by="system",
-                created_at=datetime.now()
-            )
-            
-            session.add(change_log)
-            
-        except Exception as e:
-            logger.error(f"记录配置变更日志失败: {e}")
+    def _build_change_log(self, model_id: str, change_type: str, 
+                          old_value: Optional[Dict], new_value: Optional[Dict]) -> Dict[str, Any]:
+        """生成配置变更日志行，由调用方在事务提交成功后放入后写队列批量写入"""
+        # 计算变更字段
+        changed_fields = []
+        if old_value and new_value:
+            for key in new_value:
+                if key not in old_value or old_value[key] != new_value[key]:
+                    changed_fields.append(key)
+        
+        return {
+            "model_id": model_id,
+            "change_type": change_type,
+            "old_value": old_value,
+            "new_value": new_value,
+            "changed_fields": changed_fields,
+            "changed_fields_mask": changed_fields_mask(changed_fields),
+            "change_reason": f"通过API {change_type} 配置",
+            "changed_by": "system"
+        }
     
     async def _migrate_configs(self):
         """执行配置迁移"""
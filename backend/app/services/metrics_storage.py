@@ -5,7 +5,7 @@ import asyncio
 import sqlite3
 import aiosqlite
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 from dataclasses import dataclass
 import json
 import logging
@@ -14,6 +14,9 @@ from ..models.schemas import TimeRange
 
 logger = logging.getLogger(__name__)
 
+# GPU指标汇总桶宽度(秒)及保留天数：1分钟汇总保留30天，1小时汇总保留1年
+GPU_ROLLUP_RETENTION_DAYS = {60: 30, 3600: 365}
+
 
 @dataclass
 class PerformanceMetrics:
@@ -107,12 +110,100 @@ class TimeSeriesMetrics:
         return anomalies
 
 
+class GPUMetricsRollup:
+    """按设备和时间桶滚动聚合GPU指标
+    
+    每个(设备, 桶宽度)只保留当前桶的累计值，样本进入下一个桶时产出上一个桶的汇总行，
+    仪表盘按时间段的查询读取汇总表而不扫描原始指标。
+    """
+    
+    def __init__(self, bucket_widths: Tuple[int, ...] = tuple(GPU_ROLLUP_RETENTION_DAYS)):
+        self._bucket_widths = bucket_widths
+        self._buckets: Dict[Tuple[int, int], Dict[str, Any]] = {}
+    
+    @staticmethod
+    def bucket_start(timestamp: datetime, width: int) -> datetime:
+        """计算时间戳所在桶的起始时间（桶宽度需能整除一天）"""
+        seconds = timestamp.hour * 3600 + timestamp.minute * 60 + timestamp.second
+        return timestamp.replace(microsecond=0) - timedelta(seconds=seconds % width)
+    
+    def add(self, timestamp: datetime, gpu_metric: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """累加一个样本，返回因跨桶而完成的汇总行"""
+        completed = []
+        device_id = gpu_metric['device_id']
+        
+        for width in self._bucket_widths:
+            start = self.bucket_start(timestamp, width)
+            key = (device_id, width)
+            bucket = self._buckets.get(key)
+            
+            if bucket is not None and bucket['bucket_start'] != start:
+                completed.append(self._to_row(bucket))
+                bucket = None
+            
+            if bucket is None:
+                bucket = self._buckets[key] = {
+                    'device_id': device_id,
+                    'bucket_start': start,
+                    'bucket_width_seconds': width,
+                    'sample_count': 0,
+                    'util_sum': 0.0,
+                    'util_max': gpu_metric['utilization'],
+                    'util_min': gpu_metric['utilization'],
+                    'mem_used_sum': 0,
+                    'mem_used_max': gpu_metric['memory_used'],
+                    'temperature_max': gpu_metric['temperature'],
+                    'power_sum': 0.0
+                }
+            
+            bucket['sample_count'] += 1
+            bucket['util_sum'] += gpu_metric['utilization']
+            bucket['util_max'] = max(bucket['util_max'], gpu_metric['utilization'])
+            bucket['util_min'] = min(bucket['util_min'], gpu_metric['utilization'])
+            bucket['mem_used_sum'] += gpu_metric['memory_used']
+            bucket['mem_used_max'] = max(bucket['mem_used_max'], gpu_metric['memory_used'])
+            bucket['temperature_max'] = max(bucket['temperature_max'], gpu_metric['temperature'])
+            bucket['power_sum'] += gpu_metric['power_usage']
+        
+        return completed
+    
+    def current_row(self, device_id: int, width: int) -> Optional[Dict[str, Any]]:
+        """返回设备当前未完成桶的汇总行，不改变累计状态"""
+        bucket = self._buckets.get((device_id, width))
+        return self._to_row(bucket) if bucket is not None else None
+    
+    def flush(self) -> List[Dict[str, Any]]:
+        """产出所有未完成桶的汇总行并清空状态"""
+        rows = [self._to_row(bucket) for bucket in self._buckets.values()]
+        self._buckets.clear()
+        return rows
+    
+    @staticmethod
+    def _to_row(bucket: Dict[str, Any]) -> Dict[str, Any]:
+        """将桶累计值转换为汇总行"""
+        count = bucket['sample_count']
+        return {
+            'device_id': bucket['device_id'],
+            'bucket_start': bucket['bucket_start'],
+            'bucket_width_seconds': bucket['bucket_width_seconds'],
+            'sample_count': count,
+            'util_avg': bucket['util_sum'] / count,
+            'util_max': bucket['util_max'],
+            'util_min': bucket['util_min'],
+            'mem_used_avg': bucket['mem_used_sum'] / count,
+            'mem_used_max': bucket['mem_used_max'],
+            'temperature_max': bucket['temperature_max'],
+            'power_avg': bucket['power_sum'] / count
+        }
+
+
 class SQLiteMetricsStorage:
     """SQLite指标存储"""
     
     def __init__(self, db_path: str = "metrics.db"):
         self._db_path = db_path
         self._connection: Optional[aiosqlite.Connection] = None
+        self._gpu_rollup = GPUMetricsRollup()
     
     async def initialize(self):
         """初始化数据库"""
@@ -122,6 +213,8 @@ class SQLiteMetricsStorage:
     async def close(self):
         """关闭数据库连接"""
         if self._connection:
+            await self._store_gpu_rollups(self._gpu_rollup.flush())
+            await self._connection.commit()
             await self._connection.close()
     
     async def _create_tables(self):
@@ -154,6 +247,25 @@ class SQLiteMetricsStorage:
             )
         """)
         
+        # GPU指标汇总表（1分钟/1小时桶）
+        await self._connection.execute("""
+            CREATE TABLE IF NOT EXISTS gpu_metrics_rollup (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                device_id INTEGER NOT NULL,
+                bucket_start DATETIME NOT NULL,
+                bucket_width_seconds INTEGER NOT NULL,
+                sample_count INTEGER NOT NULL,
+                util_avg REAL NOT NULL,
+                util_max REAL NOT NULL,
+                util_min REAL NOT NULL,
+                mem_used_avg REAL NOT NULL,
+                mem_used_max INTEGER NOT NULL,
+                temperature_max REAL NOT NULL,
+                power_avg REAL NOT NULL,
+                UNIQUE (device_id, bucket_start, bucket_width_seconds)
+            )
+        """)
+        
         # 系统指标表
         await self._connection.execute("""
             CREATE TABLE IF NOT EXISTS system_metrics (
@@ -180,14 +292,14 @@ class SQLiteMetricsStorage:
         conn = await self._get_connection()
         timestamp = metrics_data.get('timestamp', datetime.now())
         
-        # 存储GPU指标
-        if 'gpu_metrics' in metrics_data:
-            for gpu_metric in metrics_data['gpu_metrics']:
-                await conn.execute("""
-                    INSERT INTO gpu_metrics 
-                    (timestamp, device_id, utilization, memory_used, memory_total, temperature, power_usage)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                """, (
+        # 存储GPU指标（单条语句批量插入）
+        if metrics_data.get('gpu_metrics'):
+            await conn.executemany("""
+                INSERT INTO gpu_metrics 
+                (timestamp, device_id, utilization, memory_used, memory_total, temperature, power_usage)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, [
+                (
                     timestamp,
                     gpu_metric['device_id'],
                     gpu_metric['utilization'],
@@ -195,16 +307,24 @@ class SQLiteMetricsStorage:
                     gpu_metric['memory_total'],
                     gpu_metric['temperature'],
                     gpu_metric['power_usage']
-                ))
-        
-        # 存储模型指标
-        if 'model_metrics' in metrics_data:
-            for model_metric in metrics_data['model_metrics']:
-                await conn.execute("""
-                    INSERT INTO model_metrics 
-                    (timestamp, model_id, status, health, response_time, requests_count, error_count)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                """, (
+                )
+                for gpu_metric in metrics_data['gpu_metrics']
+            ])
+            
+            # 更新汇总桶，跨桶时写入已完成的汇总行
+            rollups = []
+            for gpu_metric in metrics_data['gpu_metrics']:
+                rollups.extend(self._gpu_rollup.add(timestamp, gpu_metric))
+            await self._store_gpu_rollups(rollups)
+        
+        # 存储模型指标（单条语句批量插入）
+        if metrics_data.get('model_metrics'):
+            await conn.executemany("""
+                INSERT INTO model_metrics 
+                (timestamp, model_id, status, health, response_time, requests_count, error_count)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, [
+                (
                     timestamp,
                     model_metric['model_id'],
                     model_metric['status'],
@@ -212,7 +332,9 @@ class SQLiteMetricsStorage:
                     model_metric.get('response_time'),
                     model_metric.get('requests_count', 0),
                     model_metric.get('error_count', 0)
-                ))
+                )
+                for model_metric in metrics_data['model_metrics']
+            ])
         
         # 存储系统指标
         if 'system_metrics' in metrics_data:
@@ -232,6 +354,89 @@ class SQLiteMetricsStorage:
         
         await conn.commit()
     
+    async def _store_gpu_rollups(self, rollups: List[Dict[str, Any]]):
+        """写入GPU汇总行
+        
+        关闭时写入的未完成桶在重启后可能再次写入同一桶，此时合并而不是覆盖：
+        样本数相加，均值按样本数加权，最大/最小值取极值。
+        """
+        if not rollups:
+            return
+        
+        await self._connection.executemany("""
+            INSERT INTO gpu_metrics_rollup
+            (device_id, bucket_start, bucket_width_seconds, sample_count, util_avg, util_max,
+             util_min, mem_used_avg, mem_used_max, temperature_max, power_avg)
+            VALUES (:device_id, :bucket_start, :bucket_width_seconds, :sample_count, :util_avg, :util_max,
+                    :util_min, :mem_used_avg, :mem_used_max, :temperature_max, :power_avg)
+            ON CONFLICT (device_id, bucket_start, bucket_width_seconds) DO UPDATE SET
+                sample_count = sample_count + excluded.sample_count,
+                util_avg = (util_avg * sample_count + excluded.util_avg * excluded.sample_count)
+                           / (sample_count + excluded.sample_count),
+                util_max = MAX(util_max, excluded.util_max),
+                util_min = MIN(util_min, excluded.util_min),
+                mem_used_avg = (mem_used_avg * sample_count + excluded.mem_used_avg * excluded.sample_count)
+                               / (sample_count + excluded.sample_count),
+                mem_used_max = MAX(mem_used_max, excluded.mem_used_max),
+                temperature_max = MAX(temperature_max, excluded.temperature_max),
+                power_avg = (power_avg * sample_count + excluded.power_avg * excluded.sample_count)
+                            / (sample_count + excluded.sample_count)
+        """, rollups)
+    
+    async def aggregate_gpu_metrics(self, device_id: int, time_range: TimeRange,
+                                    interval_minutes: int = 5) -> List[Dict[str, Any]]:
+        """按时间间隔聚合GPU指标，读取汇总表而非原始指标，并合并内存中尚未写入的当前桶"""
+        conn = await self._get_connection()
+        interval_seconds = interval_minutes * 60
+        # 选择不超过查询间隔的最大汇总粒度
+        width = max(
+            (w for w in GPU_ROLLUP_RETENTION_DAYS if w <= interval_seconds),
+            default=min(GPU_ROLLUP_RETENTION_DAYS)
+        )
+        
+        cursor = await conn.execute("""
+            SELECT bucket_start, sample_count, util_avg, util_max, mem_used_avg, temperature_max
+            FROM gpu_metrics_rollup
+            WHERE device_id = ? AND bucket_width_seconds = ? AND bucket_start BETWEEN ? AND ?
+            ORDER BY bucket_start
+        """, (device_id, width, time_range.start_time, time_range.end_time))
+        rows = await cursor.fetchall()
+        
+        # 最新的桶仍在内存中累计，合并进来，仪表盘才能看到最近一个时间窗口
+        current = self._gpu_rollup.current_row(device_id, width)
+        if current is not None and time_range.start_time <= current['bucket_start'] <= time_range.end_time:
+            rows.append((current['bucket_start'], current['sample_count'], current['util_avg'],
+                         current['util_max'], current['mem_used_avg'], current['temperature_max']))
+        
+        # 将汇总行合并到查询间隔，均值按样本数加权
+        intervals: Dict[datetime, Dict[str, Any]] = {}
+        for bucket_start, count, util_avg, util_max, mem_used_avg, temperature_max in rows:
+            if isinstance(bucket_start, str):
+                bucket_start = datetime.fromisoformat(bucket_start)
+            start = GPUMetricsRollup.bucket_start(bucket_start, interval_seconds)
+            interval = intervals.setdefault(start, {
+                'timestamp': start, 'samples': 0, 'util_sum': 0.0, 'max_utilization': util_max,
+                'mem_sum': 0.0, 'max_temperature': temperature_max
+            })
+            interval['samples'] += count
+            interval['util_sum'] += util_avg * count
+            interval['mem_sum'] += mem_used_avg * count
+            interval['max_utilization'] = max(interval['max_utilization'], util_max)
+            interval['max_temperature'] = max(interval['max_temperature'], temperature_max)
+        
+        return [
+            {
+                'timestamp': interval['timestamp'],
+                'device_id': device_id,
+                'avg_utilization': interval['util_sum'] / interval['samples'],
+                'max_utilization': interval['max_utilization'],
+                'avg_memory_used': interval['mem_sum'] / interval['samples'],
+                'max_temperature': interval['max_temperature'],
+                'sample_count': interval['samples']
+            }
+            for interval in intervals.values()
+        ]
+    
     async def query_metrics(self, query: MetricsQuery) -> List[Dict[str, Any]]:
         """查询指标数据"""
         conn = await self._get_connection()
@@ -361,6 +566,14 @@ class SQLiteMetricsStorage:
         for table in ['gpu_metrics', 'model_metrics', 'system_metrics']:
             await conn.execute(f"DELETE FROM {table} WHERE timestamp < ?", (cutoff_date,))
         
+        # 汇总表按各自粒度的保留期清理
+        now = datetime.now()
+        for width, retention_days in GPU_ROLLUP_RETENTION_DAYS.items():
+            await conn.execute(
+                "DELETE FROM gpu_metrics_rollup WHERE bucket_width_seconds = ? AND bucket_start < ?",
+                (width, now - timedelta(days=retention_days))
+            )
+        
         await conn.commit()
     
     async def export_metrics(self, time_range: TimeRange, format: str = 'json') -> Dict[str, Any]:
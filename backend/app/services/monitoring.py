@@ -14,7 +14,7 @@ from collections import defaultdict, deque
 from .base import MonitoringServiceInterface
 from .metrics_storage import SQLiteMetricsStorage, MetricsStorageService
 from ..models.schemas import (
-    GPUInfo, GPUMetrics, SystemOverview, ModelInfo, 
+    GPUInfo, GPUMetrics, GPUMetricsPacked, SystemOverview, ModelInfo, 
     TimeRange, Metrics, AlertRule, ModelPerformanceMetrics,
     SystemResourceMetrics, AlertEvent
 )
@@ -114,9 +114,9 @@ class GPUMetricsCollector(MetricsCollector):
         try:
             metrics = await self.gpu_detector.get_all_gpu_metrics()
             
-            # 存储历史数据
+            # 存储历史数据（定点压缩形式）
             for metric in metrics:
-                self._metrics_history[metric.device_id].append(metric)
+                self._metrics_history[metric.device_id].append(GPUMetricsPacked.from_raw(metric))
             
             return metrics
             
@@ -129,9 +129,9 @@ class GPUMetricsCollector(MetricsCollector):
         history = self._metrics_history.get(device_id, deque())
         filtered_metrics = []
         
-        for metric in history:
-            if time_range.start_time <= metric.timestamp <= time_range.end_time:
-                filtered_metrics.append(metric)
+        for packed in history:
+            if time_range.start_time <= packed.timestamp <= time_range.end_time:
+                filtered_metrics.append(packed.unpack())
         
         return filtered_metrics
 
@@ -151,10 +151,12 @@ class ModelPerformanceCollector(MetricsCollector):
         try:
             metrics = []
             models = await self.model_manager.list_models()
+            # 同一次采样的所有模型共用一个时间戳
+            timestamp = datetime.now()
             
             for model in models:
                 if model.status == ModelStatus.RUNNING:
-                    metric = await self._collect_model_metrics(model)
+                    metric = await self._collect_model_metrics(model, timestamp)
                     if metric:
                         metrics.append(metric)
                         # 存储历史数据
@@ -166,8 +168,9 @@ class ModelPerformanceCollector(MetricsCollector):
             logger.error(f"收集模型性能指标失败: {e}")
             return []
     
-    async def _collect_model_metrics(self, model: ModelInfo) -> Optional[ModelPerformanceMetrics]:
-        """收集单个模型的性能指标"""
+    async def _collect_model_metrics(self, model: ModelInfo,
+                                     timestamp: Optional[datetime] = None) -> Optional[ModelPerformanceMetrics]:
+        """收集单个模型的性能指标，timestamp为本次采样时间，未指定时取当前时间"""
         try:
             # 获取模型进程信息
             memory_usage = model.memory_usage or 0
@@ -179,7 +182,7 @@ class ModelPerformanceCollector(MetricsCollector):
             # 创建性能指标
             metric = ModelPerformanceMetrics(
                 model_id=model.id,
-                timestamp=datetime.now(),
+                timestamp=timestamp or datetime.now(),
                 request_count=self._request_counters.get(model.id, 0),
                 total_response_time=sum(response_times),
                 error_count=self._error_counters.get(model.id, 0),
@@ -253,7 +256,7 @@ class SystemResourceCollector(MetricsCollector):
             network_recv = network.bytes_recv
             
             # 系统负载
-            load_average = list(psutil.getloadavg()) if hasattr(psutil, 'getloadavg') else [0.0, 0.0, 0.0]
+            load_average = psutil.getloadavg() if hasattr(psutil, 'getloadavg') else (0.0, 0.0, 0.0)
             
             metric = SystemResourceMetrics(
                 timestamp=datetime.now(),
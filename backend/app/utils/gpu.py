@@ -413,11 +413,13 @@ class GPUDetector:
         """获取所有GPU的实时指标"""
         gpus = await self.detect_gpus()
         metrics = []
+        # 同一次采样的所有GPU共用一个时间戳，每次采样只构造一个datetime
+        timestamp = datetime.now()
         
         for gpu in gpus:
             metric = GPUMetrics(
                 device_id=gpu.device_id,
-                timestamp=datetime.now(),
+                timestamp=timestamp,
                 utilization=gpu.utilization,
                 memory_used=gpu.memory_used,
                 memory_total=gpu.memory_total,
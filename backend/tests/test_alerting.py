@@ -3,14 +3,30 @@
 """
 import pytest
 import asyncio
+import threading
+import json
+import smtplib
+import warnings
+from collections import deque
 from datetime import datetime, timedelta
 from unittest.mock import AsyncMock, patch, MagicMock
+from pydantic import ValidationError
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
 
+from app.core.config import settings
 from app.services.alerting import (
-    AlertingService, Alert, AlertCondition, AlertSeverity, AlertStatus,
-    EmailNotificationSender, WebhookNotificationSender, SlackNotificationSender
+    AlertingService, Alert, AlertCondition, AlertSeverity, AlertStatus, NotificationChannel,
+    EmailNotificationSender, WebhookNotificationSender, SlackNotificationSender, NotificationSender,
+    SMTPConnectionPool, METRIC_HISTORY_MAXLEN, RULES_SNAPSHOT_MAX_AGE
+)
+from app.models.database import AlertRule
+from app.models.enums import NotificationChannelFlag, AlertSeverity as DBAlertSeverity
+from app.models.schemas import (
+    AlertRuleCreate, AlertRuleUpdate, AlertConditionSchema, NotificationConfig, AlertResponse,
+    alert_history_rows_adapter
 )
-from app.models.schemas import AlertRuleCreate, AlertConditionSchema, NotificationConfig
 
 
 class TestAlertCondition:
@@ -61,6 +77,108 @@ class TestAlertCondition:
         
         assert condition.evaluate(0.0, 10) == True
         assert condition.evaluate(1.0, 10) == False
+    
+    def test_unknown_operator_never_matches(self):
+        """测试未知操作符不触发"""
+        condition = AlertCondition(metric="cpu_usage", operator="~", threshold=0.0, duration=0)
+        
+        assert condition.evaluate(100.0, 60) == False
+        assert condition.matches(100.0) == False
+
+
+class TestAlertSchemas:
+    """告警接口模式测试类"""
+    
+    def test_rule_rejects_unknown_severity(self):
+        """测试规则严重程度只接受已定义的取值"""
+        condition = AlertConditionSchema(metric="cpu_usage", operator=">", threshold=80.0, duration=60)
+        
+        with pytest.raises(ValidationError):
+            AlertRuleCreate(name="test", condition=condition, severity="warning")
+        
+        assert AlertRuleUpdate(severity="critical").severity == "critical"
+    
+    def test_update_fields_derived_from_create(self):
+        """测试更新请求与创建请求字段一致且全部可选"""
+        update = AlertRuleUpdate(enabled=False)
+        
+        assert list(AlertRuleUpdate.model_fields) == list(AlertRuleCreate.model_fields)
+        assert update.model_dump(exclude_unset=True) == {"enabled": False}
+        assert update.name is None and update.notification_channels is None
+    
+    def test_condition_rejects_unknown_operator(self):
+        """测试告警条件只接受比较操作符表中的操作符"""
+        with pytest.raises(ValidationError):
+            AlertConditionSchema(metric="cpu_usage", operator="gt", threshold=80.0, duration=60)
+    
+    def test_alert_response_rejects_unknown_status(self):
+        """测试告警状态只接受已定义的取值"""
+        fields = dict(id="a1", rule_id="r1", rule_name="test", severity="high", message="msg",
+                      labels={}, annotations={}, starts_at=datetime.now())
+        
+        assert AlertResponse(status="suppressed", **fields).status == "suppressed"
+        with pytest.raises(ValidationError):
+            AlertResponse(status="firing", **fields)
+    
+    def test_label_keys_interned(self):
+        """测试不同告警的相同标签键共享同一字符串对象"""
+        fields = dict(rule_id="r1", rule_name="test", severity="high", status="active", message="msg",
+                      annotations={}, starts_at=datetime.now())
+        key = "".join(["inst", "ance"])
+        
+        first = AlertResponse(id="a1", labels={key: "host-1"}, **fields)
+        second = AlertResponse(id="a2", labels={"".join(["inst", "ance"]): "host-2"}, **fields)
+        
+        first_key, = first.labels
+        second_key, = second.labels
+        assert first_key is second_key
+        assert second.labels == {"instance": "host-2"}
+    
+    def test_history_rows_serialized_as_objects(self):
+        """测试告警历史列表按投影列输出为对象，严重程度枚举输出其取值"""
+        rows = [dict(id=7, alert_id="alert_1", rule_name="GPU温度过高", severity=AlertSeverity.HIGH,
+                     starts_at=datetime(2026, 10, 17, 8, 0), status="active")]
+        
+        assert json.loads(alert_history_rows_adapter.dump_json(rows)) == [
+            {"id": 7, "alert_id": "alert_1", "rule_name": "GPU温度过高", "severity": "high",
+             "starts_at": "2026-10-17T08:00:00", "status": "active"}
+        ]
+        assert alert_history_rows_adapter.json_schema()["$defs"]["AlertHistoryRow"]["type"] == "object"
+    
+    def test_history_rows_enum_members_serialized_without_warning(self):
+        """测试数据库返回的严重程度、状态枚举成员按取值输出，不产生序列化告警"""
+        rows = [dict(id=1, alert_id="alert_1", rule_name="GPU温度过高", severity=DBAlertSeverity.CRITICAL,
+                     starts_at=datetime(2026, 10, 17, 8, 0), status=AlertStatus.RESOLVED),
+                dict(id=2, alert_id="alert_2", rule_name="显存不足", severity=AlertSeverity.LOW,
+                     starts_at=datetime(2026, 10, 17, 9, 0), status="active")]
+        
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            data = json.loads(alert_history_rows_adapter.dump_json(rows))
+        
+        assert [(row["severity"], row["status"]) for row in data] == [("critical", "resolved"), ("low", "active")]
+        row_schema = alert_history_rows_adapter.json_schema()["$defs"]["AlertHistoryRow"]
+        assert row_schema["properties"]["severity"]["enum"] == ["low", "medium", "high", "critical"]
+        assert row_schema["properties"]["status"]["enum"] == ["active", "resolved", "suppressed"]
+    
+    def test_notification_config_typed_channels(self):
+        """测试通知配置按渠道解析为具体模型并忽略未知字段"""
+        config = NotificationConfig(
+            email={"to_emails": ["admin@example.com"], "unknown": 1},
+            slack={"webhook_url": "https://hooks.slack.com/x"}
+        )
+        
+        assert config.email.to_emails == ["admin@example.com"]
+        assert config.email.smtp_port == 587
+        assert config.slack.channel == "#alerts"
+        assert config.model_dump(exclude_none=True) == {
+            "email": {"smtp_port": 587, "to_emails": ["admin@example.com"]},
+            "slack": {"webhook_url": "https://hooks.slack.com/x", "channel": "#alerts",
+                      "username": "LLM Alert Bot"}
+        }
+        
+        with pytest.raises(ValidationError):
+            NotificationConfig(webhook={"timeout": "soon"})
 
 
 class TestNotificationSenders:
@@ -69,7 +187,7 @@ class TestNotificationSenders:
     @pytest.mark.asyncio
     async def test_email_notification_sender(self):
         """测试邮件通知发送器"""
-        sender = EmailNotificationSender()
+        sender = EmailNotificationSender(SMTPConnectionPool())
         
         alert = Alert(
             id="test_alert",
@@ -93,16 +211,47 @@ class TestNotificationSenders:
         
         # 模拟SMTP服务器
         with patch('smtplib.SMTP') as mock_smtp:
-            mock_server = MagicMock()
-            mock_smtp.return_value.__enter__.return_value = mock_server
+            mock_server = mock_smtp.return_value
             
             result = await sender.send(alert, config)
             
             assert result == True
+            mock_smtp.assert_called_once_with("smtp.example.com", 587, timeout=30)
             mock_server.starttls.assert_called_once()
             mock_server.login.assert_called_once_with("test@example.com", "password")
             mock_server.send_message.assert_called_once()
     
+    @pytest.mark.asyncio
+    async def test_smtp_pool_reuses_logged_in_connection(self):
+        """测试SMTP连接池复用已登录连接，达到发送上限后重建"""
+        pool = SMTPConnectionPool(messages_per_connection=2, max_rate=1000)
+        
+        with patch('smtplib.SMTP') as mock_smtp:
+            for _ in range(3):
+                await pool.send(MagicMock(), "smtp.example.com", 587, "user", "password")
+            
+            assert mock_smtp.call_count == 2
+            assert mock_smtp.return_value.login.call_count == 2
+            assert mock_smtp.return_value.send_message.call_count == 3
+            mock_smtp.return_value.quit.assert_called_once()
+            
+            await pool.close()
+            assert mock_smtp.return_value.quit.call_count == 2
+    
+    @pytest.mark.asyncio
+    async def test_smtp_pool_reconnects_dropped_connection(self):
+        """测试复用的连接已被服务器断开时重新连接并重试"""
+        pool = SMTPConnectionPool(max_rate=1000)
+        
+        with patch('smtplib.SMTP') as mock_smtp:
+            await pool.send(MagicMock(), "smtp.example.com", 587, "user", "password")
+            mock_smtp.return_value.send_message.side_effect = [smtplib.SMTPServerDisconnected(), None]
+            
+            await pool.send(MagicMock(), "smtp.example.com", 587, "user", "password")
+            
+            assert mock_smtp.call_count == 2
+            assert mock_smtp.return_value.send_message.call_count == 3
+    
     @pytest.mark.asyncio
     async def test_webhook_notification_sender(self):
         """测试Webhook通知发送器"""
@@ -135,6 +284,9 @@ class TestNotificationSenders:
             
             assert result == True
             mock_post.assert_called_once()
+            kwargs = mock_post.call_args.kwargs
+            assert json.loads(kwargs["data"])["alert"] == alert.to_dict()
+            assert kwargs["headers"] == {"Authorization": "Bearer token", "Content-Type": "application/json"}
     
     @pytest.mark.asyncio
     async def test_slack_notification_sender(self):
@@ -168,6 +320,32 @@ class TestNotificationSenders:
             
             assert result == True
             mock_post.assert_called_once()
+    
+    def test_email_body_uses_severity_template(self):
+        """测试邮件正文按严重程度模板渲染，告警字段中的$不被当作占位符"""
+        alert = Alert(id="a1", rule_id="r1", rule_name="费用$rule", severity=AlertSeverity.CRITICAL,
+                      message="msg", labels={"env": "prod"}, annotations={}, starts_at=datetime(2026, 10, 17, 8, 0))
+        
+        body = EmailNotificationSender(SMTPConnectionPool())._create_email_body(alert)
+        
+        assert 'style="color: #dc3545;">CRITICAL</td>' in body
+        assert "<td>费用$rule</td>" in body
+        assert "<tr><td>env</td><td>prod</td></tr>" in body
+        assert "2026-10-17 08:00:00" in body
+    
+    @pytest.mark.asyncio
+    async def test_http_senders_share_session(self):
+        """测试HTTP类发送器共用同一会话，关闭后重新创建"""
+        session = await WebhookNotificationSender().get_session()
+        
+        assert await SlackNotificationSender().get_session() is session
+        
+        await NotificationSender.close_session()
+        
+        assert session.closed
+        new_session = await WebhookNotificationSender().get_session()
+        assert new_session is not session
+        await NotificationSender.close_session()
 
 
 class TestAlertingService:
@@ -214,6 +392,46 @@ class TestAlertingService:
             mock_db.add.assert_called_once()
             mock_db.commit.assert_called_once()
     
+    @pytest.mark.asyncio
+    async def test_create_alert_rule_persists_condition(self):
+        """测试通过服务创建、更新规则并写入数据库，条件以字典形式保存"""
+        engine = create_engine("sqlite://", poolclass=StaticPool,
+                               connect_args={"check_same_thread": False})
+        AlertRule.__table__.create(engine)
+        db = sessionmaker(bind=engine)()
+        
+        rule_data = AlertRuleCreate(
+            name="CPU使用率告警",
+            condition=AlertConditionSchema(metric="cpu_usage", operator=">", threshold=80.0, duration=300),
+            severity="high",
+            notification_channels=["email", "webhook"]
+        )
+        
+        try:
+            created = await self.alerting_service.create_alert_rule(rule_data, db, rule_id="rule_e2e")
+            
+            db.expire_all()
+            stored = db.query(AlertRule).filter(AlertRule.id == "rule_e2e").one()
+            assert created.id == "rule_e2e"
+            assert stored.condition == {"metric": "cpu_usage", "operator": ">", "threshold": 80.0, "duration": 300}
+            assert stored.severity == "high"
+            assert stored.notification_channel_mask == int(NotificationChannelFlag.from_names(["email", "webhook"]))
+            assert self.alerting_service._get_condition(stored).matches(85.0)
+            
+            await self.alerting_service.update_alert_rule("rule_e2e", AlertRuleUpdate(
+                condition=AlertConditionSchema(metric="cpu_usage", operator=">", threshold=90.0, duration=60),
+                notification_channels=["webhook"]
+            ), db)
+            
+            db.expire_all()
+            stored = db.query(AlertRule).filter(AlertRule.id == "rule_e2e").one()
+            assert stored.condition == {"metric": "cpu_usage", "operator": ">", "threshold": 90.0, "duration": 60}
+            assert stored.notification_channel_mask == int(NotificationChannelFlag.from_names(["webhook"]))
+            assert stored.severity == "high"
+        finally:
+            db.close()
+            engine.dispose()
+    
     @pytest.mark.asyncio
     async def test_evaluate_metrics_trigger_alert(self):
         """测试指标评估触发告警"""
@@ -329,7 +547,53 @@ class TestAlertingService:
         assert result == True
         assert alert.status == AlertStatus.SUPPRESSED
     
-    def test_calculate_metric_duration(self):
+    @pytest.mark.asyncio
+    async def test_repeated_suppression_replaces_timer(self):
+        """测试重复抑制时取消旧定时器，只保留最近一次"""
+        alert = Alert(id="alert_789", rule_id="rule_789", rule_name="测试规则", severity=AlertSeverity.HIGH,
+                      message="测试告警", labels={}, annotations={}, starts_at=datetime.now())
+        self.alerting_service.active_alerts["rule_789_cpu_usage"] = alert
+        
+        await self.alerting_service.suppress_alert("alert_789", 30)
+        first_timer = self.alerting_service._suppress_timers["rule_789_cpu_usage"]
+        await self.alerting_service.suppress_alert("alert_789", 0)
+        await asyncio.sleep(0)
+        
+        assert first_timer.cancelled()
+        await asyncio.sleep(0.01)
+        assert alert.status == AlertStatus.ACTIVE
+        assert self.alerting_service._suppress_timers == {}
+    
+    @pytest.mark.asyncio
+    async def test_critical_alert_history_flushed_immediately(self):
+        """测试严重告警的历史立即写出，其他告警留在后写队列"""
+        def make_alert(alert_id, severity):
+            return Alert(id=alert_id, rule_id="r1", rule_name="测试规则", severity=severity,
+                         message="msg", labels={}, annotations={}, starts_at=datetime.now())
+        
+        with patch('app.services.alerting.alert_history_writer') as writer:
+            writer.flush = AsyncMock()
+            
+            await self.alerting_service._save_alert_history(make_alert("a1", AlertSeverity.HIGH), MagicMock())
+            writer.flush.assert_not_awaited()
+            
+            await self.alerting_service._save_alert_history(make_alert("a2", AlertSeverity.CRITICAL), MagicMock())
+            writer.flush.assert_awaited_once()
+            assert writer.enqueue.call_count == 2
+    
+    @pytest.mark.asyncio
+    async def test_suppress_resolved_alert_not_found(self):
+        """测试告警解除后按ID索引不再能找到"""
+        alert = Alert(id="alert_456", rule_id="rule_456", rule_name="测试规则", severity=AlertSeverity.LOW,
+                      message="测试告警", labels={}, annotations={}, starts_at=datetime.now())
+        self.alerting_service.active_alerts["rule_456_cpu_usage"] = alert
+        
+        del self.alerting_service.active_alerts["rule_456_cpu_usage"]
+        
+        assert self.alerting_service.active_alerts.key_for("alert_456") is None
+        assert await self.alerting_service.suppress_alert("alert_456") == False
+    
+    def test_rule_match_duration(self):
         """测试指标持续时间计算"""
         current_time = datetime.now()
         
@@ -348,12 +612,285 @@ class TestAlertingService:
             duration=60
         )
         
-        duration = self.alerting_service._calculate_metric_duration(
-            "cpu_usage", condition, current_time
-        )
+        rule = MagicMock(id="rule_duration", updated_at=current_time)
+        
+        duration = self.alerting_service._rule_match_duration(rule, condition, current_time)
         
         # 应该返回从最新时间开始连续满足条件的时间
-        assert duration >= 0
+        assert duration == 180
+    
+    def test_metric_duration_stops_at_first_unmatched_value(self):
+        """测试持续时间从最近一次不满足条件之后开始计算"""
+        current_time = datetime.now()
+        self.alerting_service.metric_history["cpu_usage"] = deque([
+            (current_time - timedelta(seconds=180), 85.0),
+            (current_time - timedelta(seconds=120), 70.0),
+            (current_time - timedelta(seconds=60), 95.0),
+            (current_time, 88.0)
+        ])
+        history = self.alerting_service.metric_history["cpu_usage"]
+        condition = AlertCondition(metric="cpu_usage", operator=">", threshold=80.0, duration=60)
+        
+        assert AlertingService._matching_since(history, condition) == current_time - timedelta(seconds=60)
+        rule = MagicMock(id="rule_above", updated_at=current_time)
+        assert self.alerting_service._rule_match_duration(rule, condition, current_time) == 60
+        
+        condition = AlertCondition(metric="cpu_usage", operator="<", threshold=50.0, duration=60)
+        assert AlertingService._matching_since(history, condition) is None
+        rule = MagicMock(id="rule_below", updated_at=current_time)
+        assert self.alerting_service._rule_match_duration(rule, condition, current_time) == 0
+    
+    @pytest.mark.asyncio
+    async def test_evaluate_metrics_drops_expired_history(self):
+        """测试评估时从队头丢弃1小时前的指标"""
+        mock_db = MagicMock()
+        mock_db.query.return_value.filter.return_value.all.return_value = []
+        expired = datetime.now() - timedelta(hours=2)
+        self.alerting_service.metric_history["cpu_usage"] = deque([(expired, 90.0)])
+        
+        await self.alerting_service.evaluate_metrics({"cpu_usage": 50.0}, mock_db)
+        
+        history = self.alerting_service.metric_history["cpu_usage"]
+        assert len(history) == 1
+        assert history[0][1] == 50.0
+    
+    def test_rule_condition_reused_until_updated(self):
+        """测试规则条件按规则缓存，规则更新时间变化后重新编译"""
+        rule = MagicMock(id="rule_reuse", updated_at=datetime(2026, 10, 17, 8, 0),
+                         condition={"metric": "cpu_usage", "operator": ">", "threshold": 80.0, "duration": 60})
+        
+        first = self.alerting_service._get_condition(rule)
+        assert self.alerting_service._get_condition(rule) is first
+        
+        rule.updated_at = datetime(2026, 10, 17, 9, 0)
+        rule.condition = {"metric": "cpu_usage", "operator": ">", "threshold": 90.0, "duration": 60}
+        assert self.alerting_service._get_condition(rule).threshold == 90.0
+    
+    def test_rule_match_streak_extended_without_rescan(self):
+        """测试新样本满足条件时沿用连续满足的起始时间，不满足时重置"""
+        start = datetime(2026, 10, 17, 8, 0)
+        rule = MagicMock(id="rule_streak", updated_at=start)
+        condition = AlertCondition(metric="cpu_usage", operator=">", threshold=80.0, duration=60)
+        history = self.alerting_service.metric_history["cpu_usage"] = deque([
+            (start, 70.0), (start + timedelta(seconds=10), 85.0)
+        ])
+        
+        with patch.object(AlertingService, '_matching_since', wraps=AlertingService._matching_since) as scan:
+            assert self.alerting_service._rule_match_duration(rule, condition, start + timedelta(seconds=10)) == 0
+            for second in (20, 30, 40):
+                now = start + timedelta(seconds=second)
+                history.append((now, 90.0))
+                # 与完整回扫一致：从第一个满足条件的样本（第10秒）起算
+                assert self.alerting_service._rule_match_duration(rule, condition, now) == second - 10
+            assert scan.call_count == 1
+            
+            history.append((start + timedelta(seconds=50), 50.0))
+            history.append((start + timedelta(seconds=60), 95.0))
+            assert self.alerting_service._rule_match_duration(rule, condition, start + timedelta(seconds=60)) == 0
+            assert scan.call_count == 2
+    
+    @pytest.mark.asyncio
+    async def test_enabled_rules_reloaded_only_after_change(self):
+        """测试评估复用规则快照，规则更新后重新查询"""
+        mock_db = MagicMock()
+        mock_db.query.return_value.filter.return_value.all.return_value = []
+        mock_db.query.return_value.filter.return_value.first.return_value = MagicMock(name="rule")
+        
+        await self.alerting_service.evaluate_metrics({"cpu_usage": 50.0}, mock_db)
+        await self.alerting_service.evaluate_metrics({"cpu_usage": 55.0}, mock_db)
+        assert mock_db.query.return_value.filter.return_value.all.call_count == 1
+        
+        await self.alerting_service.update_alert_rule("rule_1", AlertRuleUpdate(enabled=False), mock_db)
+        await self.alerting_service.evaluate_metrics({"cpu_usage": 60.0}, mock_db)
+        assert mock_db.query.return_value.filter.return_value.all.call_count == 2
+    
+    @pytest.mark.asyncio
+    async def test_rules_snapshot_sees_changes_from_other_workers_after_max_age(self):
+        """测试其他worker增删改规则后，本进程在快照到期重新加载时看到变更"""
+        engine = create_engine("sqlite://", poolclass=StaticPool,
+                               connect_args={"check_same_thread": False})
+        AlertRule.__table__.create(engine)
+        Session = sessionmaker(bind=engine)
+        worker, other_worker = AlertingService(), AlertingService()
+        db, other_db = Session(), Session()
+        condition = AlertConditionSchema(metric="cpu_usage", operator=">", threshold=80.0, duration=0)
+        
+        async def rule_ids_after_expiry():
+            worker._rules_loaded_at -= RULES_SNAPSHOT_MAX_AGE
+            return [rule.id for rule in (await worker._get_rules_by_metric(db)).get("cpu_usage", ())]
+        
+        try:
+            await other_worker.create_alert_rule(AlertRuleCreate(name="r1", condition=condition, severity="high"),
+                                                 other_db, rule_id="rule_1")
+            assert [rule.id for rule in (await worker._get_rules_by_metric(db))["cpu_usage"]] == ["rule_1"]
+            
+            await other_worker.create_alert_rule(AlertRuleCreate(name="r2", condition=condition, severity="low"),
+                                                 other_db, rule_id="rule_2")
+            # 快照未到期时不查询数据库
+            assert [rule.id for rule in (await worker._get_rules_by_metric(db))["cpu_usage"]] == ["rule_1"]
+            assert await rule_ids_after_expiry() == ["rule_1", "rule_2"]
+            
+            await other_worker.update_alert_rule("rule_1", AlertRuleUpdate(enabled=False), other_db)
+            assert await rule_ids_after_expiry() == ["rule_2"]
+            
+            await other_worker.delete_alert_rule("rule_2", other_db)
+            assert await rule_ids_after_expiry() == []
+        finally:
+            db.close()
+            other_db.close()
+            engine.dispose()
+    
+    @pytest.mark.asyncio
+    async def test_rules_snapshot_loaded_off_event_loop_and_reused(self):
+        """测试快照在工作线程中加载，未到期时复用，到期后重新加载"""
+        loop_thread = threading.get_ident()
+        query_threads = []
+        mock_db = MagicMock()
+        mock_db.query.return_value.filter.return_value.all.side_effect = \
+            lambda: query_threads.append(threading.get_ident()) or []
+        
+        await self.alerting_service._get_rules_by_metric(mock_db)
+        await self.alerting_service._get_rules_by_metric(mock_db)
+        assert len(query_threads) == 1
+        
+        self.alerting_service._rules_loaded_at -= RULES_SNAPSHOT_MAX_AGE
+        await self.alerting_service._get_rules_by_metric(mock_db)
+        assert len(query_threads) == 2
+        assert loop_thread not in query_threads
+    
+    @pytest.mark.asyncio
+    async def test_rules_changed_during_load_reloaded_next_time(self):
+        """测试加载期间本进程修改了规则时，下次评估重新加载"""
+        mock_db = MagicMock()
+        
+        def load():
+            self.alerting_service._invalidate_rules_snapshot()
+            return []
+        
+        mock_db.query.return_value.filter.return_value.all.side_effect = load
+        await self.alerting_service._get_rules_by_metric(mock_db)
+        
+        mock_db.query.return_value.filter.return_value.all.side_effect = None
+        mock_db.query.return_value.filter.return_value.all.return_value = []
+        await self.alerting_service._get_rules_by_metric(mock_db)
+        await self.alerting_service._get_rules_by_metric(mock_db)
+        assert mock_db.query.return_value.filter.return_value.all.call_count == 2
+    
+    @pytest.mark.asyncio
+    async def test_only_rules_for_reported_metrics_evaluated(self):
+        """测试只评估本次上报了对应指标的规则"""
+        def make_rule(rule_id, metric):
+            return MagicMock(id=rule_id, condition={"metric": metric, "operator": ">",
+                                                    "threshold": 80.0, "duration": 0})
+        
+        mock_db = MagicMock()
+        mock_db.query.return_value.filter.return_value.all.return_value = [
+            make_rule("r_cpu", "cpu_usage"), make_rule("r_mem", "memory_usage"), make_rule("r_cpu2", "cpu_usage")
+        ]
+        
+        with patch.object(self.alerting_service, '_evaluate_rule', new_callable=AsyncMock) as evaluate:
+            await self.alerting_service.evaluate_metrics({"cpu_usage": 50.0}, mock_db)
+        
+        assert [(c.args[0].id, c.args[1]) for c in evaluate.await_args_list] == [("r_cpu", 50.0), ("r_cpu2", 50.0)]
+    
+    @pytest.mark.asyncio
+    async def test_rule_commits_run_off_event_loop(self):
+        """测试规则的数据库提交在工作线程中执行"""
+        loop_thread = threading.get_ident()
+        commit_threads = []
+        mock_db = MagicMock()
+        mock_db.commit.side_effect = lambda: commit_threads.append(threading.get_ident())
+        mock_db.query.return_value.filter.return_value.first.return_value = MagicMock(name="rule")
+        
+        await self.alerting_service.update_alert_rule("rule_1", AlertRuleUpdate(enabled=False), mock_db)
+        await self.alerting_service.delete_alert_rule("rule_1", mock_db)
+        
+        assert len(commit_threads) == 2
+        assert loop_thread not in commit_threads
+    
+    def test_duplicate_notifications_suppressed_within_cooldown(self):
+        """测试去重窗口内相同通知只发送一次，窗口过后或取值不同时照常发送"""
+        rule = MagicMock(id="rule_dedup", severity="high")
+        
+        with patch('app.services.alerting.time.monotonic', return_value=1000.0) as monotonic:
+            assert self.alerting_service._should_notify(rule, "cpu_usage", 95.001, AlertStatus.ACTIVE)
+            assert not self.alerting_service._should_notify(rule, "cpu_usage", 95.0, AlertStatus.ACTIVE)
+            assert self.alerting_service._should_notify(rule, "cpu_usage", 95.0, AlertStatus.RESOLVED)
+            assert self.alerting_service._should_notify(rule, "cpu_usage", 97.0, AlertStatus.ACTIVE)
+            
+            monotonic.return_value = 1000.0 + settings.alert_notification_cooldown
+            assert self.alerting_service._should_notify(rule, "cpu_usage", 95.0, AlertStatus.ACTIVE)
+            assert len(self.alerting_service._notification_dedup) == 1
+        
+        with patch.object(settings, 'alert_notification_cooldown', 0):
+            assert self.alerting_service._should_notify(rule, "cpu_usage", 95.0, AlertStatus.ACTIVE)
+    
+    def test_refire_after_resolve_notified_within_cooldown(self):
+        """测试去重窗口内触发→解除→以相同取值再次触发时，再次触发和随后的解除都照常通知"""
+        rule = MagicMock(id="rule_refire", severity="high")
+        
+        with patch('app.services.alerting.time.monotonic', return_value=1000.0):
+            assert self.alerting_service._should_notify(rule, "cpu_usage", 95.0, AlertStatus.ACTIVE)
+            assert self.alerting_service._should_notify(rule, "cpu_usage", 70.0, AlertStatus.RESOLVED)
+            assert self.alerting_service._should_notify(rule, "cpu_usage", 95.0, AlertStatus.ACTIVE)
+            assert not self.alerting_service._should_notify(rule, "cpu_usage", 95.0, AlertStatus.ACTIVE)
+            assert self.alerting_service._should_notify(rule, "cpu_usage", 70.0, AlertStatus.RESOLVED)
+            
+            other = MagicMock(id="rule_other", severity="high")
+            assert self.alerting_service._should_notify(other, "cpu_usage", 95.0, AlertStatus.ACTIVE)
+            assert self.alerting_service._should_notify(rule, "cpu_usage", 95.0, AlertStatus.ACTIVE)
+            assert not self.alerting_service._should_notify(other, "cpu_usage", 95.0, AlertStatus.ACTIVE)
+    
+    @pytest.mark.asyncio
+    async def test_metric_history_capped(self):
+        """测试新指标的历史队列有长度上限"""
+        mock_db = MagicMock()
+        mock_db.query.return_value.filter.return_value.all.return_value = []
+        
+        await self.alerting_service.evaluate_metrics({"gpu_temperature": 70.0}, mock_db)
+        
+        assert self.alerting_service.metric_history["gpu_temperature"].maxlen == METRIC_HISTORY_MAXLEN
+    
+    @pytest.mark.asyncio
+    async def test_send_notifications_concurrently(self):
+        """测试各渠道并发发送，单个渠道异常不影响其他渠道"""
+        alert = Alert(id="a1", rule_id="r1", rule_name="测试规则", severity=AlertSeverity.HIGH,
+                      message="msg", labels={}, annotations={}, starts_at=datetime.now())
+        events = []
+        
+        async def slow_send(alert, config):
+            events.append("webhook_start")
+            await asyncio.sleep(0.01)
+            events.append("webhook_done")
+            return True
+        
+        async def failing_send(alert, config):
+            events.append("slack")
+            raise RuntimeError("boom")
+        
+        self.alerting_service.notification_senders[NotificationChannel.WEBHOOK].send = slow_send
+        self.alerting_service.notification_senders[NotificationChannel.SLACK].send = failing_send
+        
+        targets = self.alerting_service._build_notification_targets(
+            ["webhook", "slack", "pagerduty", "email"], {"webhook": {}, "slack": {}}
+        )
+        assert [target.channel for target in targets] == ["webhook", "slack"]
+        
+        await self.alerting_service._send_notifications(alert, targets)
+        
+        assert events == ["webhook_start", "slack", "webhook_done"]
+    
+    def test_notification_targets_reused_until_rule_updated(self):
+        """测试规则的通知目标按更新时间缓存"""
+        rule = MagicMock(id="rule_notify", updated_at=datetime(2026, 10, 17, 8, 0),
+                         notification_channels=("webhook",), notification_config={"webhook": {"url": "http://a"}})
+        
+        first = self.alerting_service._get_notification_targets(rule)
+        assert self.alerting_service._get_notification_targets(rule) is first
+        
+        rule.updated_at = datetime(2026, 10, 17, 9, 0)
+        rule.notification_config = {"webhook": {"url": "http://b"}}
+        assert self.alerting_service._get_notification_targets(rule)[0].config == {"url": "http://b"}
     
     @pytest.mark.asyncio
     async def test_get_active_alerts(self):
@@ -6,8 +6,9 @@ import asyncio
 from unittest.mock import Mock, AsyncMock, patch
 from datetime import datetime
 import json
+import httpx
 
-from app.services.api_proxy import APIProxyService, ProxyRule, LoadBalancingStrategy
+from app.services.api_proxy import APIProxyService, ConnectionCounts, RequestCounts, ProxyRule, LoadBalancingStrategy
 from app.models.schemas import ModelConfig, ModelInfo
 from app.models.enums import FrameworkType, ModelStatus, HealthStatus
 
@@ -176,6 +177,133 @@ class TestAPIProxyService:
         assert endpoint is not None
         assert endpoint['model_id'] == sample_model_infos[1].id  # 连接数较少的模型
     
+    def test_connection_counts_heap_tracks_least(self):
+        """测试连接数堆随计数变化返回可用端点中连接数最少的一个"""
+        counts = ConnectionCounts()
+        counts.update({"m1": 0, "m2": 0, "m3": 0})
+        counts["m1"] = 3
+        counts["m2"] = 1
+        
+        assert counts.least({"m1", "m2", "m3"}) == "m3"
+        assert counts.least({"m1", "m2"}) == "m2"
+        
+        counts.pop("m2")
+        counts["m3"] = 4
+        assert counts.least({"m1", "m2", "m3"}) == "m1"
+        assert counts.least({"m2"}) is None
+        assert counts.least({"m3"}) == "m3"
+        
+        for i in range(200):
+            counts["m1"] = i % 5
+        assert len(counts._heap) <= 2 * len(counts) + 64
+    
+    def test_request_counts_track_total(self):
+        """测试请求数表随增减维护总数"""
+        counts = RequestCounts()
+        counts.update({"m1": 0, "m2": 0})
+        counts["m1"] = counts["m1"] + 3
+        counts["m2"] = 2
+        assert counts.total == 5
+        
+        counts.pop("m1")
+        counts.pop("missing", None)
+        assert counts.total == 2
+        
+        del counts["m2"]
+        assert counts.total == 0
+    
+    @pytest.mark.asyncio
+    async def test_stats_use_rendered_status_values(self, proxy_service):
+        """测试统计输出使用状态变化时渲染好的字符串"""
+        model_info = Mock(id="m", api_endpoint="http://127.0.0.1:9006", endpoint=None,
+                          status=ModelStatus.RUNNING, health=HealthStatus.UNKNOWN)
+        await proxy_service.register_model_endpoint(model_info)
+        await proxy_service.update_model_health("m", HealthStatus.HEALTHY)
+        
+        stats = await proxy_service.get_proxy_stats()
+        
+        assert stats['model_stats']["m"]['status'] == ModelStatus.RUNNING.value
+        assert stats['model_stats']["m"]['health'] == HealthStatus.HEALTHY.value
+    
+    @pytest.mark.asyncio
+    async def test_select_endpoint_power_of_two(self):
+        """测试两次随机选择时取连接数较少的端点"""
+        proxy_service = APIProxyService(LoadBalancingStrategy.POWER_OF_TWO)
+        for model_id in ("m1", "m2", "m3"):
+            proxy_service._model_endpoints[model_id] = {
+                'endpoint': "http://127.0.0.1:9000", 'status': ModelStatus.RUNNING, 'health': HealthStatus.HEALTHY
+            }
+        proxy_service._connection_counts.update({"m1": 5, "m2": 1, "m3": 3})
+        
+        with patch('app.services.api_proxy.random.sample', return_value=["m1", "m3"]):
+            endpoint = await proxy_service.select_endpoint()
+        
+        assert endpoint['model_id'] == "m3"
+        
+        for model_id in ("m1", "m3"):
+            await proxy_service.unregister_model_endpoint(model_id)
+        assert (await proxy_service.select_endpoint())['model_id'] == "m2"
+    
+    @pytest.mark.asyncio
+    async def test_available_endpoints_snapshot_invalidated_on_change(self, proxy_service):
+        """测试可用端点快照在状态不变时复用，健康状态变化后重建"""
+        proxy_service._model_endpoints["m1"] = {
+            'endpoint': "http://127.0.0.1:9000", 'status': ModelStatus.RUNNING, 'health': HealthStatus.HEALTHY
+        }
+        
+        first = await proxy_service.get_available_endpoints()
+        await proxy_service.update_model_health("m1", HealthStatus.HEALTHY)
+        assert await proxy_service.get_available_endpoints() is first
+        
+        await proxy_service.update_model_health("m1", HealthStatus.UNHEALTHY)
+        assert await proxy_service.get_available_endpoints() == {}
+        assert list(first) == ["m1"]
+        
+        await proxy_service.update_model_health("m1", HealthStatus.HEALTHY)
+        assert (await proxy_service.select_endpoint())['model_id'] == "m1"
+    
+    @pytest.mark.asyncio
+    async def test_availability_rebuilt_only_when_flipped(self, proxy_service):
+        """测试不改变可用性的状态更新不重建快照，代理请求按快照判断可用性"""
+        for model_id in ("m1", "m2"):
+            proxy_service._model_endpoints[model_id] = {
+                'endpoint': "http://127.0.0.1:9000", 'status': ModelStatus.RUNNING, 'health': HealthStatus.HEALTHY
+            }
+        await proxy_service.update_model_health("m2", HealthStatus.UNHEALTHY)
+        first = await proxy_service.get_available_endpoints()
+        
+        await proxy_service.update_model_status("m2", ModelStatus.STOPPED)
+        assert await proxy_service.get_available_endpoints() is first
+        assert (await proxy_service.proxy_request("m2", "/v1/models"))['status_code'] == 503
+        
+        await proxy_service.update_model_status("m1", ModelStatus.STOPPED)
+        assert (await proxy_service.proxy_request("m1", "/v1/models"))['status_code'] == 503
+        assert await proxy_service.get_available_endpoints() == {}
+    
+    @pytest.mark.asyncio
+    async def test_select_endpoint_random(self):
+        """测试随机策略只从可用端点中选择"""
+        proxy_service = APIProxyService(LoadBalancingStrategy.RANDOM)
+        for model_id, health in (("m1", HealthStatus.HEALTHY), ("m2", HealthStatus.UNHEALTHY)):
+            proxy_service._model_endpoints[model_id] = {
+                'endpoint': "http://127.0.0.1:9000", 'status': ModelStatus.RUNNING, 'health': health
+            }
+        
+        assert {(await proxy_service.select_endpoint())['model_id'] for _ in range(5)} == {"m1"}
+    
+    @pytest.mark.asyncio
+    async def test_round_robin_index_bounded(self, proxy_service):
+        """测试轮询依次选择各端点，下标不超过端点数"""
+        for model_id in ("m1", "m2", "m3"):
+            proxy_service._model_endpoints[model_id] = {
+                'endpoint': "http://127.0.0.1:9000", 'status': ModelStatus.RUNNING, 'health': HealthStatus.HEALTHY
+            }
+        
+        selected = [(await proxy_service.select_endpoint())['model_id'] for _ in range(7)]
+        
+        assert selected == ["m1", "m2", "m3", "m1", "m2", "m3", "m1"]
+        assert proxy_service._round_robin_index == 1
+    
     @pytest.mark.asyncio
     async def test_proxy_request_success(self, proxy_service, sample_model_infos):
         """测试代理请求成功"""
@@ -186,9 +314,9 @@ class TestAPIProxyService:
         mock_response = Mock()
         mock_response.status_code = 200
         mock_response.json.return_value = {"response": "test response"}
-        mock_response.headers = {"Content-Type": "application/json"}
+        mock_response.headers = httpx.Headers({"Content-Type": "application/json"})
         
-        with patch('httpx.AsyncClient.post', return_value=mock_response) as mock_post:
+        with patch('httpx.AsyncClient.request', return_value=mock_response) as mock_post:
             response = await proxy_service.proxy_request(
                 model_id=model_info.id,
                 path="/v1/chat/completions",
@@ -203,9 +331,38 @@ class TestAPIProxyService:
             
             # 验证请求被正确代理
             mock_post.assert_called_once()
+            assert mock_post.call_args.args[0] == "POST"
             call_args = mock_post.call_args
             assert model_info.endpoint in str(call_args)
     
+    @pytest.mark.asyncio
+    async def test_requests_share_client_until_stopped(self, proxy_service):
+        """测试代理请求共用一个HTTP客户端，停止服务时关闭"""
+        client = proxy_service._client
+        proxy_service._model_endpoints["model_x"] = {
+            'endpoint': "http://127.0.0.1:9000", 'status': ModelStatus.RUNNING, 'health': HealthStatus.HEALTHY
+        }
+        mock_response = Mock(status_code=200, headers={})
+        mock_response.json.return_value = {}
+        
+        with patch('httpx.AsyncClient.request', return_value=mock_response) as mock_request:
+            await proxy_service.proxy_request("model_x", "/v1/models", method="get", data={"ignored": True})
+            await proxy_service.proxy_request("model_x", "/v1/models", method="get")
+        
+            await proxy_service.proxy_request("model_x", "/v1/models/1", method="patch", data={"name": "x"})
+        
+        assert mock_request.call_count == 3
+        assert mock_request.call_args_list[1].kwargs["json"] is None
+        assert mock_request.call_args.args[0] == "PATCH"
+        assert mock_request.call_args.kwargs["json"] == {"name": "x"}
+        assert proxy_service._client is client
+        
+        response = await proxy_service.proxy_request("model_x", "/v1/models", method="TRACE")
+        assert response['status_code'] == 405
+        
+        await proxy_service.stop()
+        assert client.is_closed
+    
     @pytest.mark.asyncio
     async def test_proxy_request_model_not_found(self, proxy_service):
         """测试代理请求模型不存在"""
@@ -250,9 +407,9 @@ class TestAPIProxyService:
         mock_response_success = Mock()
         mock_response_success.status_code = 200
         mock_response_success.json.return_value = {"response": "success"}
-        mock_response_success.headers = {"Content-Type": "application/json"}
+        mock_response_success.headers = httpx.Headers({"Content-Type": "application/json"})
         
-        with patch('httpx.AsyncClient.post') as mock_post:
+        with patch('httpx.AsyncClient.request') as mock_post:
             # 第一次调用失败，第二次成功
             mock_post.side_effect = [
                 Exception("Connection failed"),
@@ -269,6 +426,52 @@ class TestAPIProxyService:
             assert response['data'] == {"response": "success"}
             assert mock_post.call_count == 2  # 尝试了两次
     
+    @pytest.mark.asyncio
+    async def test_failover_follows_load_balancing_strategy(self):
+        """测试故障转移按负载均衡策略选择端点，每个端点只尝试一次"""
+        proxy_service = APIProxyService(LoadBalancingStrategy.LEAST_CONNECTIONS)
+        for model_id, port in (("m1", 9001), ("m2", 9002), ("m3", 9003)):
+            proxy_service._model_endpoints[model_id] = {
+                'endpoint': f"http://127.0.0.1:{port}", 'status': ModelStatus.RUNNING, 'health': HealthStatus.HEALTHY
+            }
+        proxy_service._connection_counts.update({"m1": 5, "m2": 0, "m3": 2})
+        
+        with patch('httpx.AsyncClient.request', side_effect=Exception("Connection failed")) as mock_request:
+            response = await proxy_service.proxy_request_with_failover(path="/v1/models", method="GET")
+        
+        assert response['status_code'] == 503
+        assert [call.args[1] for call in mock_request.call_args_list] == [
+            "http://127.0.0.1:9002/v1/models", "http://127.0.0.1:9003/v1/models", "http://127.0.0.1:9001/v1/models"
+        ]
+    
+    @pytest.mark.asyncio
+    async def test_connection_count_released_on_error_and_cancel(self, proxy_service):
+        """测试上游请求失败或被取消后连接数都会减回"""
+        proxy_service._model_endpoints["m"] = {
+            'endpoint': "http://127.0.0.1:9000", 'status': ModelStatus.RUNNING, 'health': HealthStatus.HEALTHY
+        }
+        started = asyncio.Event()
+        
+        async def hang(*args, **kwargs):
+            started.set()
+            await asyncio.sleep(10)
+        
+        with patch('httpx.AsyncClient.request', side_effect=Exception("Connection failed")):
+            assert (await proxy_service.proxy_request("m", "/v1/models"))['status_code'] == 500
+        assert proxy_service._connection_counts["m"] == 0
+        
+        with patch('httpx.AsyncClient.request', side_effect=hang):
+            task = asyncio.create_task(proxy_service.proxy_request("m", "/v1/models"))
+            await started.wait()
+            assert proxy_service._connection_counts["m"] == 1
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+        assert proxy_service._connection_counts["m"] == 0
+        
+        assert (await proxy_service.proxy_request("m", "/v1/models", method="TRACE"))['status_code'] == 405
+        assert proxy_service._connection_counts["m"] == 0
+    
     @pytest.mark.asyncio
     async def test_add_proxy_rule(self, proxy_service):
         """测试添加代理规则"""
@@ -321,6 +524,33 @@ class TestAPIProxyService:
         matched_rule, params = proxy_service._match_proxy_rule("/api/v1/other", "POST")
         assert matched_rule is None
         assert params == {}
+        
+        # 测试方法不匹配
+        matched_rule, _ = proxy_service._match_proxy_rule("/api/v1/models/test-model/chat", "GET")
+        assert matched_rule is None
+    
+    def test_fused_rules_match_in_order(self, proxy_service):
+        """测试合并后的规则正则按添加顺序匹配，同名参数互不冲突"""
+        chat = ProxyRule(path_pattern="/models/{model_id}/chat", target_path="/v1/chat", methods=["POST"])
+        any_path = ProxyRule(path_pattern="/models/{model_id}/{endpoint}", target_path="/v1", methods=["GET", "POST"])
+        proxy_service.add_proxy_rule(chat)
+        proxy_service.add_proxy_rule(any_path)
+        
+        assert proxy_service._match_proxy_rule("/models/m1/chat", "POST") == (chat, {"model_id": "m1"})
+        assert proxy_service._match_proxy_rule("/models/m1/chat", "GET") == \
+            (any_path, {"model_id": "m1", "endpoint": "chat"})
+        assert proxy_service._match_proxy_rule("/models/m1/chat", "DELETE") == (None, {})
+        
+        proxy_service.remove_proxy_rule("/models/{model_id}/chat")
+        assert proxy_service._match_proxy_rule("/models/m1/chat", "POST")[0] is any_path
+    
+    def test_proxy_rule_pattern_compiled_once(self):
+        """测试代理规则构造时编译路径模式"""
+        rule = ProxyRule(path_pattern="/models/{model_id}/v1/{endpoint}", target_path="/v1", methods=["GET", "POST"])
+        
+        assert rule.compiled.match("/models/m1/v1/chat").groupdict() == {"model_id": "m1", "endpoint": "chat"}
+        assert rule.compiled.match("/models/m1/v1/chat/extra") is None
+        assert rule.method_set == frozenset({"GET", "POST"})
     
     @pytest.mark.asyncio
     async def test_get_proxy_stats(self, proxy_service, sample_model_infos):
@@ -377,6 +607,89 @@ class TestAPIProxyService:
             assert endpoint1['health'] == HealthStatus.HEALTHY
             assert endpoint2['health'] == HealthStatus.UNHEALTHY
     
+    @pytest.mark.asyncio
+    async def test_health_checks_run_concurrently(self, proxy_service):
+        """测试各端点健康检查并发执行，慢端点不阻塞其他端点"""
+        for model_id, port in (("slow", 9001), ("fast", 9002)):
+            proxy_service._model_endpoints[model_id] = {
+                'endpoint': f"http://127.0.0.1:{port}", 'status': ModelStatus.RUNNING,
+                'health': HealthStatus.UNKNOWN, 'last_health_check': None
+            }
+        events = []
+        
+        async def fake_get(url, timeout=None):
+            events.append(f"start {url}")
+            if "9001" in url:
+                await asyncio.sleep(0.01)
+            events.append(f"done {url}")
+            return Mock(status_code=200 if "9002" in url else 503)
+        
+        with patch.object(proxy_service._client, 'get', side_effect=fake_get):
+            await proxy_service.health_check_endpoints()
+        
+        assert events[:2] == ["start http://127.0.0.1:9001/health", "start http://127.0.0.1:9002/health"]
+        assert proxy_service._model_endpoints["fast"]['health'] == HealthStatus.HEALTHY
+        assert proxy_service._model_endpoints["slow"]['health'] == HealthStatus.UNHEALTHY
+    
+    @pytest.mark.asyncio
+    async def test_health_check_cached_and_deduplicated(self, proxy_service):
+        """测试有效期内不重复检查，同一URL的并发检查只请求一次"""
+        for model_id in ("a", "b"):
+            proxy_service._model_endpoints[model_id] = {
+                'endpoint': "http://127.0.0.1:9003/", 'status': ModelStatus.RUNNING,
+                'health': HealthStatus.UNKNOWN, 'last_health_check': None
+            }
+        
+        async def fake_get(url, timeout=None):
+            await asyncio.sleep(0.01)
+            return Mock(status_code=200)
+        
+        with patch.object(proxy_service._client, 'get', side_effect=fake_get) as mock_get:
+            await proxy_service.health_check_endpoints()
+            await proxy_service.health_check_endpoints()
+        
+        assert mock_get.call_count == 1
+        assert proxy_service._model_endpoints["b"]['health'] == HealthStatus.HEALTHY
+        assert proxy_service._inflight_health == {}
+    
+    @pytest.mark.asyncio
+    async def test_health_check_ttl_uses_monotonic_clock(self, proxy_service):
+        """测试健康检查有效期按monotonic时间计算"""
+        proxy_service._model_endpoints["m"] = {
+            'endpoint': "http://127.0.0.1:9005", 'status': ModelStatus.RUNNING,
+            'health': HealthStatus.UNKNOWN, 'last_health_check': None
+        }
+        
+        with patch('app.services.api_proxy.time.monotonic', return_value=100.0) as monotonic, \
+                patch.object(proxy_service._client, 'get', return_value=Mock(status_code=200)) as mock_get:
+            await proxy_service.health_check_endpoints()
+            monotonic.return_value = 100.0 + proxy_service._health_check_ttl - 0.1
+            await proxy_service.health_check_endpoints()
+            monotonic.return_value = 100.0 + proxy_service._health_check_ttl
+            await proxy_service.health_check_endpoints()
+        
+        assert mock_get.call_count == 2
+        assert proxy_service._model_endpoints["m"]['last_health_check'] == 100.0 + proxy_service._health_check_ttl
+    
+    @pytest.mark.asyncio
+    async def test_proxy_response_parsed_by_content_type(self, proxy_service):
+        """测试仅JSON内容类型解析响应体，响应头原样返回"""
+        proxy_service._model_endpoints["m"] = {
+            'endpoint': "http://127.0.0.1:9004", 'status': ModelStatus.RUNNING,
+            'health': HealthStatus.HEALTHY, 'last_health_check': None
+        }
+        json_response = httpx.Response(200, json={"ok": True})
+        text_response = httpx.Response(200, text='{"ok": true}', headers={"Content-Type": "text/plain"})
+        
+        with patch('httpx.AsyncClient.request', side_effect=[json_response, text_response]):
+            parsed = await proxy_service.proxy_request("m", "/v1/models", method="GET")
+            raw = await proxy_service.proxy_request("m", "/v1/models", method="GET")
+        
+        assert parsed['data'] == {"ok": True}
+        assert parsed['headers'] is json_response.headers
+        assert parsed['headers']['content-type'] == "application/json"
+        assert raw['data'] == '{"ok": true}'
+    
     @pytest.mark.asyncio
     async def test_connection_tracking(self, proxy_service, sample_model_infos):
         """测试连接跟踪"""
@@ -404,11 +717,7 @@ class TestAPIProxyService:
         await proxy_service.register_model_endpoint(model_info)
         
         # 设置频率限制
-        proxy_service._rate_limits[model_info.id] = {
-            'requests_per_minute': 10,
-            'current_count': 0,
-            'window_start': datetime.now()
-        }
+        proxy_service.set_rate_limit(model_info.id, requests_per_minute=10)
         
         # 测试在限制内的请求
         for _ in range(5):
@@ -416,10 +725,26 @@ class TestAPIProxyService:
             assert allowed is True
         
         # 测试超出限制的请求
-        proxy_service._rate_limits[model_info.id]['current_count'] = 15
+        proxy_service._rate_limits[model_info.id]['tokens'] = 0.0
         allowed = proxy_service._check_rate_limit(model_info.id)
         assert allowed is False
     
+    def test_rate_limit_token_bucket_refills(self, proxy_service):
+        """测试令牌用尽后按速率补充，突发上限为桶容量"""
+        with patch('app.services.api_proxy.time.monotonic', return_value=100.0) as monotonic:
+            proxy_service.set_rate_limit("model_x", requests_per_minute=60, burst=2)
+            
+            assert [proxy_service._check_rate_limit("model_x") for _ in range(3)] == [True, True, False]
+            
+            monotonic.return_value = 101.0
+            assert proxy_service._check_rate_limit("model_x") is True
+            assert proxy_service._check_rate_limit("model_x") is False
+            
+            monotonic.return_value = 200.0
+            assert [proxy_service._check_rate_limit("model_x") for _ in range(3)] == [True, True, False]
+        
+        assert proxy_service._check_rate_limit("unlimited") is True
+    
     @pytest.mark.asyncio
     async def test_concurrent_requests(self, proxy_service, sample_model_infos):
         """测试并发请求处理"""
@@ -431,9 +756,9 @@ class TestAPIProxyService:
         mock_response = Mock()
         mock_response.status_code = 200
         mock_response.json.return_value = {"response": "success"}
-        mock_response.headers = {"Content-Type": "application/json"}
+        mock_response.headers = httpx.Headers({"Content-Type": "application/json"})
         
-        with patch('httpx.AsyncClient.post', return_value=mock_response):
+        with patch('httpx.AsyncClient.request', return_value=mock_response):
             # 并发发送多个请求
             tasks = []
             for i in range(10):
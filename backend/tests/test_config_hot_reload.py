@@ -132,6 +132,26 @@ class TestConfigHotReloadService:
         await hot_reload_service.stop()
         assert hot_reload_service._running is False
     
+    @pytest.mark.asyncio
+    async def test_write_notification_reloads_only_written_config(self, mock_config_manager, mock_model_manager,
+                                                                  sample_model_config):
+        """测试配置写入通知只重新加载被写入的配置，不做全量比较"""
+        service = ConfigHotReloadService(mock_config_manager, mock_model_manager)
+        mock_config_manager.load_model_configs.return_value = []
+        mock_config_manager.load_model_config.return_value = sample_model_config
+        
+        await service.start()
+        listener = mock_config_manager.add_change_listener.call_args.args[0]
+        listener("test-model-1")
+        listener("test-model-1")
+        await asyncio.sleep(0.01)
+        await service.stop()
+        
+        mock_config_manager.load_model_config.assert_awaited_once_with("test-model-1")
+        assert mock_config_manager.load_model_configs.await_count == 1  # 仅初始化缓存
+        assert service.get_cached_config("test-model-1") == sample_model_config
+        mock_config_manager.remove_change_listener.assert_called_once_with(listener)
+    
     @pytest.mark.asyncio
     async def test_add_remove_listeners(self, hot_reload_service):
         """测试添加和移除监听器"""
@@ -150,7 +170,7 @@ class TestConfigHotReloadService:
     async def test_reload_model_config_new(self, hot_reload_service, mock_config_manager, sample_model_config):
         """测试重新加载模型配置（新增）"""
         # 模拟配置管理器返回新配置
-        mock_config_manager.load_model_configs.return_value = [sample_model_config]
+        mock_config_manager.load_model_config.return_value = sample_model_config
         
         # 缓存为空，模拟新增配置
         hot_reload_service._config_cache = {}
@@ -176,7 +196,7 @@ class TestConfigHotReloadService:
         new_config.priority = 8
         
         # 模拟配置管理器返回更新后的配置
-        mock_config_manager.load_model_configs.return_value = [new_config]
+        mock_config_manager.load_model_config.return_value = new_config
         
         event = await hot_reload_service.reload_model_config("test-model-1")
         
@@ -195,7 +215,7 @@ class TestConfigHotReloadService:
         hot_reload_service._config_cache = {"test-model-1": sample_model_config}
         
         # 模拟配置管理器返回空配置（配置被删除）
-        mock_config_manager.load_model_configs.return_value = []
+        mock_config_manager.load_model_config.return_value = None
         
         event = await hot_reload_service.reload_model_config("test-model-1")
         
@@ -205,6 +225,106 @@ class TestConfigHotReloadService:
         assert event.old_config == sample_model_config
         assert "test-model-1" not in hot_reload_service._config_cache
     
+    @pytest.mark.asyncio
+    async def test_incremental_check_uses_watermark(self, hot_reload_service, mock_config_manager,
+                                                    sample_model_config):
+        """测试增量检查只处理上次检查以来的更新和删除，并推进更新时间水位"""
+        other = sample_model_config.copy(update={"id": "test-model-2"})
+        mock_config_manager.load_model_configs.return_value = [sample_model_config, other]
+        await hot_reload_service._initialize_cache()
+        watermark = hot_reload_service._updated_watermark
+        
+        updated = sample_model_config.copy(update={"priority": 8, "updated_at": datetime(2099, 1, 1)})
+        mock_config_manager.load_model_configs_since.return_value = (
+            [updated], ["test-model-2", "never-cached"], datetime(2099, 1, 1, 0, 0, 5)
+        )
+        
+        changes = await hot_reload_service._check_and_apply_changes()
+        
+        mock_config_manager.load_model_configs_since.assert_awaited_once_with(watermark)
+        mock_config_manager.load_model_configs.assert_awaited_once()
+        assert [(e.change_type, e.model_id) for e in changes] == [
+            (ConfigChangeType.UPDATED, "test-model-1"), (ConfigChangeType.DELETED, "test-model-2")
+        ]
+        assert hot_reload_service._updated_watermark == datetime(2099, 1, 1, 0, 0, 5)
+        assert set(hot_reload_service._config_cache) == {"test-model-1"}
+    
+    @pytest.mark.asyncio
+    async def test_force_reload_scans_all_configs(self, hot_reload_service, mock_config_manager,
+                                                  sample_model_config):
+        """测试强制重新加载全量比较，缓存中多出的配置视为删除"""
+        hot_reload_service._config_cache = {"stale": sample_model_config.copy(update={"id": "stale"})}
+        mock_config_manager.load_model_configs.return_value = [sample_model_config]
+        
+        changes = await hot_reload_service.force_reload()
+        
+        assert {(e.change_type, e.model_id) for e in changes} == {
+            (ConfigChangeType.CREATED, "test-model-1"), (ConfigChangeType.DELETED, "stale")
+        }
+        mock_config_manager.load_model_configs_since.assert_not_called()
+        assert hot_reload_service._updated_watermark == sample_model_config.updated_at
+    
+    @pytest.mark.asyncio
+    async def test_changes_applied_concurrently_within_limit(self, hot_reload_service, mock_config_manager,
+                                                             sample_model_config):
+        """测试多个配置变更并发应用且不超过并发上限，缓存在应用前已全部更新"""
+        configs = [sample_model_config.copy(update={"id": f"model-{i}"}) for i in range(6)]
+        mock_config_manager.load_model_configs.return_value = configs
+        hot_reload_service.max_concurrent_applies = 2
+        running = peak = 0
+        cached_counts = []
+        
+        async def slow_apply(event):
+            nonlocal running, peak
+            cached_counts.append(len(hot_reload_service._config_cache))
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+        
+        hot_reload_service._apply_config_change = slow_apply
+        
+        changes = await hot_reload_service.force_reload()
+        
+        assert len(changes) == 6
+        assert peak == 2
+        assert cached_counts == [6] * 6
+    
+    @pytest.mark.asyncio
+    async def test_notified_changes_applied_concurrently_within_limit(self, mock_config_manager,
+                                                                      mock_model_manager, sample_model_config):
+        """测试写入通知触发的一批变更同样在并发上限内并发应用"""
+        service = ConfigHotReloadService(mock_config_manager, mock_model_manager)
+        service.max_concurrent_applies = 2
+        mock_config_manager.load_model_configs.return_value = []
+        mock_config_manager.load_model_config.side_effect = \
+            lambda model_id: sample_model_config.copy(update={"id": model_id})
+        running = peak = 0
+        applied = []
+        
+        async def slow_apply(event):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            applied.append(event.model_id)
+        
+        service._apply_config_change = slow_apply
+        
+        await service.start()
+        listener = mock_config_manager.add_change_listener.call_args.args[0]
+        for i in range(5):
+            listener(f"model-{i}")
+        for _ in range(100):
+            if len(applied) == 5:
+                break
+            await asyncio.sleep(0.01)
+        await service.stop()
+        
+        assert sorted(applied) == [f"model-{i}" for i in range(5)]
+        assert peak == 2
+    
     @pytest.mark.asyncio
     async def test_configs_differ(self, hot_reload_service, sample_model_config):
         """测试配置差异检测"""
@@ -228,6 +348,36 @@ class TestConfigHotReloadService:
         config2.parameters = {"port": 9090}
         assert hot_reload_service._configs_differ(config1, config2)
     
+    def test_configs_differ_uses_cached_key(self, hot_reload_service, sample_model_config):
+        """测试缓存配置的比较键只生成一次，参数键顺序和时间戳不影响比较"""
+        hot_reload_service._config_cache["test-model-1"] = sample_model_config
+        unchanged = sample_model_config.copy(update={"updated_at": datetime(2026, 10, 16)})
+        reordered = sample_model_config.copy(update={"parameters": {"ctx_size": 2048, "port": 8080}})
+        
+        assert not hot_reload_service._configs_differ(sample_model_config, unchanged)
+        cached = hot_reload_service._config_keys["test-model-1"]
+        assert cached[0] is sample_model_config
+        
+        assert not hot_reload_service._configs_differ(sample_model_config, reordered)
+        assert hot_reload_service._config_keys["test-model-1"] is cached
+        assert len(hot_reload_service._config_keys) == 1
+    
+    def test_changed_fields_include_nested_configs(self, sample_model_config):
+        """测试变更字段按比较键逐项得出，包含嵌套配置"""
+        new_config = sample_model_config.copy(update={
+            "health_check": sample_model_config.health_check.copy(update={"interval": 60}),
+            "parameters": {"port": 9090, "ctx_size": 2048}
+        })
+        
+        event = ConfigChangeEvent(
+            change_type=ConfigChangeType.UPDATED,
+            model_id="test-model-1",
+            old_config=sample_model_config,
+            new_config=new_config
+        )
+        
+        assert event.change_fields == ["parameters", "health_check"]
+    
     @pytest.mark.asyncio
     async def test_requires_model_restart(self, hot_reload_service):
         """测试是否需要重启模型判断"""
@@ -344,6 +494,31 @@ class TestConfigHotReloadService:
         assert sync_listener_called
         assert async_listener_called
     
+    @pytest.mark.asyncio
+    async def test_async_listeners_run_concurrently(self, hot_reload_service):
+        """测试异步监听器并发执行，单个监听器失败不影响其他监听器"""
+        events = []
+        
+        async def slow_listener(event):
+            events.append("slow start")
+            await asyncio.sleep(0.01)
+            events.append("slow done")
+        
+        async def failing_listener(event):
+            events.append("failing")
+            raise RuntimeError("boom")
+        
+        for listener in (slow_listener, failing_listener, events.append):
+            hot_reload_service.add_change_listener(listener)
+        event = ConfigChangeEvent(change_type=ConfigChangeType.CREATED, model_id="test-model")
+        
+        await hot_reload_service._notify_listeners(event)
+        
+        assert events == [event, "slow start", "failing", "slow done"]
+        
+        hot_reload_service.remove_change_listener(slow_listener)
+        assert hot_reload_service._async_listeners == [failing_listener]
+    
     def test_get_status(self, hot_reload_service):
         """测试获取服务状态"""
         status = hot_reload_service.get_status()
@@ -355,6 +530,7 @@ class TestConfigHotReloadService:
         assert "cached_configs_count" in status
         assert "listeners_count" in status
         assert "last_check_time" in status
+        assert datetime.fromisoformat(status["last_check_time"]) <= datetime.now()
     
     def test_settings_management(self, hot_reload_service):
         """测试设置管理"""
@@ -380,6 +556,42 @@ class TestConfigHotReloadService:
         hot_reload_service.set_auto_apply(True)
         assert hot_reload_service.auto_apply_changes
     
+    def test_default_backoff_bounded(self, mock_config_manager):
+        """测试默认对账间隔保持较短，退避上限为数十秒，其他worker的写入不会长时间不可见"""
+        service = ConfigHotReloadService(mock_config_manager)
+        assert service._current_interval() == 5
+        service._idle_sweeps = 100
+        assert service._current_interval() == 30
+    
+    @pytest.mark.asyncio
+    async def test_idle_sweeps_back_off(self, hot_reload_service, mock_config_manager, sample_model_config):
+        """测试连续无变更时对账间隔指数退避，发现变更后恢复基础间隔"""
+        hot_reload_service.check_interval = 0.01
+        hot_reload_service.max_check_interval = 0.05
+        mock_config_manager.load_model_configs.return_value = []
+        mock_config_manager.load_model_configs_since.return_value = ([], [], None)
+        
+        assert hot_reload_service._current_interval() == 0.01
+        hot_reload_service._idle_sweeps = 2
+        assert hot_reload_service._current_interval() == 0.04
+        hot_reload_service._idle_sweeps = 0
+        
+        await hot_reload_service.start()
+        await asyncio.sleep(0.12)
+        
+        assert hot_reload_service._idle_sweeps >= 3
+        assert hot_reload_service.get_status()["current_interval"] == 0.05
+        
+        mock_config_manager.load_model_configs_since.side_effect = [([sample_model_config], [], None)]
+        for _ in range(20):
+            if hot_reload_service.get_cached_config("test-model-1") and hot_reload_service._idle_sweeps == 0:
+                break
+            await asyncio.sleep(0.01)
+        await hot_reload_service.stop()
+        
+        assert hot_reload_service.get_cached_config("test-model-1") == sample_model_config
+        assert hot_reload_service._idle_sweeps == 0
+    
     def test_cache_operations(self, hot_reload_service, sample_model_config):
         """测试缓存操作"""
         # 设置缓存
@@ -397,6 +609,13 @@ class TestConfigHotReloadService:
         all_configs = hot_reload_service.get_all_cached_configs()
         assert "test-model" in all_configs
         assert all_configs["test-model"] == sample_model_config
+        
+        # 返回只读视图，随缓存更新且不能修改
+        hot_reload_service._config_cache["other"] = sample_model_config
+        assert hot_reload_service.get_all_cached_configs() is all_configs
+        assert "other" in all_configs
+        with pytest.raises(TypeError):
+            all_configs["another"] = sample_model_config
 
 if __name__ == "__main__":
     pytest.main([__file__])
\ No newline at end of file
@@ -0,0 +1,363 @@
+"""
+数据库层测试
+"""
+import asyncio
+import pytest
+from datetime import date, datetime
+from unittest.mock import AsyncMock, MagicMock
+
+from app.core.config import settings
+from app.models.enums import NotificationChannelFlag, FrameworkType, FrameworkTypeCode
+from app.core.database import (
+    plan_metrics_partitions, sync_engine, async_engine, WriteBehindQueue, read_from_tiflash
+)
+from sqlalchemy import select, func
+from sqlalchemy.dialects import mysql
+from sqlalchemy.orm import Query
+
+from app.models.database import (
+    GPUMetricsDB, ModelStatusDB, SystemMetricsDB, ConfigBackupDB, ModelConfigDB, AlertHistory,
+    pack_bitmask, unpack_bitmask, changed_fields_mask, insert_statement, IntCodedEnum,
+    PackedIPAddress, HexDigest, ZstdJSON, encode_json_payload, compress_payload, decompress_payload
+)
+
+
+class TestMetricsPartitionPlan:
+    """指标表分区维护计划测试类"""
+
+    def test_plan_on_fresh_table(self):
+        """测试只有兜底分区时预建今天及未来分区"""
+        days_to_add, partitions_to_drop = plan_metrics_partitions(
+            ["p_max"], date(2026, 10, 16), days_ahead=2
+        )
+
+        assert days_to_add == [date(2026, 10, 16), date(2026, 10, 17), date(2026, 10, 18)]
+        assert partitions_to_drop == []
+
+    def test_plan_appends_after_latest_partition(self):
+        """测试只在已有最新分区之后追加"""
+        existing = ["p20261016", "p20261017", "p_max"]
+        days_to_add, _ = plan_metrics_partitions(existing, date(2026, 10, 16), days_ahead=2)
+
+        assert days_to_add == [date(2026, 10, 18)]
+
+    def test_plan_drops_expired_partitions(self):
+        """测试删除超过保留期的分区"""
+        existing = ["p20260901", "p20260915", "p20261016", "p_max"]
+        _, partitions_to_drop = plan_metrics_partitions(
+            existing, date(2026, 10, 16), days_ahead=0, retention_days=30
+        )
+
+        assert partitions_to_drop == ["p20260901", "p20260915"]
+
+
+class TestTiFlashHint:
+    """TiFlash读取提示测试类"""
+
+    def test_hint_added_for_replicated_table(self):
+        """测试声明了TiFlash副本的表添加READ_FROM_STORAGE提示"""
+        stmt = read_from_tiflash(
+            select(GPUMetricsDB.device_id, func.avg(GPUMetricsDB.utilization)).group_by(GPUMetricsDB.device_id),
+            GPUMetricsDB.__table__
+        )
+
+        sql = str(stmt.compile(dialect=mysql.dialect()))
+
+        assert sql.startswith("SELECT /*+ READ_FROM_STORAGE(TIFLASH[gpu_metrics]) */")
+
+    def test_hint_added_to_alert_summary_query(self):
+        """测试告警历史的ORM聚合查询同样添加提示"""
+        query = read_from_tiflash(
+            Query([AlertHistory.status, AlertHistory.severity, func.count()])
+            .group_by(AlertHistory.status, AlertHistory.severity),
+            AlertHistory.__table__
+        )
+
+        sql = str(query.statement.compile(dialect=mysql.dialect()))
+
+        assert sql.startswith("SELECT /*+ READ_FROM_STORAGE(TIFLASH[alert_history]) */")
+
+    def test_no_hint_for_row_store_table(self):
+        """测试未声明副本的表保持原语句"""
+        stmt = select(ConfigBackupDB.id)
+
+        assert read_from_tiflash(stmt, ConfigBackupDB.__table__) is stmt
+
+
+class TestEngineConfiguration:
+    """数据库引擎配置测试类"""
+
+    def test_engines_share_configured_query_cache_size(self):
+        """测试同步和异步引擎使用配置的编译语句缓存大小"""
+        assert sync_engine._compiled_cache.capacity == settings.database_query_cache_size
+        assert async_engine.sync_engine._compiled_cache.capacity == settings.database_query_cache_size
+
+
+class TestWriteBehindQueue:
+    """后写队列测试类"""
+
+    @pytest.fixture
+    def session(self):
+        """模拟异步会话"""
+        session = AsyncMock()
+        session.__aenter__.return_value = session
+        return session
+
+    @pytest.mark.asyncio
+    async def test_background_task_writes_in_batches(self, session):
+        """测试后台任务按批次写入"""
+        statement = MagicMock()
+        queue = WriteBehindQueue(statement, "test", batch_size=3, flush_interval=0.01,
+                                 session_factory=MagicMock(return_value=session))
+        for i in range(5):
+            queue.enqueue({"id": i})
+
+        await queue.start()
+        await asyncio.sleep(0.05)
+        await queue.stop()
+
+        batches = [call.args[1] for call in session.execute.call_args_list]
+        assert batches == [[{"id": 0}, {"id": 1}, {"id": 2}], [{"id": 3}, {"id": 4}]]
+        assert session.commit.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_stop_flushes_pending_rows(self, session):
+        """测试停止时写完剩余的行"""
+        queue = WriteBehindQueue(MagicMock(), "test", session_factory=MagicMock(return_value=session))
+        queue.enqueue({"id": 1})
+
+        await queue.stop()
+
+        session.execute.assert_awaited_once()
+        assert queue.pending() == 0
+
+    @pytest.mark.asyncio
+    async def test_flush_waits_for_batch_in_flight(self, session):
+        """测试flush等待后台任务已取出、仍在攒批中的行写入后才返回"""
+        queue = WriteBehindQueue(MagicMock(), "test", flush_interval=0.05,
+                                 session_factory=MagicMock(return_value=session))
+        await queue.start()
+        queue.enqueue({"id": 1})
+        await asyncio.sleep(0)  # 后台任务取出该行并开始攒批
+
+        assert queue.pending() == 0
+        await queue.flush()
+
+        session.execute.assert_awaited_once()
+        await queue.stop()
+
+    @pytest.mark.asyncio
+    async def test_write_retried_before_dropping(self, session):
+        """测试写入失败时重试，重试耗尽后才丢弃该批"""
+        session.execute.side_effect = [RuntimeError("lost connection"), None]
+        queue = WriteBehindQueue(MagicMock(), "test", retry_delay=0, write_retries=2,
+                                 session_factory=MagicMock(return_value=session))
+        queue.enqueue({"id": 1})
+
+        await queue.flush()
+        assert session.execute.await_count == 2
+        session.commit.assert_awaited_once()
+
+        session.execute.side_effect = RuntimeError("lost connection")
+        queue.enqueue({"id": 2})
+        await queue.flush()
+        assert session.execute.await_count == 5
+        assert queue.pending() == 0
+
+    def test_enqueue_drops_when_full(self):
+        """测试队列满时丢弃新行"""
+        queue = WriteBehindQueue(MagicMock(), "test", maxsize=1)
+
+        assert queue.enqueue({"id": 1}) is True
+        assert queue.enqueue({"id": 2}) is False
+        assert queue.pending() == 1
+
+
+class TestBitmaskColumns:
+    """位图列测试类"""
+
+    def test_pack_and_unpack_devices(self):
+        """测试GPU设备列表与位图互相转换"""
+        mask = pack_bitmask([0, 3, 63])
+
+        assert mask == (1 << 0) | (1 << 3) | (1 << 63)
+        assert unpack_bitmask(mask) == [0, 3, 63]
+        assert pack_bitmask(None) == 0
+
+    def test_uses_gpu_clause(self):
+        """测试按位与查询条件"""
+        sql = str(ModelConfigDB.uses_gpu(2).compile(dialect=mysql.dialect(),
+                                                     compile_kwargs={"literal_binds": True}))
+
+        assert sql == "(model_configs.gpu_device_mask & 4) != 0"
+
+    def test_notification_channel_flags(self):
+        """测试通知渠道名转换为位标志并忽略未知渠道"""
+        flags = NotificationChannelFlag.from_names(["email", "slack", "pagerduty"])
+
+        assert flags == NotificationChannelFlag.EMAIL | NotificationChannelFlag.SLACK
+        assert int(NotificationChannelFlag.from_names(None)) == 0
+
+    def test_changed_fields_mask_skips_unknown_fields(self):
+        """测试变更字段位图只包含登记的字段"""
+        assert changed_fields_mask(["id", "priority", "unknown"]) == (1 << 0) | (1 << 4)
+
+
+class TestAlertHistoryIndexes:
+    """告警历史索引测试类"""
+
+    def _index_columns(self, name):
+        index = next(i for i in AlertHistory.__table__.indexes if i.name == name)
+        return [column.name for column in index.columns]
+
+    def test_summary_columns_covered(self):
+        """测试摘要统计涉及的列都在同一索引中"""
+        assert self._index_columns('idx_alert_history_time_status_severity') == \
+            ['starts_at', 'status', 'severity']
+
+    def test_rule_listing_index_prefix(self):
+        """测试按规则和状态筛选、按开始时间排序可使用索引前缀"""
+        assert self._index_columns('idx_alert_history_rule_status_time')[:3] == \
+            ['rule_id', 'status', 'starts_at']
+
+    def test_rule_only_listing_index(self):
+        """测试只按规则筛选、按开始时间排序时有对应索引"""
+        assert self._index_columns('idx_alert_history_rule_time') == ['rule_id', 'starts_at']
+
+
+class TestModelStatusUpsert:
+    """模型状态UPSERT测试类"""
+
+    def test_upsert_updates_all_fields_except_model_id(self):
+        """测试冲突时更新除model_id外的字段并刷新更新时间"""
+        stmt = ModelStatusDB.upsert_statement(frozenset({"model_id", "status", "pid"}))
+
+        sql = str(stmt.compile(dialect=mysql.dialect()))
+        update_clause = sql.split("ON DUPLICATE KEY UPDATE", 1)[1]
+
+        assert "status = VALUES(status)" in update_clause
+        assert "pid = VALUES(pid)" in update_clause
+        assert "updated_at = now()" in update_clause
+        assert "model_id" not in update_clause
+
+    def test_upsert_statement_cached_per_column_set(self):
+        """测试相同列集合复用同一语句对象"""
+        columns = frozenset({"model_id", "status"})
+
+        assert ModelStatusDB.upsert_statement(columns) is ModelStatusDB.upsert_statement(frozenset(columns))
+        assert ModelStatusDB.upsert_statement(columns) is not ModelStatusDB.upsert_statement(columns | {"pid"})
+
+
+class TestBulkWrite:
+    """指标批量写入测试类"""
+
+    def test_bulk_write_chunks_and_commits_once(self):
+        """测试按批次插入且只提交一次"""
+        session = MagicMock()
+        rows = [
+            {"device_id": i % 4, "timestamp": datetime(2026, 10, 16), "utilization": 50.0,
+             "memory_used": 1024, "memory_total": 8192}
+            for i in range(12000)
+        ]
+
+        written = GPUMetricsDB.bulk_write(session, rows)
+
+        assert written == 12000
+        assert session.execute.call_count == 3
+        assert [len(call.args[1]) for call in session.execute.call_args_list] == [5000, 5000, 2000]
+        assert len({id(call.args[0]) for call in session.execute.call_args_list}) == 1
+        session.commit.assert_called_once()
+
+    def test_bulk_write_rolls_back_on_error(self):
+        """测试写入失败时回滚"""
+        session = MagicMock()
+        session.execute.side_effect = RuntimeError("boom")
+
+        with pytest.raises(RuntimeError):
+            GPUMetricsDB.bulk_write(session, [{"device_id": 0}])
+
+        session.rollback.assert_called_once()
+        session.commit.assert_not_called()
+
+    def test_insert_statement_rejects_unknown_columns(self):
+        """测试未知列在构造语句时即报错"""
+        assert insert_statement(GPUMetricsDB, frozenset({"device_id"})) is \
+            insert_statement(GPUMetricsDB, frozenset({"device_id"}))
+
+        with pytest.raises(ValueError):
+            insert_statement(GPUMetricsDB, frozenset({"device_id", "no_such_column"}))
+
+
+class TestCompactColumnTypes:
+    """紧凑列类型测试类"""
+
+    @pytest.mark.parametrize("address,size", [("192.168.1.10", 4), ("2001:db8::1", 16)])
+    def test_packed_ip_address_roundtrip(self, address, size):
+        """测试IP地址以二进制存储并还原"""
+        column_type = PackedIPAddress()
+
+        packed = column_type.process_bind_param(address, None)
+
+        assert len(packed) == size
+        assert column_type.process_result_value(packed, None) == address
+
+    def test_int_coded_enum_roundtrip(self):
+        """测试框架类型以整数编码存储，读取时还原为枚举成员"""
+        column_type = IntCodedEnum(FrameworkType, FrameworkTypeCode)
+
+        assert column_type.process_bind_param(FrameworkType.VLLM, None) == FrameworkTypeCode.VLLM
+        assert column_type.process_bind_param("docker", None) == FrameworkTypeCode.DOCKER
+        assert column_type.process_result_value(1, None) is FrameworkType.LLAMA_CPP
+        assert column_type.process_bind_param(None, None) is None
+
+        with pytest.raises(LookupError):
+            column_type.process_bind_param("onnx", None)
+
+    def test_host_totals_not_stored_per_row(self):
+        """测试主机总量不再随每行系统指标存储"""
+        columns = SystemMetricsDB.__table__.c
+
+        assert "memory_total" not in columns
+        assert "disk_total" not in columns
+        assert "host_id" in columns
+
+    def test_compressed_size_is_generated(self):
+        """测试压缩后大小由备份数据生成且不参与插入"""
+        column = ConfigBackupDB.__table__.c.compressed_size
+
+        assert column.computed is not None
+        assert column.computed.persisted is False
+
+    def test_hex_digest_roundtrip(self):
+        """测试SHA-256十六进制摘要以32字节存储并还原"""
+        column_type = HexDigest()
+        digest = "ab" * 32
+
+        raw = column_type.process_bind_param(digest, None)
+
+        assert raw == bytes.fromhex(digest)
+        assert column_type.process_result_value(raw, None) == digest
+        assert column_type.process_bind_param(None, None) is None
+
+
+class TestZstdJSON:
+    """压缩JSON列类型测试类"""
+
+    def test_roundtrip(self):
+        """测试JSON值压缩存储并还原"""
+        column_type = ZstdJSON()
+        value = {"version": "1.0", "configs": [{"id": f"model-{i}", "name": "测试模型"} for i in range(50)]}
+
+        stored = column_type.process_bind_param(value, None)
+
+        assert isinstance(stored, bytes)
+        assert len(stored) < len(encode_json_payload(value))
+        assert column_type.process_result_value(stored, None) == value
+
+    def test_precompressed_bytes_pass_through(self):
+        """测试已压缩的字节直接写入"""
+        column_type = ZstdJSON()
+        compressed = compress_payload(encode_json_payload({"configs": []}))
+
+        assert column_type.process_bind_param(compressed, None) == compressed
+        assert decompress_payload(compressed) == encode_json_payload({"configs": []})
@@ -6,9 +6,10 @@ import asyncio
 from datetime import datetime
 from unittest.mock import AsyncMock, MagicMock
 
-from app.services.database_config_manager import DatabaseConfigManager
+from app.services.database_config_manager import DatabaseConfigManager, change_log_writer
 from app.models.schemas import ModelConfig, ResourceRequirement, HealthCheckConfig, RetryPolicy
-from app.models.enums import FrameworkType
+from app.models.database import ModelStatusDB
+from app.models.enums import FrameworkType, ModelStatus
 
 @pytest.fixture
 def sample_model_config():
@@ -236,15 +237,16 @@ class TestDatabaseConfigManager:
         """测试配置恢复"""
         # 模拟备份记录存在
         mock_backup = MagicMock()
-        mock_backup.backup_data = '{"timestamp": "20240101_000000", "version": "1.0", "configs": [{"id": "test-model-1", "name": "测试模型"}]}'
+        mock_backup.backup_data = {"timestamp": "20240101_000000", "version": "1.0", "configs": [{"id": "test-model-1", "name": "测试模型"}]}
         mock_backup.checksum = "test_checksum"
         mock_result = MagicMock()
         mock_result.scalar_one_or_none.return_value = mock_backup
         mock_session.execute.return_value = mock_result
         
-        # 模拟校验和计算
+        # 模拟校验和计算（基于未压缩的JSON编码）
         import hashlib
-        expected_checksum = hashlib.sha256(mock_backup.backup_data.encode('utf-8')).hexdigest()
+        from app.models.database import encode_json_payload
+        expected_checksum = hashlib.sha256(encode_json_payload(mock_backup.backup_data)).hexdigest()
         mock_backup.checksum = expected_checksum
         
         # 模拟backup_configs方法
@@ -300,5 +302,135 @@ class TestDatabaseConfigManager:
         assert mock_session.delete.call_count == 5
         mock_session.commit.assert_called_once()
 
+@pytest.fixture
+def manager(mock_session):
+    """会话工厂返回异步上下文管理器的配置管理器"""
+    mock_session.__aenter__.return_value = mock_session
+    manager = DatabaseConfigManager()
+    manager.session_factory = MagicMock(return_value=mock_session)
+    return manager
+
+class TestLogConfigChange:
+    """配置变更日志测试类"""
+    
+    def test_build_change_log(self):
+        """测试变更日志行只记录变化的字段"""
+        row = DatabaseConfigManager()._build_change_log("model-1", "update", {"priority": 5}, {"priority": 8})
+        
+        assert row["model_id"] == "model-1"
+        assert row["changed_fields"] == ["priority"]
+    
+    @pytest.mark.asyncio
+    async def test_change_log_enqueued_after_commit(self, manager, mock_session):
+        """测试提交成功后才放入后写队列，提交失败时不记录变更日志"""
+        mock_result = MagicMock()
+        mock_result.scalar_one_or_none.return_value = MagicMock(id="test-model-1")
+        mock_session.execute.return_value = mock_result
+        manager._db_to_dict = MagicMock(return_value={"priority": 5})
+        before = change_log_writer.pending()
+        
+        mock_session.commit.side_effect = RuntimeError("rollback")
+        assert await manager.delete_model_config("test-model-1") is False
+        assert change_log_writer.pending() == before
+        
+        mock_session.commit.side_effect = None
+        assert await manager.delete_model_config("test-model-1") is True
+        assert change_log_writer.pending() == before + 1
+        row = change_log_writer._drain(change_log_writer.pending())[-1]
+        assert (row["model_id"], row["change_type"]) == ("test-model-1", "delete")
+
+class TestConfigChangeListeners:
+    """配置写入通知测试类"""
+    
+    @pytest.mark.asyncio
+    async def test_delete_publishes_after_commit(self, manager, mock_session):
+        """测试删除提交后通知监听器，配置不存在时不通知"""
+        existing_config = MagicMock()
+        existing_config.id = "test-model-1"
+        mock_result = MagicMock()
+        mock_result.scalar_one_or_none.side_effect = [existing_config, None]
+        mock_session.execute.return_value = mock_result
+        listener = MagicMock()
+        manager.add_change_listener(listener)
+        before = change_log_writer.pending()
+        
+        assert await manager.delete_model_config("test-model-1") is True
+        assert await manager.delete_model_config("missing") is True
+        change_log_writer._drain(change_log_writer.pending() - before)
+        
+        listener.assert_called_once_with("test-model-1")
+        mock_session.commit.assert_awaited_once()
+    
+    @pytest.mark.asyncio
+    async def test_failed_listener_does_not_fail_write(self, manager, mock_session):
+        """测试监听器异常不影响写入结果"""
+        mock_result = MagicMock()
+        mock_result.scalar_one_or_none.return_value = MagicMock(id="test-model-1")
+        mock_session.execute.return_value = mock_result
+        manager.add_change_listener(MagicMock(side_effect=RuntimeError("boom")))
+        before = change_log_writer.pending()
+        
+        assert await manager.delete_model_config("test-model-1") is True
+        change_log_writer._drain(change_log_writer.pending() - before)
+
+class TestLoadModelConfigs:
+    """模型配置加载测试类"""
+    
+    @pytest.mark.asyncio
+    async def test_filter_by_gpu_device_uses_bitmask(self, manager, mock_session):
+        """测试按GPU设备过滤时使用位图条件，不指定时不过滤"""
+        mock_result = MagicMock()
+        mock_result.scalars.return_value.all.return_value = []
+        mock_session.execute.return_value = mock_result
+        
+        await manager.load_model_configs(gpu_device=2)
+        assert "gpu_device_mask &" in str(mock_session.execute.call_args.args[0])
+        
+        await manager.load_model_configs()
+        assert "gpu_device_mask &" not in str(mock_session.execute.call_args.args[0])
+
+class TestModelStatusPersistence:
+    """模型状态持久化测试类"""
+    
+    @pytest.mark.asyncio
+    async def test_status_change_upserts_row(self, manager, mock_session):
+        """测试模型状态变更回调以单条UPSERT写入新状态"""
+        await manager.on_model_status_change("test-model-1", ModelStatus.STARTING, ModelStatus.RUNNING)
+        
+        statement, row = mock_session.execute.await_args.args
+        assert row == {"model_id": "test-model-1", "status": ModelStatus.RUNNING}
+        assert statement is ModelStatusDB.upsert_statement(frozenset(row))
+        mock_session.commit.assert_awaited_once()
+
+class TestIncrementalLoad:
+    """增量加载测试类"""
+    
+    @pytest.mark.asyncio
+    async def test_load_since_splits_deleted_and_advances_watermark(self, manager, mock_session):
+        """测试增量加载区分已删除记录并返回最大更新时间"""
+        deleted = MagicMock(id="gone", is_active=False, updated_at=datetime(2026, 10, 16, 12, 0, 5))
+        active = MagicMock(id="kept", is_active=True, updated_at=datetime(2026, 10, 16, 12, 0, 1))
+        mock_result = MagicMock()
+        mock_result.scalars.return_value.all.return_value = [active, deleted]
+        mock_session.execute.return_value = mock_result
+        manager._db_to_config = MagicMock(side_effect=lambda db_config: db_config.id)
+        
+        configs, deleted_ids, watermark = await manager.load_model_configs_since(datetime(2026, 10, 16, 12))
+        
+        assert configs == ["kept"]
+        assert deleted_ids == ["gone"]
+        assert watermark == datetime(2026, 10, 16, 12, 0, 5)
+        assert "updated_at >=" in str(mock_session.execute.call_args.args[0])
+    
+    @pytest.mark.asyncio
+    async def test_load_since_without_changes_keeps_watermark(self, manager, mock_session):
+        """测试没有变更时沿用原水位"""
+        mock_result = MagicMock()
+        mock_result.scalars.return_value.all.return_value = []
+        mock_session.execute.return_value = mock_result
+        since = datetime(2026, 10, 16, 12)
+        
+        assert await manager.load_model_configs_since(since) == ([], [], since)
+
 if __name__ == "__main__":
     pytest.main([__file__])
\ No newline at end of file
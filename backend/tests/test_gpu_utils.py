@@ -295,6 +295,7 @@ class TestGPUDetector:
             assert metrics[0].device_id == 0
             assert metrics[1].device_id == 1
             assert all(isinstance(m.timestamp, datetime) for m in metrics)
+            assert metrics[0].timestamp is metrics[1].timestamp
     
     def test_clear_cache(self, detector):
         """测试清除缓存"""
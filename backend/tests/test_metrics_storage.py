@@ -11,7 +11,7 @@ import sqlite3
 
 from app.services.metrics_storage import (
     MetricsStorageService, SQLiteMetricsStorage, TimeSeriesMetrics,
-    MetricsQuery, PerformanceMetrics
+    MetricsQuery, PerformanceMetrics, GPUMetricsRollup
 )
 from app.models.schemas import (
     TimeRange, GPUInfo
@@ -632,5 +632,128 @@ class TestTimeSeriesMetrics:
         assert anomalies[0]['timestamp'] == anomaly_time
 
 
+def _gpu_metric(device_id=0, utilization=50.0, memory_used=1024):
+    return {
+        'device_id': device_id,
+        'utilization': utilization,
+        'memory_used': memory_used,
+        'memory_total': 8192,
+        'temperature': 60.0,
+        'power_usage': 150.0
+    }
+
+
+class TestGPUMetricsRollup:
+    """GPU指标滚动聚合测试类"""
+
+    def test_bucket_start_alignment(self):
+        """测试时间桶对齐"""
+        timestamp = datetime(2026, 10, 16, 10, 17, 42, 123)
+
+        assert GPUMetricsRollup.bucket_start(timestamp, 60) == datetime(2026, 10, 16, 10, 17)
+        assert GPUMetricsRollup.bucket_start(timestamp, 3600) == datetime(2026, 10, 16, 10, 0)
+
+    def test_emits_row_when_bucket_rolls_over(self):
+        """测试跨桶时产出上一个桶的汇总"""
+        rollup = GPUMetricsRollup(bucket_widths=(60,))
+        start = datetime(2026, 10, 16, 10, 0)
+
+        for second, utilization in [(0, 20.0), (20, 40.0), (40, 90.0)]:
+            assert rollup.add(start + timedelta(seconds=second), _gpu_metric(utilization=utilization)) == []
+
+        rows = rollup.add(start + timedelta(seconds=60), _gpu_metric(utilization=10.0))
+
+        assert len(rows) == 1
+        assert rows[0]['bucket_start'] == start
+        assert rows[0]['sample_count'] == 3
+        assert rows[0]['util_avg'] == pytest.approx(50.0)
+        assert rows[0]['util_max'] == 90.0
+        assert rows[0]['util_min'] == 20.0
+
+    def test_flush_returns_partial_buckets(self):
+        """测试刷新时产出未完成的桶"""
+        rollup = GPUMetricsRollup()
+        rollup.add(datetime(2026, 10, 16, 10, 0), _gpu_metric(device_id=0))
+        rollup.add(datetime(2026, 10, 16, 10, 0), _gpu_metric(device_id=1))
+
+        rows = rollup.flush()
+
+        assert len(rows) == 4
+        assert rollup.flush() == []
+
+
+class TestSQLiteMetricsStorageRollup:
+    """SQLite指标存储汇总测试类"""
+
+    @pytest.mark.asyncio
+    async def test_aggregate_reads_rollup(self, tmp_path):
+        """测试聚合查询读取汇总表"""
+        storage = SQLiteMetricsStorage(str(tmp_path / "metrics.db"))
+        await storage.initialize()
+        start = datetime(2026, 10, 16, 10, 0)
+
+        try:
+            for minute in range(3):
+                for second in (0, 30):
+                    await storage.store_metrics({
+                        'timestamp': start + timedelta(minutes=minute, seconds=second),
+                        'gpu_metrics': [_gpu_metric(utilization=10.0 * (minute + 1))]
+                    })
+
+            result = await storage.aggregate_gpu_metrics(
+                0, TimeRange(start_time=start, end_time=start + timedelta(hours=1)), interval_minutes=5
+            )
+
+            # 最后一分钟的桶尚未写入汇总表，从内存中的当前桶合并
+            assert len(result) == 1
+            assert result[0]['sample_count'] == 6
+            assert result[0]['avg_utilization'] == pytest.approx(20.0)
+            assert result[0]['max_utilization'] == 30.0
+        finally:
+            await storage.close()
+
+    @pytest.mark.asyncio
+    async def test_partial_bucket_merged_after_restart(self, tmp_path):
+        """测试关闭时写入的未完成桶在重启后与同一桶的新样本合并，而不是被覆盖"""
+        db_path = str(tmp_path / "metrics.db")
+        start = datetime(2026, 10, 16, 10, 0)
+        time_range = TimeRange(start_time=start, end_time=start + timedelta(hours=1))
+
+        storage = SQLiteMetricsStorage(db_path)
+        await storage.initialize()
+        for second, utilization in [(0, 10.0), (10, 20.0), (20, 30.0)]:
+            await storage.store_metrics({
+                'timestamp': start + timedelta(seconds=second),
+                'gpu_metrics': [_gpu_metric(utilization=utilization)]
+            })
+        await storage.close()
+
+        storage = SQLiteMetricsStorage(db_path)
+        await storage.initialize()
+        try:
+            await storage.store_metrics({
+                'timestamp': start + timedelta(seconds=40),
+                'gpu_metrics': [_gpu_metric(utilization=90.0)]
+            })
+            await storage.store_metrics({
+                'timestamp': start + timedelta(seconds=60),
+                'gpu_metrics': [_gpu_metric(utilization=0.0)]
+            })
+
+            cursor = await storage._connection.execute(
+                "SELECT sample_count, util_avg, util_max, util_min FROM gpu_metrics_rollup "
+                "WHERE bucket_width_seconds = 60 AND bucket_start = ?", (start,)
+            )
+            sample_count, util_avg, util_max, util_min = await cursor.fetchone()
+            assert sample_count == 4
+            assert util_avg == pytest.approx(37.5)
+            assert (util_max, util_min) == (90.0, 10.0)
+
+            result = await storage.aggregate_gpu_metrics(0, time_range, interval_minutes=1)
+            assert [row['sample_count'] for row in result] == [4, 1]
+        finally:
+            await storage.close()
+
+
 if __name__ == "__main__":
-    pytest.main([__file__, "-v"])
\ No newline at end of file
+    pytest.main([__file__, "-v"])
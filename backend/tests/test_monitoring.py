@@ -7,11 +7,18 @@ from unittest.mock import Mock, AsyncMock, patch
 from datetime import datetime, timedelta
 import json
 
-from app.services.monitoring import MonitoringService, MetricsCollector, AlertManager
+from app.services.monitoring import MonitoringService, MetricsCollector, AlertManager, GPUMetricsCollector
 from app.models.schemas import (
     GPUInfo, ModelInfo, SystemOverview, AlertRule, AlertCondition, 
-    TimeRange
+    TimeRange, GPUMetrics, GPUMetricsPacked, SystemResourceMetrics, metrics_encoder, Metrics,
+    LazyModel, iter_lazy_models, build_deferred_schemas
 )
+from array import array
+from pydantic import ValidationError
+import msgspec
+from app.api.responses import MsgspecJSONResponse
+from fastapi import FastAPI
+from app.api.monitoring import get_gpu_metrics_history, router as monitoring_router
 from app.services.metrics_storage import MetricsQuery, PerformanceMetrics
 from app.models.enums import (
     ModelStatus, HealthStatus, GPUVendor, AlertSeverity, 
@@ -646,5 +653,144 @@ class TestAlertManager:
         assert result['triggered'] is False
 
 
+
+class TestMetricsStructs:
+    """指标结构体测试"""
+    
+    def test_system_metrics_default_load_average_shared(self):
+        """测试默认负载为不可变空元组，实例间共享而不逐个分配"""
+        first = SystemResourceMetrics(timestamp=datetime.now())
+        second = SystemResourceMetrics(timestamp=datetime.now())
+        
+        assert first.load_average == ()
+        assert first.load_average is second.load_average
+    
+    def test_metrics_are_immutable(self):
+        """测试采样记录不可修改"""
+        metric = GPUMetrics(device_id=0, timestamp=datetime.now(), utilization=50.0,
+                            memory_used=2048, memory_total=8192, temperature=65.0, power_usage=150.0)
+        
+        with pytest.raises(AttributeError):
+            metric.utilization = 0.0
+    
+    def test_msgspec_response_encodes_structs(self):
+        """测试响应直接编码结构体列表"""
+        metric = GPUMetrics(device_id=1, timestamp=datetime(2026, 10, 17, 8, 0), utilization=12.5,
+                            memory_used=1024, memory_total=8192, temperature=40.0, power_usage=80.0)
+        
+        response = MsgspecJSONResponse([metric])
+        
+        assert json.loads(response.body) == [{
+            "device_id": 1, "timestamp": "2026-10-17T08:00:00", "utilization": 12.5,
+            "memory_used": 1024, "memory_total": 8192, "temperature": 40.0, "power_usage": 80.0
+        }]
+        assert response.media_type == "application/json"
+    
+    @pytest.mark.asyncio
+    async def test_history_endpoint_encodes_structs_directly(self):
+        """测试历史数据端点不经逐条转字典直接编码结构体"""
+        metric = GPUMetrics(device_id=0, timestamp=datetime(2026, 10, 17, 8, 0), utilization=30.0,
+                            memory_used=2048, memory_total=8192, temperature=50.0, power_usage=120.0)
+        service = Mock()
+        service.get_gpu_metrics_history = AsyncMock(return_value=[metric, metric])
+        
+        response = await get_gpu_metrics_history(device_id=0, hours=1, limit=10, monitoring_service=service)
+        
+        assert isinstance(response, MsgspecJSONResponse)
+        assert response.body == metrics_encoder.encode([metric, metric])
+        assert json.loads(response.body)[0]["timestamp"] == "2026-10-17T08:00:00"
+    
+    def test_msgspec_endpoints_document_response_schema(self):
+        """测试直接返回msgspec结构体的端点在OpenAPI文档中给出响应结构"""
+        app = FastAPI()
+        app.include_router(monitoring_router)
+        paths = app.openapi()["paths"]
+        
+        expected = {
+            "/api/monitoring/gpu": "power_usage",
+            "/api/monitoring/gpu/history": "power_usage",
+            "/api/monitoring/models/{model_id}/history": "total_response_time",
+            "/api/monitoring/system/history": "load_average",
+        }
+        for path, field_name in expected.items():
+            schema = paths[path]["get"]["responses"]["200"]["content"]["application/json"]["schema"]
+            assert schema["type"] == "array"
+            assert field_name in schema["items"]["properties"]
+            assert "$ref" not in json.dumps(schema)
+    
+    def test_packed_metrics_quantized(self):
+        """测试GPU指标按定点精度压缩并还原"""
+        metric = GPUMetrics(device_id=0, timestamp=datetime(2026, 10, 17, 8, 0), utilization=37.6,
+                            memory_used=2048, memory_total=8192, temperature=65.43, power_usage=151.27)
+        
+        packed = GPUMetricsPacked.from_raw(metric)
+        
+        assert (packed.utilization_pc, packed.temperature_dc, packed.power_dw) == (38, 654, 1513)
+        assert packed.unpack() == GPUMetrics(device_id=0, timestamp=datetime(2026, 10, 17, 8, 0),
+                                             utilization=38.0, memory_used=2048, memory_total=8192,
+                                             temperature=65.4, power_usage=151.3)
+        assert metrics_encoder.encode(packed) == b'[0,"2026-10-17T08:00:00",38,2048,8192,654,1513]'
+        
+        with pytest.raises(msgspec.ValidationError):
+            msgspec.json.decode(b'[0,"2026-10-17T08:00:00",256,0,0,0,0]', type=GPUMetricsPacked)
+    
+    @pytest.mark.asyncio
+    async def test_collector_history_stored_packed(self):
+        """测试采集历史以压缩形式保存，查询时还原为GPU指标"""
+        now = datetime.now()
+        metric = GPUMetrics(device_id=1, timestamp=now, utilization=50.0, memory_used=1024,
+                            memory_total=8192, temperature=40.5, power_usage=80.0)
+        detector = Mock()
+        detector.get_all_gpu_metrics = AsyncMock(return_value=[metric])
+        collector = GPUMetricsCollector(detector)
+        
+        await collector.collect_metrics()
+        history = collector.get_metrics_history(
+            1, TimeRange(start_time=now - timedelta(minutes=1), end_time=now + timedelta(minutes=1))
+        )
+        
+        assert isinstance(collector._metrics_history[1][0], GPUMetricsPacked)
+        assert history == [metric]
+
+
+
+class TestMetricsSchema:
+    """性能指标模式测试"""
+    
+    def _metrics(self, gpu_utilization):
+        now = datetime.now()
+        return Metrics(model_id="m1", time_range=TimeRange(start_time=now, end_time=now),
+                       request_count=0, average_response_time=0.0, error_rate=0.0, throughput=0.0,
+                       gpu_utilization=gpu_utilization)
+    
+    def test_gpu_utilization_stored_as_float32_array(self):
+        """测试GPU利用率历史以紧凑数组存储，序列化为数值列表"""
+        metrics = self._metrics([10, 20.5, 30.25])
+        
+        assert isinstance(metrics.gpu_utilization, array)
+        assert metrics.gpu_utilization.typecode == "f"
+        assert metrics.model_dump()["gpu_utilization"] == [10.0, 20.5, 30.25]
+        assert json.loads(metrics.model_dump_json())["gpu_utilization"] == [10.0, 20.5, 30.25]
+    
+    def test_gpu_utilization_rejects_non_numeric(self):
+        """测试非数值序列校验失败"""
+        with pytest.raises(ValidationError):
+            self._metrics(["high"])
+
+
+class TestDeferredSchemas:
+    """延迟构建模式测试"""
+    
+    def test_all_schemas_build(self):
+        """测试所有延迟构建的模型都能成功构建"""
+        build_deferred_schemas()
+        
+        models = list(iter_lazy_models())
+        assert models
+        assert all(issubclass(model, LazyModel) for model in models)
+        assert all(model.__pydantic_complete__ for model in models)
+        assert build_deferred_schemas() == []
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
\ No newline at end of file
@@ -7,11 +7,13 @@ from datetime import datetime, timedelta
 from unittest.mock import Mock, AsyncMock, patch
 
 from app.models.schemas import (
-    ModelConfig, GPUInfo, ResourceRequirement, ResourceAllocation
+    ModelConfig, GPUInfo, ResourceRequirement, ResourceAllocation,
+    ScheduleDecision, AllocatedDecision, RejectedDecision, schedule_decision_adapter
 )
 from app.models.enums import (
-    FrameworkType, ModelStatus, GPUVendor
+    FrameworkType, ModelStatus, GPUVendor, ScheduleResult
 )
+from pydantic import ValidationError
 from tests.factories import TestDataGenerator, GPUInfoFactory
 
 
@@ -188,5 +190,39 @@ class TestResourceSchedulerBasic:
                 assert len(suitable_gpus) > 0
 
 
+
+@pytest.mark.unit
+class TestScheduleDecisionSchema:
+    """调度决策模式测试"""
+    
+    def test_result_selects_variant(self):
+        """测试按调度结果选择决策变体"""
+        now = datetime.now()
+        
+        allocated = schedule_decision_adapter.validate_python(
+            {"model_id": "m1", "decision_time": now, "result": "success", "gpu_devices": [0, 1]}
+        )
+        rejected = schedule_decision_adapter.validate_python(
+            {"model_id": "m1", "decision_time": now, "result": "insufficient_resources"}
+        )
+        
+        assert isinstance(allocated, AllocatedDecision)
+        assert isinstance(allocated, ScheduleDecision)
+        assert allocated.gpu_devices == (0, 1)
+        assert isinstance(rejected, RejectedDecision)
+        assert rejected.result == ScheduleResult.INSUFFICIENT_RESOURCES
+    
+    def test_variant_requires_its_fields(self):
+        """测试各变体校验自身必需字段"""
+        with pytest.raises(ValidationError):
+            schedule_decision_adapter.validate_python(
+                {"model_id": "m1", "decision_time": datetime.now(), "result": "preemption_required"}
+            )
+        with pytest.raises(ValidationError):
+            schedule_decision_adapter.validate_python(
+                {"model_id": "m1", "decision_time": datetime.now(), "result": "unknown"}
+            )
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
\ No newline at end of file
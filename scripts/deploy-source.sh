@@ -429,6 +429,7 @@ start_backend() {
             --host $HOST \
             --port $PORT \
             --workers $WORKERS \
+            --loop uvloop \
             --log-level $LOG_LEVEL \
             $RELOAD \
             > backend/logs/uvicorn.log 2>&1 &
@@ -442,6 +443,7 @@ start_backend() {
             --host $HOST \
             --port $PORT \
             --workers $WORKERS \
+            --loop uvloop \
             --log-level $LOG_LEVEL \
             $RELOAD &
         
@@ -559,7 +561,7 @@ WorkingDirectory=$PROJECT_ROOT/backend
 Environment=PYTHONPATH=$PROJECT_ROOT/backend
 Environment=APP_ENV=production
 EnvironmentFile=$PROJECT_ROOT/.env
-ExecStart=$PROJECT_ROOT/backend/venv/bin/uvicorn app.main:app --host 0.0.0.0 --port 8000 --workers 4
+ExecStart=$PROJECT_ROOT/backend/venv/bin/uvicorn app.main:app --host 0.0.0.0 --port 8000 --workers 4 --loop uvloop
 ExecReload=/bin/kill -HUP \$MAINPID
 KillMode=mixed
 Restart=on-failure